@@ -173,6 +173,7 @@ const JarvisAPI = (() => {
     getPatternAgents: () => request('GET', '/migration/agents'),
     runMigrationAgent: (app, pattern) => request('POST', '/migration/run', { app_id: app, pattern }),
     getMigrationStatus: (jobId) => request('GET', `/migration/jobs/${jobId}`),
+    getJobArtifacts: (jobId) => request('GET', `/migration/jobs/${jobId}/artifacts`),
     generateTerraform: (appId) => request('POST', `/migration/terraform/${appId}`),
     generatePipeline: (appId) => request('POST', `/migration/pipeline/${appId}`),
     approveStep: (stepId, approve, comment='') => request('POST', `/migration/approve/${stepId}`, { approve, comment }),
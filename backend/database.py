@@ -3,19 +3,42 @@ J.A.R.V.I.S. Database Layer
 SQLite with sqlite-vec for vector embeddings + standard relational tables.
 """
 
-import os, json, logging, aiosqlite
+import os, re, json, time, zlib, heapq, asyncio, logging, sqlite3, aiosqlite
+import orjson
+from operator import itemgetter
 from pathlib import Path
 
+from aiosqlitepool import SQLiteConnectionPool
+
+from services.embeddings import dot_similarity, embedding_f32, normalize, pack_embedding, unpack_embedding
+from services.integrations import integration_profile
+
 logger = logging.getLogger("jarvis.db")
 
 DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "jarvis.db"
-DB_PATH = Path(os.getenv("JARVIS_DB_PATH", str(DEFAULT_DB_PATH))).resolve()
+
+
+def db_path() -> Path:
+    """Database file, read from JARVIS_DB_PATH when the connection is opened."""
+    return Path(os.getenv("JARVIS_DB_PATH", str(DEFAULT_DB_PATH)))
+
+
+# Bump whenever DDL or a schema migration changes; stored in PRAGMA user_version.
+SCHEMA_VERSION = 7
+
+# Bump whenever seed contents change so init_db re-seeds existing databases.
+SEED_VERSION = "1"
+
+DEMO_RUN_ID = "DEMO-RUN-001"
+DEMO_SEED_PATH = Path(__file__).resolve().parent / "data" / "demo_seed.json"
 
 
 # ── Schema ───────────────────────────────────────────────────
 DDL = """
-PRAGMA journal_mode=WAL;
-PRAGMA foreign_keys=ON;
+CREATE TABLE IF NOT EXISTS schema_meta (
+    key         TEXT PRIMARY KEY,
+    value       TEXT
+);
 
 /* ─── GitHub / Repos ─────────────────────────────────── */
 CREATE TABLE IF NOT EXISTS github_tokens (
@@ -23,7 +46,7 @@ CREATE TABLE IF NOT EXISTS github_tokens (
     username    TEXT    NOT NULL UNIQUE,
     token       TEXT    NOT NULL,
     connected_at TEXT   NOT NULL DEFAULT (datetime('now')),
-    profile_json TEXT
+    profile_json JSON
 );
 
 CREATE TABLE IF NOT EXISTS repos (
@@ -41,18 +64,27 @@ CREATE TABLE IF NOT EXISTS repos (
     private     INTEGER DEFAULT 0,
     html_url    TEXT,
     clone_url   TEXT,
-    topics_json TEXT    DEFAULT '[]',
+    topics_json JSON    DEFAULT '[]',
     fetched_at  TEXT    DEFAULT (datetime('now'))
 );
 
+/* ─── GitHub conditional-request cache (ETag / Last-Modified) ── */
+CREATE TABLE IF NOT EXISTS github_cache (
+    url           TEXT PRIMARY KEY,   -- API path
+    etag          TEXT,
+    last_modified TEXT,
+    body          BLOB NOT NULL,      -- raw JSON response body
+    fetched_at    TEXT DEFAULT (datetime('now'))
+);
+
 /* ─── Assessment Runs ───────────────────────────────── */
 CREATE TABLE IF NOT EXISTS scan_runs (
     id          TEXT    PRIMARY KEY,   -- uuid
     status      TEXT    NOT NULL DEFAULT 'pending',  -- pending|running|complete|failed
-    repos_json  TEXT    NOT NULL DEFAULT '[]',
+    repos_json  JSON    NOT NULL DEFAULT '[]',
     started_at  TEXT    DEFAULT (datetime('now')),
     completed_at TEXT,
-    summary_json TEXT,
+    summary_json JSON,
     error_msg   TEXT
 );
 
@@ -77,10 +109,11 @@ CREATE TABLE IF NOT EXISTS applications (
     has_pcf     INTEGER DEFAULT 0,
     has_db      INTEGER DEFAULT 0,
     has_messaging INTEGER DEFAULT 0,
-    db_types_json TEXT DEFAULT '[]',
-    dependencies_json TEXT DEFAULT '[]',
-    files_json  TEXT  DEFAULT '[]',
-    findings_json TEXT DEFAULT '[]',
+    db_types_json JSON DEFAULT '[]',
+    dependencies_json JSON DEFAULT '[]',
+    files_zjson ZJSON,              -- zlib-compressed sorted path list, see pack_files()
+    findings_json JSON DEFAULT '[]',
+    integrations_json JSON,         -- services.integrations.integration_profile(findings_json)
     created_at  TEXT  DEFAULT (datetime('now'))
 );
 
@@ -89,7 +122,7 @@ CREATE TABLE IF NOT EXISTS migration_waves (
     id          TEXT    PRIMARY KEY,
     name        TEXT    NOT NULL,
     status      TEXT    NOT NULL DEFAULT 'planned',  -- planned|active|complete|paused
-    apps_json   TEXT    NOT NULL DEFAULT '[]',
+    apps_json   JSON    NOT NULL DEFAULT '[]',
     progress    REAL    DEFAULT 0.0,
     started_at  TEXT,
     completed_at TEXT,
@@ -107,9 +140,9 @@ CREATE TABLE IF NOT EXISTS migration_jobs (
     terraform_hcl TEXT,
     pipeline_yaml TEXT,
     jenkinsfile TEXT,
-    gcp_arch_json TEXT,
-    diff_json   TEXT,
-    logs_json   TEXT    DEFAULT '[]',
+    gcp_arch_json JSON,
+    diff_json   JSON,
+    logs_json   JSON    DEFAULT '[]',
     started_at  TEXT,
     completed_at TEXT,
     approved_by TEXT,
@@ -127,7 +160,7 @@ CREATE TABLE IF NOT EXISTS terraform_artifacts (
     hcl_outputs TEXT,
     github_actions_yaml TEXT,
     jenkinsfile TEXT,
-    changed_files_json TEXT DEFAULT '[]',
+    changed_files_json JSON DEFAULT '[]',
     generated_at TEXT DEFAULT (datetime('now'))
 );
 
@@ -136,7 +169,7 @@ CREATE TABLE IF NOT EXISTS integration_settings (
     id          INTEGER PRIMARY KEY,
     service     TEXT    NOT NULL UNIQUE,  -- servicenow|sharepoint|jenkins
     enabled     INTEGER DEFAULT 0,
-    config_json TEXT    DEFAULT '{}',
+    config_json JSON    DEFAULT '{}',
     status      TEXT    DEFAULT 'disconnected',
     last_sync   TEXT
 );
@@ -150,7 +183,9 @@ CREATE TABLE IF NOT EXISTS pattern_instructions (
 /* ─── Embeddings (virtual table via sqlite-vec if available) ── */
 CREATE TABLE IF NOT EXISTS app_embeddings (
     app_id      TEXT    PRIMARY KEY,
-    embedding_json TEXT NOT NULL,   -- JSON array of floats (fallback when sqlite-vec absent)
+    embedding   BLOB    NOT NULL,   -- packed float32 (int8 when scale is set)
+    scale       REAL,
+    zero_point  REAL,
     model       TEXT    DEFAULT 'all-MiniLM-L6-v2',
     created_at  TEXT    DEFAULT (datetime('now'))
 );
@@ -161,10 +196,25 @@ CREATE TABLE IF NOT EXISTS code_chunks (
     file_path   TEXT    NOT NULL,
     chunk_text  TEXT    NOT NULL,
     chunk_index INTEGER DEFAULT 0,
-    embedding_json TEXT,
+    embedding   BLOB,               -- packed float32 (int8 when scale is set)
+    scale       REAL,
+    zero_point  REAL,
     created_at  TEXT    DEFAULT (datetime('now'))
 );
 
+-- Bumped on every code_chunks write; the BLOB-fallback search keys its
+-- in-process vector cache on it (see _cached_chunk_vectors).
+INSERT OR IGNORE INTO schema_meta(key, value) VALUES ('code_chunks_version', '0');
+CREATE TRIGGER IF NOT EXISTS trg_chunks_version_ins AFTER INSERT ON code_chunks BEGIN
+    UPDATE schema_meta SET value = value + 1 WHERE key = 'code_chunks_version';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_chunks_version_del AFTER DELETE ON code_chunks BEGIN
+    UPDATE schema_meta SET value = value + 1 WHERE key = 'code_chunks_version';
+END;
+CREATE TRIGGER IF NOT EXISTS trg_chunks_version_upd AFTER UPDATE OF embedding, scale, zero_point ON code_chunks BEGIN
+    UPDATE schema_meta SET value = value + 1 WHERE key = 'code_chunks_version';
+END;
+
 /* ─── PMO ────────────────────────────────────────────── */
 CREATE TABLE IF NOT EXISTS pmo_risks (
     id          TEXT PRIMARY KEY,
@@ -188,306 +238,683 @@ CREATE TABLE IF NOT EXISTS pmo_budget (
 );
 
 /* ─── Indexes ────────────────────────────────────────── */
-CREATE INDEX IF NOT EXISTS idx_apps_scan    ON applications(scan_run_id);
+-- Covers the per-scan listings; its leading column also serves plain scan_run_id lookups.
+CREATE INDEX IF NOT EXISTS idx_apps_dashboard ON applications(scan_run_id, risk_score DESC, pattern_id, complexity, loc, gcp_target);
+DROP INDEX IF EXISTS idx_apps_scan;
 CREATE INDEX IF NOT EXISTS idx_apps_pattern ON applications(pattern_id);
-CREATE INDEX IF NOT EXISTS idx_jobs_app     ON migration_jobs(app_id);
+-- Latest-job lookups (WHERE app_id=? ORDER BY created_at DESC LIMIT n) walk this without a sort.
+CREATE INDEX IF NOT EXISTS idx_jobs_app_created ON migration_jobs(app_id, created_at DESC);
+DROP INDEX IF EXISTS idx_jobs_app;
 CREATE INDEX IF NOT EXISTS idx_jobs_wave    ON migration_jobs(wave_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_status  ON migration_jobs(status, wave_id);
 CREATE INDEX IF NOT EXISTS idx_chunks_app   ON code_chunks(app_id);
+CREATE INDEX IF NOT EXISTS idx_scan_runs_started ON scan_runs(started_at DESC);
 """
 
+# ── JSON columns ────────────────────────────────────────────
+# Columns declared JSON are decoded once at fetch time by sqlite3's
+# PARSE_DECLTYPES converter, so rows come back with Python lists/dicts.
+# orjson parses straight from the fetched bytes; stdlib json is only the
+# fallback for legacy values orjson rejects (e.g. NaN written by json.dumps).
+def _json_converter(raw: bytes):
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        pass
+    try:
+        return json.loads(raw)
+    except Exception:
+        return raw.decode("utf-8", errors="replace")
+
+
+sqlite3.register_converter("JSON", _json_converter)
+
+
+# ZJSON columns hold zlib-compressed JSON. Repo path lists repeat their
+# directory prefixes, so level 1 already shrinks them several times over.
+def pack_files(paths) -> bytes:
+    return zlib.compress(orjson.dumps(sorted(paths or [])), 1)
+
+
+def _files_load(blob: bytes):
+    try:
+        return orjson.loads(zlib.decompress(blob))
+    except (zlib.error, orjson.JSONDecodeError):
+        return []
+
+
+def _files_json_to_blob(text):
+    try:
+        return pack_files(orjson.loads(text)) if text else pack_files([])
+    except orjson.JSONDecodeError:
+        return pack_files([])
+
+
+sqlite3.register_converter("ZJSON", _files_load)
+
+_DDL_TABLE_RE = re.compile(r"CREATE TABLE IF NOT EXISTS (\w+) \((.*?)\n\);", re.S)
+
+
+async def _migrate_json_decltypes(conn: aiosqlite.Connection):
+    """Rebuild legacy tables whose *_json columns are still declared TEXT."""
+    for table, body in _DDL_TABLE_RE.findall(DDL):
+        info = await (await conn.execute(f"PRAGMA table_info({table})")).fetchall()
+        old_types = {r[1]: r[2].upper() for r in info}
+        new_json_cols = re.findall(r"^\s*(\w+_json)\s+JSON", body, re.M)
+        if not any(old_types.get(c, "JSON") != "JSON" for c in new_json_cols):
+            continue
+        logger.info(f"Rebuilding {table} with JSON column types")
+        await conn.commit()
+        await conn.execute("PRAGMA foreign_keys=OFF")
+        await conn.execute("BEGIN IMMEDIATE")
+        await conn.execute(f"CREATE TABLE {table}__new ({body}\n)")
+        new_cols = [r[1] for r in await (await conn.execute(f"PRAGMA table_info({table}__new)")).fetchall()]
+        cols = ", ".join(c for c in new_cols if c in old_types)
+        await conn.execute(f"INSERT INTO {table}__new ({cols}) SELECT {cols} FROM {table}")
+        await conn.execute(f"DROP TABLE {table}")
+        await conn.execute(f"ALTER TABLE {table}__new RENAME TO {table}")
+        await conn.commit()
+        await conn.execute("PRAGMA foreign_keys=ON")
+
+
+# ── Connection PRAGMAs ──────────────────────────────────────
+# Applied once per physical connection. WAL lets readers proceed while a
+# writer holds the lock; busy_timeout makes contended writers wait instead of
+# failing with "database is locked".
+_CONNECTION_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "foreign_keys=ON",
+    "busy_timeout=30000",
+    "wal_autocheckpoint=1000",
+    "temp_store=MEMORY",
+    "cache_size=-20000",
+    "mmap_size=1073741824",  # 1 GiB ceiling; SQLite only maps what the file holds
+)
+
+WAL_CHECKPOINT_INTERVAL_SEC = 60
+OPTIMIZE_INTERVAL_SEC = 6 * 3600
+
+
 # ── VEC extension (optional) ────────────────────────────────
 _VEC_READY = False
 
 
+async def _load_vec_extension(conn: aiosqlite.Connection):
+    """Load sqlite-vec into one connection (extensions are per-connection)."""
+    vec_path = os.getenv("SQLITE_VEC_PATH", "")
+    if not vec_path:
+        import sqlite_vec
+        vec_path = sqlite_vec.loadable_path()
+    await conn.enable_load_extension(True)
+    try:
+        await conn.load_extension(vec_path)
+    finally:
+        await conn.enable_load_extension(False)
+    # Lets the index statements feed int8-quantized rows to vec0 as floats.
+    await conn.create_function("embedding_f32", 3, embedding_f32, deterministic=True)
+
+
 async def _try_load_vec(conn: aiosqlite.Connection):
     """Try to load sqlite-vec extension. Falls back gracefully."""
     global _VEC_READY
     try:
-        vec_path = os.getenv("SQLITE_VEC_PATH", "")
-        if vec_path:
-            await conn.execute(f"SELECT load_extension('{vec_path}')")
-            await conn.execute("""
-                CREATE VIRTUAL TABLE IF NOT EXISTS vec_app_embeddings
-                USING vec0(app_id TEXT, embedding FLOAT[384])
-            """)
-            _VEC_READY = True
-            logger.info("sqlite-vec loaded — vector search enabled ✓")
+        await _load_vec_extension(conn)
+        await conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS vec_app_embeddings
+            USING vec0(app_id TEXT PRIMARY KEY, embedding FLOAT[384] distance_metric=cosine)
+        """)
+        await conn.execute("""
+            INSERT INTO vec_app_embeddings(app_id, embedding)
+            SELECT app_id, embedding FROM app_embeddings
+            WHERE scale IS NULL AND app_id NOT IN (SELECT app_id FROM vec_app_embeddings)
+        """)
+        await conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS vec_code_chunks
+            USING vec0(embedding FLOAT[384] distance_metric=cosine)
+        """)
+        await conn.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS vec_code_chunk_bits
+            USING vec0(embedding BIT[384])
+        """)
+        if not await (await conn.execute("SELECT 1 FROM vec_code_chunk_bits LIMIT 1")).fetchone():
+            # Databases indexed before the bit table existed.
+            await conn.execute(
+                "INSERT INTO vec_code_chunk_bits(rowid, embedding) "
+                "SELECT rowid, vec_quantize_binary(embedding) FROM vec_code_chunks"
+            )
+        await _index_chunks(conn, "")
+        await conn.commit()
+        _VEC_READY = True
+        logger.info("sqlite-vec loaded — vector search enabled ✓")
     except Exception as e:
-        logger.warning(f"sqlite-vec not available ({e}). Using JSON cosine fallback.")
+        logger.warning(f"sqlite-vec not available ({e}). Using in-process cosine fallback.")
+
+
+_SQL_CHUNK_VECTORS = "SELECT id, embedding, scale, zero_point FROM code_chunks"
+
+# Both vec0 tables share code_chunks.id as their rowid. vec_code_chunk_bits
+# holds 1-bit sign quantizations (48 bytes a row) for the coarse ANN pass.
+# Membership is always tested against vec_code_chunks, so the bits insert
+# runs first: reading the table being inserted into makes SQLite buffer the
+# rows, which drops the bit subtype vec0 requires.
+_SQL_INDEX_CHUNKS = """
+    INSERT INTO {table}(rowid, embedding)
+    SELECT id, {value} FROM code_chunks
+    WHERE {where} embedding IS NOT NULL AND id NOT IN (SELECT rowid FROM vec_code_chunks)
+"""
+_CHUNK_INDEXES = (
+    ("vec_code_chunk_bits", "vec_quantize_binary(embedding_f32(embedding, scale, zero_point))"),
+    ("vec_code_chunks", "embedding_f32(embedding, scale, zero_point)"),
+)
+
+# Below this many chunks the exact vec0 scan is as fast as the two-pass search.
+ANN_MIN_CHUNKS = 10000
+# Hamming-distance candidates fetched per requested result before re-ranking.
+ANN_OVERSAMPLE = 16
+
+_SQL_CHUNK_KNN_EXACT = """
+    WITH knn AS (
+        SELECT rowid AS id, distance FROM vec_code_chunks WHERE embedding MATCH ? AND k = ?
+    )
+    SELECT c.id, c.app_id, c.file_path, c.chunk_text, knn.distance
+    FROM knn JOIN code_chunks c ON c.id = knn.id
+    ORDER BY knn.distance
+"""
+_SQL_CHUNK_KNN_BINARY = """
+    WITH coarse AS (
+        SELECT rowid AS id FROM vec_code_chunk_bits WHERE embedding MATCH vec_quantize_binary(?) AND k = ?
+    ), knn AS (
+        SELECT coarse.id, vec_distance_cosine(v.embedding, ?) AS distance
+        FROM coarse JOIN vec_code_chunks v ON v.rowid = coarse.id
+        ORDER BY distance LIMIT ?
+    )
+    SELECT c.id, c.app_id, c.file_path, c.chunk_text, knn.distance
+    FROM knn JOIN code_chunks c ON c.id = knn.id
+    ORDER BY knn.distance
+"""
+
+
+async def _index_chunks(conn: aiosqlite.Connection, where: str, params: tuple = ()):
+    for table, value in _CHUNK_INDEXES:
+        await conn.execute(_SQL_INDEX_CHUNKS.format(table=table, value=value, where=where), params)
+
+
+async def index_code_chunks(conn: aiosqlite.Connection, app_id: str):
+    """Add an app's newly written chunks to the vec0 indexes (no-op without sqlite-vec)."""
+    if _VEC_READY:
+        await _index_chunks(conn, "app_id=? AND", (app_id,))
+
+
+def _decode_vectors(rows):
+    """(key, vector) from (key, embedding, scale, zero_point) rows; undecodable rows are skipped."""
+    for r in rows:
+        try:
+            yield r[0], unpack_embedding(r[1], r[2], r[3])
+        except Exception:
+            continue
+
+
+def _top_k(pairs, query_vec, limit: int) -> list[tuple]:
+    """(key, score) for the `limit` (key, vector) pairs most similar to query_vec."""
+    unit_q = normalize(query_vec)
+    # Scores stream straight into the heap. Same order as a stable full sort,
+    # but only keeps the top `limit`.
+    return heapq.nlargest(limit, ((k, dot_similarity(unit_q, v)) for k, v in pairs), key=itemgetter(1))
+
+
+# Decoded chunk vectors for the BLOB fallback, shared by every request and
+# rebuilt only when code_chunks_version moves.
+_chunk_vectors: list[tuple] = []
+_chunk_vectors_version: str | None = None
+_chunk_vectors_lock = asyncio.Lock()
+
+
+async def _cached_chunk_vectors(conn: aiosqlite.Connection) -> list[tuple]:
+    global _chunk_vectors, _chunk_vectors_version
+    row = await conn.execute_fetchone("SELECT value FROM schema_meta WHERE key='code_chunks_version'")
+    version = str(row[0]) if row else None
+    if version is not None and version == _chunk_vectors_version:
+        return _chunk_vectors
+    async with _chunk_vectors_lock:
+        if version is None or version != _chunk_vectors_version:
+            # Read after the version: a write in between only forces one extra rebuild.
+            # Decoded batch by batch so the raw BLOB rows are never all held at once.
+            vectors = []
+            async for rows in conn.execute_fetchmany(_SQL_CHUNK_VECTORS):
+                vectors.extend(_decode_vectors(rows))
+            _chunk_vectors = vectors
+            _chunk_vectors_version = version
+    return _chunk_vectors
+
+
+async def search_code_chunks(conn: aiosqlite.Connection, query_vec: list[float], limit: int = 10) -> list[dict]:
+    """
+    Nearest code chunks to query_vec. With sqlite-vec, large tables take a
+    binary-quantized Hamming pass and re-rank its candidates by exact cosine;
+    small ones use exact vec0 KNN. Without it, a BLOB cosine scan.
+    """
+    if _VEC_READY:
+        blob = pack_embedding(query_vec)[0]
+        (chunk_count,) = await conn.execute_fetchone("SELECT COUNT(*) FROM code_chunks")
+        if chunk_count >= ANN_MIN_CHUNKS:
+            rows = await conn.execute_fetchall(_SQL_CHUNK_KNN_BINARY, (blob, limit * ANN_OVERSAMPLE, blob, limit))
+        else:
+            rows = await conn.execute_fetchall(_SQL_CHUNK_KNN_EXACT, (blob, limit))
+        return [
+            {"id": r[0], "app_id": r[1], "file_path": r[2], "chunk_text": r[3], "score": 1.0 - float(r[4])}
+            for r in rows
+        ]
+
+    # Score from the vector columns alone, then fetch text for the winners only.
+    # Pure-Python scoring over the whole corpus: keep it off the event loop.
+    top = await asyncio.to_thread(_top_k, await _cached_chunk_vectors(conn), query_vec, limit)
+    if not top:
+        return []
+    details = {
+        r[0]: r
+        for r in await conn.execute_fetchall(
+            "SELECT id, app_id, file_path, chunk_text FROM code_chunks WHERE id IN (SELECT value FROM json_each(?))",
+            (orjson.dumps([cid for cid, _ in top]).decode(),),
+        )
+    }
+    return [
+        {"id": cid, "app_id": details[cid][1], "file_path": details[cid][2], "chunk_text": details[cid][3], "score": score}
+        for cid, score in top
+    ]
+
+
+async def upsert_app_embedding(conn: aiosqlite.Connection, app_id: str, vec: list[float], model: str):
+    """Store an application embedding (BLOB column always, vec0 table when loaded)."""
+    blob, scale, zero_point = pack_embedding(vec)
+    await conn.execute(
+        "INSERT OR REPLACE INTO app_embeddings(app_id, embedding, scale, zero_point, model, created_at) VALUES (?,?,?,?,?,datetime('now'))",
+        (app_id, blob, scale, zero_point, model),
+    )
+    if _VEC_READY:
+        # vec0 tables do not support INSERT OR REPLACE.
+        await conn.execute("DELETE FROM vec_app_embeddings WHERE app_id=?", (app_id,))
+        await conn.execute("INSERT INTO vec_app_embeddings(app_id, embedding) VALUES (?,?)", (app_id, blob))
+
+
+async def search_app_embeddings(conn: aiosqlite.Connection, query_vec: list[float], limit: int = 10) -> list[dict]:
+    """Nearest applications to query_vec by cosine similarity."""
+    if _VEC_READY:
+        rows = await conn.execute_fetchall(
+            "SELECT app_id, distance FROM vec_app_embeddings WHERE embedding MATCH ? AND k = ? ORDER BY distance",
+            (pack_embedding(query_vec)[0], limit),
+        )
+        return [{"app_id": r[0], "score": 1.0 - float(r[1])} for r in rows]
+
+    rows = await conn.execute_fetchall("SELECT app_id, embedding, scale, zero_point FROM app_embeddings")
+    return [{"app_id": app_id, "score": score} for app_id, score in _top_k(_decode_vectors(rows), query_vec, limit)]
+
+
+def _json_to_blob(text):
+    try:
+        return pack_embedding(json.loads(text))[0] if text else None
+    except Exception:
+        return None
+
+
+async def _migrate_embedding_blobs(conn: aiosqlite.Connection):
+    """One-shot upgrade of legacy embedding_json TEXT columns to float32 BLOBs."""
+    for table in ("app_embeddings", "code_chunks"):
+        cols = {r[1] for r in await (await conn.execute(f"PRAGMA table_info({table})")).fetchall()}
+        if "embedding_json" not in cols:
+            continue
+        logger.info(f"Migrating {table}.embedding_json to BLOB storage")
+        for col, decl in (("embedding", "BLOB"), ("scale", "REAL"), ("zero_point", "REAL")):
+            if col not in cols:
+                await conn.execute(f"ALTER TABLE {table} ADD COLUMN {col} {decl}")
+        await conn.create_function("json_to_blob", 1, _json_to_blob, deterministic=True)
+        await conn.execute(f"UPDATE {table} SET embedding = json_to_blob(embedding_json) WHERE embedding IS NULL")
+        await conn.execute(f"ALTER TABLE {table} DROP COLUMN embedding_json")
+    await conn.commit()
+
+
+def _integration_profile_json(findings_text):
+    return orjson.dumps(integration_profile(findings_text)).decode()
+
+
+async def _backfill_integrations(conn: aiosqlite.Connection):
+    """Fill applications.integrations_json for rows written without it (legacy or seeded)."""
+    cols = {r[1] for r in await (await conn.execute("PRAGMA table_info(applications)")).fetchall()}
+    if "integrations_json" not in cols:
+        await conn.execute("ALTER TABLE applications ADD COLUMN integrations_json JSON")
+    await conn.create_function("integration_profile", 1, _integration_profile_json, deterministic=True)
+    await conn.execute(
+        "UPDATE applications SET integrations_json = integration_profile(findings_json) WHERE integrations_json IS NULL"
+    )
+
+
+async def _migrate_files_blob(conn: aiosqlite.Connection):
+    """One-shot upgrade of applications.files_json to the compressed files_zjson column."""
+    cols = {r[1] for r in await (await conn.execute("PRAGMA table_info(applications)")).fetchall()}
+    if "files_json" not in cols:
+        return
+    logger.info("Compressing applications.files_json into files_zjson")
+    if "files_zjson" not in cols:
+        await conn.execute("ALTER TABLE applications ADD COLUMN files_zjson ZJSON")
+    await conn.create_function("files_blob", 1, _files_json_to_blob, deterministic=True)
+    await conn.execute("UPDATE applications SET files_zjson = files_blob(files_json) WHERE files_zjson IS NULL")
+    await conn.execute("ALTER TABLE applications DROP COLUMN files_json")
+    await conn.commit()
+
+
+async def _apply_pragmas(conn: aiosqlite.Connection):
+    for pragma in _CONNECTION_PRAGMAS:
+        await conn.execute(f"PRAGMA {pragma}")
 
 
 async def init_db():
-    async with aiosqlite.connect(DB_PATH) as conn:
+    async with aiosqlite.connect(db_path()) as conn:
         conn.row_factory = aiosqlite.Row
+        await _apply_pragmas(conn)
+        mmap = await (await conn.execute("PRAGMA mmap_size")).fetchone()
+        if not (mmap and mmap[0]):
+            logger.info("SQLite build has memory-mapped I/O disabled; reads use pread.")
+        (user_version,) = await (await conn.execute("PRAGMA user_version")).fetchone()
+        if user_version != SCHEMA_VERSION:
+            # Before the decltype rebuild, which only carries over current DDL columns.
+            await _migrate_files_blob(conn)
+            await _migrate_json_decltypes(conn)
+            await conn.executescript(DDL)
+            await _migrate_embedding_blobs(conn)
+            await _backfill_integrations(conn)
+            await conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            await conn.commit()
         await _try_load_vec(conn)
-        await conn.executescript(DDL)
-        await _seed_default_data(conn)
+        row = await (await conn.execute("SELECT value FROM schema_meta WHERE key='seed_version'")).fetchone()
+        seeded = bool(row and row[0] == SEED_VERSION)
+        if not seeded:
+            # Seed everything in one write transaction (single fsync group).
+            await conn.execute("BEGIN IMMEDIATE")
+            await _seed_default_data(conn)
+            await _backfill_integrations(conn)
+            await conn.execute(
+                "INSERT OR REPLACE INTO schema_meta(key, value) VALUES ('seed_version', ?)",
+                (SEED_VERSION,),
+            )
+            await conn.commit()
+        stats = await (await conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name='sqlite_stat1'"
+        )).fetchone()
+        if not seeded or not stats:
+            # Give the planner row estimates so it picks the covering indexes.
+            await conn.execute("ANALYZE")
+        else:
+            await conn.execute("PRAGMA optimize")
         await conn.commit()
 
 
+async def _insert_values(conn, table, columns, rows, conflict=""):
+    """Insert all rows with one multi-row VALUES statement (parsed and planned once)."""
+    if not rows:
+        return
+    group = "(" + ",".join("?" * len(columns)) + ")"
+    sql = (
+        f"INSERT INTO {table}({','.join(columns)}) VALUES "
+        + ",".join([group] * len(rows))
+        + f" ON CONFLICT{conflict} DO NOTHING"
+    )
+    await conn.execute(sql, [value for row in rows for value in row])
+
+
 async def _seed_default_data(conn):
     """Seed integration rows and default waves if not present."""
-    for svc in ["servicenow", "sharepoint", "jenkins"]:
-        await conn.execute(
-            "INSERT OR IGNORE INTO integration_settings (service, enabled, config_json, status) VALUES (?,0,'{}','disconnected')",
-            (svc,)
-        )
-    for pid in ["P1", "P2", "P3", "P4", "P5"]:
-        await conn.execute(
-            "INSERT OR IGNORE INTO pattern_instructions(pattern_id, instructions) VALUES (?, '')",
-            (pid,),
-        )
-    for i, (name, apps) in enumerate([
-        ("Wave 1", "[]"),
-        ("Wave 2", "[]"),
-        ("Wave 3", "[]"),
-    ], 1):
-        wave_id = f"WAVE-{i:03d}"
-        await conn.execute(
-            "INSERT OR IGNORE INTO migration_waves(id,name,apps_json) VALUES (?,?,?)",
-            (wave_id, name, apps)
-        )
-    for rid, title, prob, impact, rating, owner, mitigation in [
-        ("R-001","Cloud SQL connection pool exhaustion","high","critical","critical","DBA Lead","Increase pool size, add pgbouncer"),
-        ("R-002","PCF manifest incompatibilities with GKE","medium","high","high","Arch Lead","Run cf-to-k8s conversion tool, review each manifest"),
-        ("R-003","Jenkins pipeline GCP auth not configured","high","high","critical","DevOps Lead","Configure GCP Workload Identity for Jenkins"),
-        ("R-004","Service Bus → Pub/Sub flow mapping gaps","medium","medium","medium","Integration Lead","Document all topic/subscription mappings"),
-        ("R-005","Data replication lag during cutover","low","high","high","DBA Lead","Use DMS continuous replication, test failover"),
-    ]:
-        await conn.execute(
-            "INSERT OR IGNORE INTO pmo_risks(id,title,probability,impact,rating,owner,mitigation) VALUES (?,?,?,?,?,?,?)",
-            (rid,title,prob,impact,rating,owner,mitigation)
-        )
+    await _insert_values(
+        conn, "integration_settings", ("service", "enabled", "config_json", "status"),
+        [(svc, 0, "{}", "disconnected") for svc in ["servicenow", "sharepoint", "jenkins"]],
+        "(service)",
+    )
+    await _insert_values(
+        conn, "pattern_instructions", ("pattern_id", "instructions"),
+        [(pid, "") for pid in ["P1", "P2", "P3", "P4", "P5"]],
+        "(pattern_id)",
+    )
+    await _insert_values(
+        conn, "migration_waves", ("id", "name", "apps_json"),
+        [
+            (f"WAVE-{i:03d}", name, apps)
+            for i, (name, apps) in enumerate([
+                ("Wave 1", "[]"),
+                ("Wave 2", "[]"),
+                ("Wave 3", "[]"),
+            ], 1)
+        ],
+        "(id)",
+    )
+    await _insert_values(
+        conn, "pmo_risks", ("id", "title", "probability", "impact", "rating", "owner", "mitigation"),
+        [
+            ("R-001","Cloud SQL connection pool exhaustion","high","critical","critical","DBA Lead","Increase pool size, add pgbouncer"),
+            ("R-002","PCF manifest incompatibilities with GKE","medium","high","high","Arch Lead","Run cf-to-k8s conversion tool, review each manifest"),
+            ("R-003","Jenkins pipeline GCP auth not configured","high","high","critical","DevOps Lead","Configure GCP Workload Identity for Jenkins"),
+            ("R-004","Service Bus → Pub/Sub flow mapping gaps","medium","medium","medium","Integration Lead","Document all topic/subscription mappings"),
+            ("R-005","Data replication lag during cutover","low","high","high","DBA Lead","Use DMS continuous replication, test failover"),
+        ],
+        "(id)",
+    )
     budget_rows = [
         ("Wave 1",620000,0,0), ("Wave 2",780000,0,0),
         ("Wave 3",920000,0,0), ("Infra",280000,0,0), ("PMO",200000,0,0),
     ]
-    for row in budget_rows:
-        await conn.execute(
-            "INSERT OR IGNORE INTO pmo_budget(wave,planned,actual,gcp_monthly) VALUES (?,?,?,?)", row
-        )
+    await _insert_values(conn, "pmo_budget", ("wave", "planned", "actual", "gcp_monthly"), budget_rows)
     await _seed_demo_assessment_data(conn)
 
 
 async def _seed_demo_assessment_data(conn):
-    demo_run_id = "DEMO-RUN-001"
-    patterns = ["P1", "P2", "P3", "P4", "P5"]
-    pattern_names = {
-        "P1": "Web + DMZ Replatform",
-        "P2": "Global L7 Load Balancer Modernization",
-        "P3": "Database Migration and Rebuild",
-        "P4": "PCF to GKE Replatform",
-        "P5": "Messaging Modernization",
-    }
-    gcp_targets = {
-        "P1": "GCE + Cloud Armor + Cloud SQL",
-        "P2": "Global External HTTP(S) Load Balancer",
-        "P3": "Cloud SQL + Database Migration Service",
-        "P4": "GKE + Artifact Registry",
-        "P5": "Pub/Sub + Cloud Run",
-    }
-    frameworks = {
-        "P1": "spring",
-        "P2": "node",
-        "P3": "dotnet",
-        "P4": "java",
-        "P5": "python",
-    }
-    languages = {
-        "P1": "Java",
-        "P2": "TypeScript",
-        "P3": "C#",
-        "P4": "Java",
-        "P5": "Python",
-    }
-    seeds = {
-        "P1": ["customer-portal", "partner-gateway", "agent-hub", "claims-web", "payments-web", "retail-portal", "onboarding-web", "dealer-portal", "billing-web", "support-web"],
-        "P2": ["traffic-edge", "api-edge", "checkout-edge", "catalog-edge", "policy-edge", "mobile-edge", "identity-edge", "pricing-edge", "routing-edge", "partner-edge"],
-        "P3": ["ledger-core", "policy-db-sync", "order-ledger", "audit-store", "settlement-db", "recon-db", "customer-master", "claims-ledger", "risk-warehouse", "payment-ledger"],
-        "P4": ["pcf-order", "pcf-billing", "pcf-reporting", "pcf-pricing", "pcf-notify", "pcf-session", "pcf-eligibility", "pcf-catalog", "pcf-search", "pcf-analytics"],
-        "P5": ["event-router", "notification-bus", "integration-stream", "risk-events", "payment-events", "customer-events", "order-events", "claims-events", "audit-events", "telemetry-events"],
-    }
-
-    demo_repos = []
-    demo_apps = []
-    app_counter = 1
-    for pid in patterns:
-        for idx, base in enumerate(seeds[pid], start=1):
-            app_id = f"DEMO-APP-{app_counter:03d}"
-            repo_full = f"predefined/demo-org/{base}"
-            app_name = base.replace("-", " ").title().replace("Pcf", "PCF")
-
-            has_db = 1 if pid in {"P1", "P3", "P4"} else 0
-            has_messaging = 1 if pid in {"P1", "P5"} else 0
-            db_types = ["postgres"] if pid in {"P1", "P4"} else (["mysql"] if pid == "P3" else [])
-
-            integration_targets = [
-                f"DEMO-APP-{((app_counter) % 50) + 1:03d}",
-                f"DEMO-APP-{((app_counter + 7) % 50) + 1:03d}",
-            ]
-            primary_coupling = "tight" if pid in {"P1", "P3", "P4"} and idx % 2 == 0 else "loose"
-            db_coupling = "tight" if pid in {"P3", "P4"} else "loose"
-            integration_points = [
-                {"target": integration_targets[0], "coupling": primary_coupling},
-                {"target": integration_targets[1], "coupling": "loose" if primary_coupling == "tight" else "tight"},
-            ]
-            files = [
-                "src/main/app.py" if languages[pid] == "Python" else "src/main/App.java",
-                "Jenkinsfile",
-                ".github/workflows/deploy.yml",
-                "terraform/main.tf",
-                "network/dmz.tf" if pid == "P1" else "network/lb.tf" if pid == "P2" else "database/migration.tf" if pid == "P3" else "k8s/deployment.yaml" if pid == "P4" else "messaging/pubsub.tf",
-            ]
-            findings = [
-                {
-                    "type": "metadata",
-                    "tags": ["predefined", "demo", "assessment-catalog"],
-                    "portfolio": "enterprise-migration",
-                    "coupling_profile": {
-                        "app": primary_coupling,
-                        "database": db_coupling,
-                    },
-                },
-                {
-                    "type": "app_to_app_integration",
-                    "protocols": ["REST", "gRPC"] if pid in {"P1", "P2", "P4"} else ["event"],
-                    "targets": integration_targets,
-                    "integration_points": integration_points,
-                    "coupling": primary_coupling,
-                },
-                {
-                    "type": "app_to_db_integration",
-                    "datastores": db_types or ["none"],
-                    "mode": "read-write" if has_db else "n/a",
-                    "coupling": db_coupling,
-                },
-                {
-                    "type": "scan_details",
-                    "code_artifacts": {
-                        "languages": [languages[pid]],
-                        "pipelines": ["Jenkinsfile", ".github/workflows/deploy.yml"],
-                        "iac": ["terraform/main.tf"],
-                        "key_files": files,
-                    },
-                },
-            ]
-
-            demo_repos.append(repo_full)
-            demo_apps.append(
-                {
-                    "id": app_id,
-                    "scan_run_id": demo_run_id,
-                    "name": app_name,
-                    "repo_full_name": repo_full,
-                    "language": languages[pid],
-                    "framework": frameworks[pid],
-                    "loc": 12000 + (idx * 1400) + (patterns.index(pid) * 900),
-                    "complexity": "high" if pid in {"P1", "P3", "P4"} and idx % 3 == 0 else "medium",
-                    "risk_score": float(38 + (idx * 3) + (patterns.index(pid) * 4)),
-                    "pattern_id": pid,
-                    "pattern_name": pattern_names[pid],
-                    "gcp_target": gcp_targets[pid],
-                    "has_dockerfile": 1 if pid in {"P1", "P4", "P5"} else 0,
-                    "has_terraform": 1,
-                    "has_jenkinsfile": 1,
-                    "has_github_actions": 1,
-                    "has_pcf": 1 if pid == "P4" else 0,
-                    "has_db": has_db,
-                    "has_messaging": has_messaging,
-                    "db_types_json": json.dumps(db_types),
-                    "dependencies_json": json.dumps(["maven", "redis"] if pid in {"P1", "P4"} else ["npm", "nginx"] if pid == "P2" else ["dotnet", "sqlclient"] if pid == "P3" else ["pip", "pubsub"]),
-                    "files_json": json.dumps(files),
-                    "findings_json": json.dumps(findings),
-                }
-            )
-            app_counter += 1
-
-    summary = {
-        "repo_count": len(demo_repos),
-        "app_count": len(demo_apps),
-        "total_loc": sum(a["loc"] for a in demo_apps),
-        "stage": "Demo scan seeded",
-        "progress": 100,
-        "seeded": True,
-    }
-
+    """Load the precomputed demo catalog (see scripts/build_demo_seed.py) in two statements."""
+    row = await (await conn.execute(
+        "SELECT COUNT(*) FROM applications WHERE scan_run_id=?", (DEMO_RUN_ID,)
+    )).fetchone()
+    if row and row[0]:
+        return
+
+    seed_text = DEMO_SEED_PATH.read_text(encoding="utf-8")
+    await conn.create_function("files_blob", 1, _files_json_to_blob, deterministic=True)
     await conn.execute(
         """
         INSERT OR REPLACE INTO scan_runs(id,status,repos_json,started_at,completed_at,summary_json)
-        VALUES (?,?,?,datetime('now','-2 day'),datetime('now','-2 day'),?)
+        SELECT value->>'id', value->>'status', value->'repos_json',
+               datetime('now','-2 day'), datetime('now','-2 day'), value->'summary_json'
+        FROM json_each(?, '$.scan_runs')
         """,
-        (demo_run_id, "complete", json.dumps(demo_repos), json.dumps(summary)),
+        (seed_text,),
     )
-
-    for app in demo_apps:
-        await conn.execute(
-            """
-            INSERT OR REPLACE INTO applications(
-                id, scan_run_id, name, repo_full_name, language, framework, loc, complexity,
-                risk_score, pattern_id, pattern_name, gcp_target, has_dockerfile, has_terraform,
-                has_jenkinsfile, has_github_actions, has_pcf, has_db, has_messaging,
-                db_types_json, dependencies_json, files_json, findings_json
-            ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-            """,
-            (
-                app["id"], app["scan_run_id"], app["name"], app["repo_full_name"], app["language"], app["framework"],
-                app["loc"], app["complexity"], app["risk_score"], app["pattern_id"], app["pattern_name"],
-                app["gcp_target"], app["has_dockerfile"], app["has_terraform"], app["has_jenkinsfile"],
-                app["has_github_actions"], app["has_pcf"], app["has_db"], app["has_messaging"],
-                app["db_types_json"], app["dependencies_json"], app["files_json"], app["findings_json"],
-            ),
+    await conn.execute(
+        """
+        INSERT OR REPLACE INTO applications(
+            id, scan_run_id, name, repo_full_name, language, framework, loc, complexity,
+            risk_score, pattern_id, pattern_name, gcp_target, has_dockerfile, has_terraform,
+            has_jenkinsfile, has_github_actions, has_pcf, has_db, has_messaging,
+            db_types_json, dependencies_json, files_zjson, findings_json
         )
+        SELECT
+            value->>'id', value->>'scan_run_id', value->>'name', value->>'repo_full_name',
+            value->>'language', value->>'framework', value->>'loc', value->>'complexity',
+            value->>'risk_score', value->>'pattern_id', value->>'pattern_name', value->>'gcp_target',
+            value->>'has_dockerfile', value->>'has_terraform', value->>'has_jenkinsfile',
+            value->>'has_github_actions', value->>'has_pcf', value->>'has_db', value->>'has_messaging',
+            value->'db_types_json', value->'dependencies_json', files_blob(value->'files_json'), value->'findings_json'
+        FROM json_each(?, '$.applications')
+        """,
+        (seed_text,),
+    )
+
+
+# ── Shared SQL ───────────────────────────────────────────────
+# Statements issued from several modules. Keeping one copy of the text
+# guarantees hits in each pooled connection's prepared-statement cache.
+SQL_LATEST_GITHUB_TOKEN = "SELECT token FROM github_tokens ORDER BY connected_at DESC LIMIT 1"
+SQL_COUNT_APPLICATIONS = "SELECT COUNT(*) FROM applications"
+SQL_COUNT_MIGRATED_APPS = "SELECT COUNT(*) FROM migration_jobs WHERE status IN ('approved','complete')"
+
 
+# ── Connection pools ─────────────────────────────────────────
+# WAL allows one writer alongside many readers, so writes queue on a single
+# dedicated connection while SELECTs fan out over query_only readers.
+READER_POOL_SIZE = os.cpu_count() or 4
+# sqlite3 keeps this many compiled statements per connection (default 128).
+STATEMENT_CACHE_SIZE = 256
+# Batch size for execute_fetchmany table scans.
+FETCHMANY_SIZE = 250
 
-# ── Connection helper ────────────────────────────────────────
+_WRITER_POOL: SQLiteConnectionPool | None = None
+_READER_POOL: SQLiteConnectionPool | None = None
+
+
+async def _connection_factory(read_only: bool = False) -> aiosqlite.Connection:
+    """Open one long-lived pooled connection and apply per-connection PRAGMAs once."""
+    conn = await aiosqlite.connect(
+        db_path(),
+        cached_statements=STATEMENT_CACHE_SIZE,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+    )
+    conn.row_factory = aiosqlite.Row
+    await _apply_pragmas(conn)
+    if read_only:
+        await conn.execute("PRAGMA query_only=true")
+    if _VEC_READY:
+        await _load_vec_extension(conn)
+
+    async def _execute_fetchone(sql, params=()):
+        cur = await conn.execute(sql, params)
+        return await cur.fetchone()
+
+    async def _execute_fetchmany(sql, params=(), size=FETCHMANY_SIZE):
+        """Yield result rows in batches of `size`, one thread hop per batch."""
+        cur = await conn.execute(sql, params)
+        try:
+            while rows := await cur.fetchmany(size):
+                yield rows
+        finally:
+            await cur.close()
+
+    # aiosqlite's own execute_fetchall runs execute + fetchall in a single
+    # hop to the connection thread, so it is used as-is.
+    conn.execute_fetchone = _execute_fetchone
+    conn.execute_fetchmany = _execute_fetchmany
+    return conn
+
+
+async def _reader_factory() -> aiosqlite.Connection:
+    return await _connection_factory(read_only=True)
+
+
+async def open_pool() -> SQLiteConnectionPool:
+    """Create the process-global writer and reader pools (idempotent); returns the writer."""
+    global _WRITER_POOL, _READER_POOL
+    if _WRITER_POOL is None:
+        _WRITER_POOL = SQLiteConnectionPool(_connection_factory, pool_size=1)
+    if _READER_POOL is None:
+        _READER_POOL = SQLiteConnectionPool(_reader_factory, pool_size=READER_POOL_SIZE)
+    return _WRITER_POOL
+
+
+async def close_pool():
+    global _WRITER_POOL, _READER_POOL
+    if _WRITER_POOL is not None:
+        try:
+            async with db_write() as conn:
+                await conn.execute("PRAGMA optimize")
+        except Exception as e:
+            logger.warning(f"PRAGMA optimize skipped: {e}")
+        await _WRITER_POOL.close()
+        _WRITER_POOL = None
+    if _READER_POOL is not None:
+        await _READER_POOL.close()
+        _READER_POOL = None
+
+
+async def wal_checkpoint_loop(interval_sec: int = WAL_CHECKPOINT_INTERVAL_SEC):
+    """Periodically run a PASSIVE checkpoint so the WAL file stays bounded."""
+    while True:
+        await asyncio.sleep(interval_sec)
+        try:
+            async with db_write() as conn:
+                await conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        except Exception as e:
+            logger.warning(f"WAL checkpoint skipped: {e}")
+
+
+async def optimize_loop(interval_sec: int = OPTIMIZE_INTERVAL_SEC):
+    """Periodically refresh planner statistics that have drifted (usually a no-op)."""
+    while True:
+        await asyncio.sleep(interval_sec)
+        try:
+            async with db_write() as conn:
+                await conn.execute("PRAGMA optimize")
+        except Exception as e:
+            logger.warning(f"PRAGMA optimize skipped: {e}")
+
+
+# ── Connection helpers ───────────────────────────────────────
 class DB:
-    """Async context-manager wrapping aiosqlite."""
-    def __init__(self):
-        self._conn = None
+    """Async context-manager lending a pooled aiosqlite connection."""
+    def __init__(self, read_only: bool = False):
+        self._read_only = read_only
+        self._cm = None
 
     async def __aenter__(self) -> aiosqlite.Connection:
-        self._conn = await aiosqlite.connect(DB_PATH)
-        self._conn.row_factory = aiosqlite.Row
-        await self._conn.execute("PRAGMA foreign_keys=ON")
-        await self._conn.execute("PRAGMA journal_mode=WAL")
-        await self._conn.execute("PRAGMA temp_store=MEMORY")
-        await self._conn.execute("PRAGMA cache_size=-20000")
+        await open_pool()
+        pool = _READER_POOL if self._read_only else _WRITER_POOL
+        self._cm = pool.connection()
+        return await self._cm.__aenter__()
 
-        if not hasattr(self._conn, "execute_fetchone"):
-            async def _execute_fetchone(sql, params=()):
-                cur = await self._conn.execute(sql, params)
-                return await cur.fetchone()
+    async def __aexit__(self, *exc):
+        if self._cm:
+            await self._cm.__aexit__(*exc)
+            self._cm = None
 
-            async def _execute_fetchall(sql, params=()):
-                cur = await self._conn.execute(sql, params)
-                return await cur.fetchall()
 
-            self._conn.execute_fetchone = _execute_fetchone
-            self._conn.execute_fetchall = _execute_fetchall
-        return self._conn
+def db_read() -> DB:
+    """Borrow a query_only reader; never blocks on, or blocks, the writer."""
+    return DB(read_only=True)
 
-    async def __aexit__(self, *_):
-        if self._conn:
-            await self._conn.close()
 
-
-def db() -> DB:
+def db_write() -> DB:
+    """Borrow the single writer. Keep the block short: other writes queue behind it."""
     return DB()
 
 
 def row2dict(row) -> dict:
-    if row is None:
-        return {}
-    d = dict(row)
-    # Auto-parse _json suffix fields
-    for k, v in d.items():
-        if k.endswith("_json") and isinstance(v, str):
-            try:
-                d[k] = json.loads(v)
-            except Exception:
-                pass
-    return d
+    # JSON columns are already decoded by the registered converter.
+    return dict(row) if row is not None else {}
 
 
 def rows2list(rows) -> list:
     return [row2dict(r) for r in rows]
+
+
+# ── GitHub token cache ───────────────────────────────────────
+# The latest token is read by every repo listing and scan. It only changes
+# through the GitHub connect/disconnect endpoints, which invalidate it.
+TOKEN_CACHE_TTL_SEC = 30
+
+_token_cache: tuple[str | None, float] = (None, 0.0)
+_token_generation = 0
+
+
+async def latest_github_token() -> str | None:
+    """Most recently connected GitHub token, cached for TOKEN_CACHE_TTL_SEC."""
+    global _token_cache
+    token, expires_at = _token_cache
+    if time.monotonic() < expires_at:
+        return token
+    generation = _token_generation
+    async with db_read() as conn:
+        row = await conn.execute_fetchone(SQL_LATEST_GITHUB_TOKEN)
+    token = row[0] if row else None
+    # Skip the refresh if a token write invalidated the cache mid-query.
+    if generation == _token_generation:
+        _token_cache = (token, time.monotonic() + TOKEN_CACHE_TTL_SEC)
+    return token
+
+
+def invalidate_token_cache():
+    """Call after any write to github_tokens."""
+    global _token_cache, _token_generation
+    _token_generation += 1
+    _token_cache = (None, 0.0)
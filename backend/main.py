@@ -10,14 +10,16 @@ Patterns supported:
   P5 — Messaging Rebuild  : Azure Service Bus/Event Hub → Pub/Sub
 """
 
-import os, logging
+import os, asyncio, logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette_compress import CompressMiddleware
 
-from database import init_db
+from database import close_pool, init_db, open_pool, optimize_loop, wal_checkpoint_loop
 from routers import assessment, migration, github_router, testing, pmo, system, integrations
+from services import github_client, llm_client
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s — %(message)s")
 logger = logging.getLogger("jarvis")
@@ -27,6 +29,9 @@ logger = logging.getLogger("jarvis")
 async def lifespan(app: FastAPI):
     logger.info("JARVIS Backend starting — initialising database…")
     await init_db()
+    app.state.db_pool = await open_pool()
+    checkpoint_task = asyncio.create_task(wal_checkpoint_loop())
+    optimize_task = asyncio.create_task(optimize_loop())
     try:
         seeded = await github_router.bootstrap_env_credentials()
         if seeded:
@@ -36,6 +41,11 @@ async def lifespan(app: FastAPI):
     logger.info("Database ready ✓")
     yield
     logger.info("JARVIS Backend shutting down.")
+    checkpoint_task.cancel()
+    optimize_task.cancel()
+    await llm_client.close_client()
+    await github_client.close_client()
+    await close_pool()
 
 
 app = FastAPI(
@@ -43,15 +53,22 @@ app = FastAPI(
     description="Azure → GCP cloud migration platform backend",
     version="2.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Negotiates zstd / brotli / gzip from Accept-Encoding (default level 4 each).
+app.add_middleware(CompressMiddleware, minimum_size=1000)
+# "*" with credentials is rejected by browsers anyway; match local dev origins
+# by default and let deployments widen it via JARVIS_CORS_ORIGIN_REGEX.
+CORS_ORIGIN_REGEX = os.getenv("JARVIS_CORS_ORIGIN_REGEX", r"https?://(localhost|127\.0\.0\.1)(:\d+)?")
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],           # tighten in prod
+    allow_origin_regex=CORS_ORIGIN_REGEX,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    # Every header Engine/shared/jarvis.js sends; anything else fails preflight.
+    allow_headers=["Authorization", "Content-Type", "X-Persona"],
+    max_age=86400,                 # let browsers cache preflights for a day
 )
 
 # ── Routers ─────────────────────────────────────────────────
@@ -1,84 +1,175 @@
-import json
+import asyncio
+import os
+import re
 import uuid
+from collections import Counter
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import lru_cache
 from typing import List
 
+import orjson
 from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
-
-from database import db, row2dict, rows2list
+from fastapi.responses import ORJSONResponse
+
+try:
+    import ahocorasick
+except ImportError:  # optional; falls back to per-keyword substring checks
+    ahocorasick = None
+
+from database import (
+    db_read,
+    db_write,
+    index_code_chunks,
+    latest_github_token,
+    pack_files,
+    row2dict,
+    rows2list,
+    search_code_chunks,
+    upsert_app_embedding,
+)
 from models import ScanRequest
+from routers.pmo import invalidate_pmo_cache
 from services.classifier import PATTERNS, classify_repo
 from services.agentic_orchestrator import run_specialist_agent_json
-from services.embeddings import cosine_similarity, embed_text
+from services.embeddings import embed_query, embed_text_batch, pack_embedding
+from services.integrations import integration_profile
 from services.github_client import (
+    MAX_CONCURRENT_FETCHES,
+    get_file_content,
     get_repo,
     get_repo_tree,
     get_readme,
+    list_repos,
     parse_full_name,
-    get_file_content,
 )
 
 router = APIRouter()
 
+_PATTERN_IDS: frozenset[str] = frozenset(PATTERNS)
+
+# Hot statements of the scan pipeline, kept as constants so every call
+# reuses the compiled statement in the pooled connection's cache.
+_SQL_UPSERT_APP = """
+INSERT INTO applications(
+    id, scan_run_id, name, repo_full_name, language, framework, loc, complexity,
+    risk_score, pattern_id, pattern_name, gcp_target, has_dockerfile, has_terraform,
+    has_jenkinsfile, has_github_actions, has_pcf, has_db, has_messaging,
+    db_types_json, dependencies_json, files_zjson, findings_json, integrations_json
+) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
+ON CONFLICT(id) DO UPDATE SET
+    scan_run_id=excluded.scan_run_id,
+    name=excluded.name,
+    repo_full_name=excluded.repo_full_name,
+    language=excluded.language,
+    framework=excluded.framework,
+    loc=excluded.loc,
+    complexity=excluded.complexity,
+    risk_score=excluded.risk_score,
+    pattern_id=excluded.pattern_id,
+    pattern_name=excluded.pattern_name,
+    gcp_target=excluded.gcp_target,
+    has_dockerfile=excluded.has_dockerfile,
+    has_terraform=excluded.has_terraform,
+    has_jenkinsfile=excluded.has_jenkinsfile,
+    has_github_actions=excluded.has_github_actions,
+    has_pcf=excluded.has_pcf,
+    has_db=excluded.has_db,
+    has_messaging=excluded.has_messaging,
+    db_types_json=excluded.db_types_json,
+    dependencies_json=excluded.dependencies_json,
+    files_zjson=excluded.files_zjson,
+    findings_json=excluded.findings_json,
+    integrations_json=excluded.integrations_json
+"""
+_SQL_INSERT_CHUNK = (
+    "INSERT INTO code_chunks(app_id,file_path,chunk_text,chunk_index,embedding,scale,zero_point,created_at) "
+    "VALUES (?,?,?,?,?,?,?,datetime('now'))"
+)
+_SQL_SET_SCAN_PROGRESS = "UPDATE scan_runs SET status=?, summary_json=? WHERE id=?"
+_SQL_FAIL_SCAN = "UPDATE scan_runs SET status='failed', error_msg=?, summary_json=?, completed_at=datetime('now') WHERE id=?"
 
-async def _get_latest_token() -> str | None:
-    async with db() as conn:
-        row = await conn.execute_fetchone("SELECT token FROM github_tokens ORDER BY connected_at DESC LIMIT 1")
-        return row[0] if row else None
-
-
-async def _upsert_application(conn, app: dict):
-    await conn.execute(
-        """
-        INSERT INTO applications(
-            id, scan_run_id, name, repo_full_name, language, framework, loc, complexity,
-            risk_score, pattern_id, pattern_name, gcp_target, has_dockerfile, has_terraform,
-            has_jenkinsfile, has_github_actions, has_pcf, has_db, has_messaging,
-            db_types_json, dependencies_json, files_json, findings_json
-        ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
-        ON CONFLICT(id) DO UPDATE SET
-            scan_run_id=excluded.scan_run_id,
-            name=excluded.name,
-            repo_full_name=excluded.repo_full_name,
-            language=excluded.language,
-            framework=excluded.framework,
-            loc=excluded.loc,
-            complexity=excluded.complexity,
-            risk_score=excluded.risk_score,
-            pattern_id=excluded.pattern_id,
-            pattern_name=excluded.pattern_name,
-            gcp_target=excluded.gcp_target,
-            has_dockerfile=excluded.has_dockerfile,
-            has_terraform=excluded.has_terraform,
-            has_jenkinsfile=excluded.has_jenkinsfile,
-            has_github_actions=excluded.has_github_actions,
-            has_pcf=excluded.has_pcf,
-            has_db=excluded.has_db,
-            has_messaging=excluded.has_messaging,
-            db_types_json=excluded.db_types_json,
-            dependencies_json=excluded.dependencies_json,
-            files_json=excluded.files_json,
-            findings_json=excluded.findings_json
-        """,
-        (
-            app["id"], app["scan_run_id"], app["name"], app["repo_full_name"], app["language"], app["framework"],
-            app["loc"], app["complexity"], app["risk_score"], app["pattern_id"], app["pattern_name"],
-            app["gcp_target"], app["has_dockerfile"], app["has_terraform"], app["has_jenkinsfile"],
-            app["has_github_actions"], app["has_pcf"], app["has_db"], app["has_messaging"],
-            json.dumps(app["db_types"]), json.dumps(app["dependencies"]), json.dumps(app["files"]), json.dumps(app["findings"]),
-        ),
-    )
 
+def _dumps(obj) -> str:
+    """Serialize for a JSON text column (orjson emits bytes)."""
+    return orjson.dumps(obj).decode()
 
-async def _set_scan_progress(conn, run_id: str, *, status: str, stage: str, progress: int, summary_extra: dict | None = None):
-    summary = {"stage": stage, "progress": progress}
-    if summary_extra:
-        summary.update(summary_extra)
-    await conn.execute(
-        "UPDATE scan_runs SET status=?, summary_json=? WHERE id=?",
-        (status, json.dumps(summary), run_id),
+
+async def _upsert_applications(conn, apps: List[dict]):
+    await conn.executemany(
+        _SQL_UPSERT_APP,
+        [
+            (
+                app["id"], app["scan_run_id"], app["name"], app["repo_full_name"], app["language"], app["framework"],
+                app["loc"], app["complexity"], app["risk_score"], app["pattern_id"], app["pattern_name"],
+                app["gcp_target"], app["has_dockerfile"], app["has_terraform"], app["has_jenkinsfile"],
+                app["has_github_actions"], app["has_pcf"], app["has_db"], app["has_messaging"],
+                _dumps(app["db_types"]), _dumps(app["dependencies"]), pack_files(app["files"]), _dumps(app["findings"]),
+                _dumps(app["integrations"]),
+            )
+            for app in apps
+        ],
     )
-    await conn.commit()
+
+
+PROGRESS_FLUSH_INTERVAL_SEC = 0.5
+
+
+@dataclass
+class _ScanProgress:
+    """
+    In-memory progress of a running scan. update() is free; a background
+    task persists the latest state at most every PROGRESS_FLUSH_INTERVAL_SEC,
+    so status polls stay fresh without a commit per stage change.
+    """
+    run_id: str
+    stage: str = ""
+    progress: int = 0
+    dirty: bool = False
+    _stop: asyncio.Event = field(default_factory=asyncio.Event)
+    _task: asyncio.Task | None = None
+
+    def update(self, stage: str, progress: int):
+        self.stage, self.progress, self.dirty = stage, progress, True
+
+    async def write(self, conn):
+        """Stage the pending UPDATE on conn; the caller commits."""
+        if not self.dirty:
+            return
+        self.dirty = False
+        try:
+            await conn.execute(
+                _SQL_SET_SCAN_PROGRESS,
+                ("running", _dumps({"stage": self.stage, "progress": self.progress}), self.run_id),
+            )
+        except Exception:
+            self.dirty = True
+            raise
+
+    def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop flushing (letting an in-flight write finish) before the final status write."""
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+
+    async def _flush_loop(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), PROGRESS_FLUSH_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                pass
+            if self._stop.is_set() or not self.dirty:
+                continue
+            try:
+                async with db_write() as conn:
+                    await self.write(conn)
+                    await conn.commit()
+            except Exception:
+                continue  # retried on the next tick
 
 
 def _diagnose_scan_error(exc: Exception) -> dict:
@@ -121,123 +212,110 @@ def _diagnose_scan_error(exc: Exception) -> dict:
     }
 
 
-async def _save_embeddings(conn, app_id: str, files: List[str], sampled_texts: List[str]):
-    full_text = "\n".join(sampled_texts)
-    emb = embed_text(full_text)
-    await conn.execute(
-        "INSERT OR REPLACE INTO app_embeddings(app_id, embedding_json, model, created_at) VALUES (?,?,?,datetime('now'))",
-        (app_id, json.dumps(emb), "hash-384"),
-    )
+# Opt-in int8 storage for chunk vectors: a quarter of the float32 bytes read
+# per fallback rebuild, at a small cost in score precision.
+QUANTIZE_CHUNK_EMBEDDINGS = os.getenv("JARVIS_QUANTIZE_CHUNK_EMBEDDINGS", "").strip().lower() in ("1", "true", "yes")
 
-    for idx, text in enumerate(sampled_texts[:50]):
-        await conn.execute(
-            "INSERT INTO code_chunks(app_id,file_path,chunk_text,chunk_index,embedding_json,created_at) VALUES (?,?,?,?,?,datetime('now'))",
-            (app_id, files[idx] if idx < len(files) else f"chunk_{idx}", text[:2000], idx, json.dumps(embed_text(text))),
-        )
+
+def _embed_samples(sampled_texts: List[str]) -> List[List[float]]:
+    """Whole-repo vector first, then one per chunk (first 50), in a single batch."""
+    return embed_text_batch(["\n".join(sampled_texts)] + sampled_texts[:50])
 
 
-def _framework_from_files(files: List[str]) -> str:
-    lower = "\n".join(files).lower()
-    if "pom.xml" in lower or "build.gradle" in lower:
+async def _save_embeddings(conn, app_id: str, files: List[str], sampled_texts: List[str], embeddings: List[List[float]]):
+    await upsert_app_embedding(conn, app_id, embeddings[0], "hash-384")
+
+    chunk_rows = []
+    for idx, (text, emb) in enumerate(zip(sampled_texts[:50], embeddings[1:])):
+        blob, scale, zero_point = pack_embedding(emb, quantize=QUANTIZE_CHUNK_EMBEDDINGS)
+        chunk_rows.append(
+            (app_id, files[idx] if idx < len(files) else f"chunk_{idx}", text[:2000], idx, blob, scale, zero_point)
+        )
+    await conn.executemany(_SQL_INSERT_CHUNK, chunk_rows)
+    await index_code_chunks(conn, app_id)
+
+
+# Every signal the scan derives from file names or sampled content, found in
+# one pass over the lowercased text instead of a substring scan per signal.
+# The lookahead keeps overlapping signals ("mysqlserver") from hiding each other.
+_SIGNAL_RE = re.compile(
+    r"(?=(pom\.xml|build\.gradle|package\.json|requirements\.txt|\.csproj|\.py"
+    r"|dockerfile|jenkinsfile|\.github/workflows|manifest\.yml"
+    r"|postgres|mysql|mssql|sqlserver"
+    r"|service bus|event hub|queue|topic|pub/sub|pubsub))"
+)
+_MESSAGING_SIGNALS = {"service bus", "event hub", "queue", "topic", "pub/sub", "pubsub"}
+# Sampled content beyond this many characters is not keyword-scanned.
+KEYWORD_SCAN_LIMIT = 64 * 1024
+
+
+def _scan_signals(files: List[str], lower_sample: str) -> tuple[set[str], set[str]]:
+    """Return (signals seen in file paths, signals seen anywhere); lower_sample is already lowercased."""
+    file_text = "\n".join(files).lower()
+    blob = file_text + "\n" + (lower_sample or "")
+    file_hits: set[str] = set()
+    hits: set[str] = set()
+    boundary = len(file_text)
+    for m in _SIGNAL_RE.finditer(blob):
+        hits.add(m.group(1))
+        if m.start() < boundary:
+            file_hits.add(m.group(1))
+    return file_hits, hits
+
+
+def _framework_from_signals(file_hits: set[str]) -> str:
+    if "pom.xml" in file_hits or "build.gradle" in file_hits:
         return "spring"
-    if "package.json" in lower:
+    if "package.json" in file_hits:
         return "node"
-    if "requirements.txt" in lower or ".py" in lower:
+    if "requirements.txt" in file_hits or ".py" in file_hits:
         return "python"
-    if ".csproj" in lower:
+    if ".csproj" in file_hits:
         return ".net"
     return "unknown"
 
 
-def _parse_findings(findings_raw) -> list:
-    if findings_raw is None:
-        return []
-    if isinstance(findings_raw, list):
-        return findings_raw
-    if isinstance(findings_raw, dict):
-        return [findings_raw]
-    if isinstance(findings_raw, str):
-        try:
-            parsed = json.loads(findings_raw)
-            if isinstance(parsed, list):
-                return parsed
-            if isinstance(parsed, dict):
-                return [parsed]
-        except Exception:
-            return []
-    return []
-
+@lru_cache(maxsize=8)
+def _instruction_matcher(instructions: tuple):
+    """Build one Aho-Corasick automaton over every pattern's keywords.
 
-def _extract_integrations(findings_raw) -> tuple[list[str], list[str]]:
-    findings = _parse_findings(findings_raw)
-    app_targets: list[str] = []
-    db_targets: list[str] = []
-    for item in findings:
-        if not isinstance(item, dict):
-            continue
-        ftype = str(item.get("type", "")).lower()
-        if ftype == "app_to_app_integration":
-            targets = item.get("targets") or []
-            if isinstance(targets, list):
-                app_targets.extend([str(t) for t in targets if t])
-        if ftype == "app_to_db_integration":
-            stores = item.get("datastores") or []
-            if isinstance(stores, list):
-                db_targets.extend([str(d).lower() for d in stores if d and str(d).lower() != "none"])
-    return app_targets, db_targets
-
-
-def _extract_integration_model(findings_raw) -> dict:
-    findings = _parse_findings(findings_raw)
-    app_links = []
-    db_links = []
-    tags = []
-    for item in findings:
-        if not isinstance(item, dict):
-            continue
-        ftype = str(item.get("type", "")).lower()
-        if ftype == "metadata":
-            raw_tags = item.get("tags") or []
-            if isinstance(raw_tags, list):
-                tags.extend([str(t).lower() for t in raw_tags if t])
-        elif ftype == "app_to_app_integration":
-            points = item.get("integration_points")
-            if isinstance(points, list) and points:
-                for p in points:
-                    if isinstance(p, dict) and p.get("target"):
-                        app_links.append(
-                            {
-                                "target": str(p.get("target")),
-                                "coupling": str(p.get("coupling") or item.get("coupling") or "loose").lower(),
-                            }
-                        )
-            else:
-                for t in item.get("targets") or []:
-                    app_links.append(
-                        {
-                            "target": str(t),
-                            "coupling": str(item.get("coupling") or "loose").lower(),
-                        }
-                    )
-        elif ftype == "app_to_db_integration":
-            coupling = str(item.get("coupling") or "loose").lower()
-            for d in item.get("datastores") or []:
-                ds = str(d).lower()
-                if ds and ds != "none":
-                    db_links.append({"datastore": ds, "coupling": coupling})
-    return {"app_links": app_links, "db_links": db_links, "tags": sorted(set(tags))}
-
-
-def _apply_pattern_instructions(classified_pattern: str, content_sample: str, instructions: dict) -> str:
-    content = (content_sample or "").lower()
-    scores = {pid: 0 for pid in ["P1", "P2", "P3", "P4", "P5"]}
-    for pid, text in instructions.items():
+    Each keyword's payload is a small int indexing the returned owners list
+    (the pattern ids listing it, with repeats), so a single pass over the
+    sample scores all patterns at once and hits stay cheap to collect.
+    """
+    owners: dict[str, list[str]] = {}
+    for pid, text in instructions:
         if not text:
             continue
         keywords = [k.strip().lower() for k in text.split(",") if k.strip()]
         for kw in keywords[:50]:
-            if kw in content:
-                scores[pid] += 1
+            owners.setdefault(kw, []).append(pid)
+    automaton = ahocorasick.Automaton()
+    for idx, kw in enumerate(owners):
+        automaton.add_word(kw, idx)
+    if owners:
+        automaton.make_automaton()
+    return automaton, list(owners.values())
+
+
+def _apply_pattern_instructions(classified_pattern: str, lower_sample: str, instructions: dict) -> str:
+    content = lower_sample or ""
+    scores = dict.fromkeys(PATTERNS, 0)
+    if ahocorasick is not None:
+        automaton, owners = _instruction_matcher(tuple(sorted(instructions.items())))
+        if owners:
+            # A keyword scores once per listing however often it occurs.
+            for idx in {idx for _, idx in automaton.iter(content)}:
+                for pid in owners[idx]:
+                    scores[pid] += 1
+    else:
+        for pid, text in instructions.items():
+            if not text:
+                continue
+            keywords = [k.strip().lower() for k in text.split(",") if k.strip()]
+            for kw in keywords[:50]:
+                if kw in content:
+                    scores[pid] += 1
 
     best = max(scores, key=lambda k: scores[k])
     if scores.get(best, 0) >= 2:
@@ -245,10 +323,22 @@ def _apply_pattern_instructions(classified_pattern: str, content_sample: str, in
     return classified_pattern
 
 
+async def _fetch_samples(owner: str, repo: str, paths: List[str], token: str) -> List[str]:
+    """Fetch file contents concurrently; failed paths are skipped, order is kept."""
+    sem = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+    async def fetch(path: str) -> str:
+        async with sem:
+            return await get_file_content(owner, repo, path, token)
+
+    results = await asyncio.gather(*(fetch(p) for p in paths), return_exceptions=True)
+    return [r[:4000] for r in results if isinstance(r, str)]
+
+
 async def _run_scan_job(run_id: str, repos: List[str]):
-    token = await _get_latest_token()
+    token = await latest_github_token()
     if not token:
-        async with db() as conn:
+        async with db_write() as conn:
             summary = {
                 "stage": "Scan failed",
                 "progress": 100,
@@ -257,123 +347,130 @@ async def _run_scan_job(run_id: str, repos: List[str]):
                 "remediation": "Connect GitHub first, then restart the scan.",
             }
             await conn.execute(
-                "UPDATE scan_runs SET status='failed', error_msg=?, summary_json=?, completed_at=datetime('now') WHERE id=?",
-                ("GitHub not connected", json.dumps(summary), run_id),
+                _SQL_FAIL_SCAN,
+                ("GitHub not connected", _dumps(summary), run_id),
             )
             await conn.commit()
         return
 
+    progress = _ScanProgress(run_id)
     try:
-        async with db() as conn:
+        async with db_read() as conn:
             inst_rows = await conn.execute_fetchall("SELECT pattern_id, instructions FROM pattern_instructions")
-            pattern_instructions = {r[0]: r[1] for r in inst_rows}
-
-            await _set_scan_progress(conn, run_id, status="running", stage="Initializing scan", progress=5)
-
-            apps = []
-            total_loc = 0
-            total = max(len(repos), 1)
-
-            for idx, full_name in enumerate(repos, start=1):
-                pct_base = int(((idx - 1) / total) * 90)
-                await _set_scan_progress(conn, run_id, status="running", stage=f"Analyzing {full_name}", progress=max(8, pct_base))
-
-                owner, repo = parse_full_name(full_name)
-                meta = get_repo(owner, repo, token)
-                branch = meta.get("default_branch", "main")
-                tree = get_repo_tree(owner, repo, branch, token)
-                files = [x.get("path") for x in tree if x.get("type") == "blob"][:1500]
-
-                interesting = [
-                    p for p in files if p.endswith((".py", ".js", ".ts", ".java", ".tf", ".yml", ".yaml", ".json", ".md", "Jenkinsfile"))
-                ][:40]
-
-                sampled_texts = []
-                for p in interesting:
-                    try:
-                        sampled_texts.append(get_file_content(owner, repo, p, token)[:4000])
-                    except Exception:
-                        continue
-
-                if not sampled_texts:
-                    sampled_texts.append(get_readme(owner, repo, token)[:4000])
-
-                content_sample = "\n\n".join(sampled_texts)
-                result = classify_repo(files=files, content_sample=content_sample)
-                selected_pattern = _apply_pattern_instructions(result.pattern_id, content_sample, pattern_instructions)
-                if selected_pattern != result.pattern_id:
-                    result.pattern_id = selected_pattern
-                    result.pattern_name = PATTERNS[selected_pattern].name
-                    result.gcp_target = PATTERNS[selected_pattern].gcp_target
-
-                app_id = f"{run_id[:8]}-APP-{idx:03d}"
-                framework = _framework_from_files(files)
-                loc = sum(len(t.splitlines()) for t in sampled_texts)
-                total_loc += loc
-
-                deps = []
-                if any("package.json" in f for f in files):
-                    deps.append("npm")
-                if any("requirements.txt" in f for f in files):
-                    deps.append("pip")
-                if any("pom.xml" in f for f in files):
-                    deps.append("maven")
-                if any("build.gradle" in f for f in files):
-                    deps.append("gradle")
-
-                db_types = []
-                blob = ("\n".join(files) + "\n" + content_sample).lower()
-                if "postgres" in blob:
-                    db_types.append("postgres")
-                if "mysql" in blob:
-                    db_types.append("mysql")
-                if "mssql" in blob or "sqlserver" in blob:
-                    db_types.append("mssql")
-
-                app = {
-                    "id": app_id,
-                    "scan_run_id": run_id,
-                    "name": repo,
-                    "repo_full_name": full_name,
-                    "language": meta.get("language") or "unknown",
-                    "framework": framework,
-                    "loc": loc,
-                    "complexity": result.complexity,
-                    "risk_score": result.risk_score,
-                    "pattern_id": result.pattern_id,
-                    "pattern_name": result.pattern_name,
-                    "gcp_target": result.gcp_target,
-                    "has_dockerfile": 1 if any("dockerfile" in f.lower() for f in files) else 0,
-                    "has_terraform": 1 if any(f.endswith(".tf") for f in files) else 0,
-                    "has_jenkinsfile": 1 if any("jenkinsfile" in f.lower() for f in files) else 0,
-                    "has_github_actions": 1 if any(".github/workflows" in f.lower() for f in files) else 0,
-                    "has_pcf": 1 if any("manifest.yml" in f.lower() for f in files) else 0,
-                    "has_db": 1 if bool(db_types) else 0,
-                    "has_messaging": 1 if any(k in blob for k in ["service bus", "event hub", "queue", "topic", "pub/sub", "pubsub"]) else 0,
-                    "db_types": db_types,
-                    "dependencies": deps,
-                    "files": files[:300],
-                    "findings": result.findings,
-                }
-                await _upsert_application(conn, app)
-                await _save_embeddings(conn, app_id, interesting, sampled_texts)
-                apps.append(app)
-
-                pct_done = int((idx / total) * 90)
-                await _set_scan_progress(conn, run_id, status="running", stage=f"Processed {idx}/{total} repositories", progress=max(10, pct_done))
-
-            summary = {
-                "repo_count": len(repos),
-                "app_count": len(apps),
-                "total_loc": total_loc,
-                "stage": "Scan complete",
-                "progress": 100,
-                "completed_at": datetime.utcnow().isoformat() + "Z",
+        pattern_instructions = {r[0]: r[1] for r in inst_rows}
+
+        # The writer is borrowed only around each write so GitHub round-trips
+        # never hold it. Status, graph and insights polls read this run's rows
+        # through idx_apps_dashboard (scan_run_id first) on WAL readers meanwhile.
+        progress.update("Initializing scan", 5)
+        progress.start()
+
+        apps = []
+        total_loc = 0
+        total = max(len(repos), 1)
+
+        for idx, full_name in enumerate(repos, start=1):
+            pct_base = int(((idx - 1) / total) * 90)
+            progress.update(f"Analyzing {full_name}", max(8, pct_base))
+
+            owner, repo = parse_full_name(full_name)
+            meta = await get_repo(owner, repo, token)
+            branch = meta.get("default_branch", "main")
+            tree = await get_repo_tree(owner, repo, branch, token)
+            files = [x.get("path") for x in tree if x.get("type") == "blob"][:1500]
+
+            interesting = [
+                p for p in files if p.endswith((".py", ".js", ".ts", ".java", ".tf", ".yml", ".yaml", ".json", ".md", "Jenkinsfile"))
+            ][:40]
+
+            sampled_texts = await _fetch_samples(owner, repo, interesting, token)
+
+            if not sampled_texts:
+                sampled_texts.append((await get_readme(owner, repo, token))[:4000])
+
+            content_sample = "\n\n".join(sampled_texts)
+            # Off the event loop like the embeddings below: a 1500-path tree
+            # with 40 samples is tens of ms of matching, and status polls and
+            # other requests keep being served meanwhile.
+            result = await asyncio.to_thread(classify_repo, files, content_sample)
+            # Keyword scans share one lowercased copy, capped where their signals saturate.
+            lower_sample = content_sample[:KEYWORD_SCAN_LIMIT].lower()
+            selected_pattern = _apply_pattern_instructions(result.pattern_id, lower_sample, pattern_instructions)
+            if selected_pattern != result.pattern_id:
+                result.pattern_id = selected_pattern
+                result.pattern_name = PATTERNS[selected_pattern].name
+                result.gcp_target = PATTERNS[selected_pattern].gcp_target
+
+            app_id = f"{run_id[:8]}-APP-{idx:03d}"
+            file_hits, hits = _scan_signals(files, lower_sample)
+            framework = _framework_from_signals(file_hits)
+            # Same as len(t.splitlines()) for \n-separated text, without building the line lists.
+            loc = sum(t.count("\n") + (1 if t and not t.endswith("\n") else 0) for t in sampled_texts)
+            total_loc += loc
+
+            deps = [
+                dep for signal, dep in (
+                    ("package.json", "npm"), ("requirements.txt", "pip"),
+                    ("pom.xml", "maven"), ("build.gradle", "gradle"),
+                )
+                if signal in file_hits
+            ]
+            db_types = [db for db in ("postgres", "mysql") if db in hits]
+            if "mssql" in hits or "sqlserver" in hits:
+                db_types.append("mssql")
+
+            app = {
+                "id": app_id,
+                "scan_run_id": run_id,
+                "name": repo,
+                "repo_full_name": full_name,
+                "language": meta.get("language") or "unknown",
+                "framework": framework,
+                "loc": loc,
+                "complexity": result.complexity,
+                "risk_score": result.risk_score,
+                "pattern_id": result.pattern_id,
+                "pattern_name": result.pattern_name,
+                "gcp_target": result.gcp_target,
+                "has_dockerfile": 1 if "dockerfile" in file_hits else 0,
+                "has_terraform": 1 if any(f.endswith(".tf") for f in files) else 0,
+                "has_jenkinsfile": 1 if "jenkinsfile" in file_hits else 0,
+                "has_github_actions": 1 if ".github/workflows" in file_hits else 0,
+                "has_pcf": 1 if "manifest.yml" in file_hits else 0,
+                "has_db": 1 if bool(db_types) else 0,
+                "has_messaging": 1 if hits & _MESSAGING_SIGNALS else 0,
+                "db_types": db_types,
+                "dependencies": deps,
+                "files": files[:300],
+                "findings": result.findings,
+                "integrations": integration_profile(result.findings),
             }
+            embeddings = await asyncio.to_thread(_embed_samples, sampled_texts)
+            pct_done = int((idx / total) * 90)
+            progress.update(f"Processed {idx}/{total} repositories", max(10, pct_done))
+            # One transaction per repo: app row, chunk batch and latest progress commit together.
+            async with db_write() as conn:
+                await _upsert_applications(conn, [app])
+                await _save_embeddings(conn, app_id, interesting, sampled_texts, embeddings)
+                await progress.write(conn)
+                await conn.commit()
+            invalidate_pmo_cache()
+            apps.append(app)
+
+        summary = {
+            "repo_count": len(repos),
+            "app_count": len(apps),
+            "total_loc": total_loc,
+            "stage": "Scan complete",
+            "progress": 100,
+            "completed_at": datetime.utcnow().isoformat() + "Z",
+        }
 
+        await progress.stop()
+        async with db_write() as conn:
             await conn.execute(
                 "UPDATE scan_runs SET status='complete', completed_at=datetime('now'), summary_json=? WHERE id=?",
-                (json.dumps(summary), run_id),
+                (_dumps(summary), run_id),
             )
             await conn.commit()
     except Exception as e:
@@ -385,19 +482,22 @@ async def _run_scan_job(run_id: str, repos: List[str]):
             "failure_reason": diag["failure_reason"],
             "remediation": diag["remediation"],
         }
-        async with db() as conn:
+        await progress.stop()
+        async with db_write() as conn:
             await conn.execute(
-                "UPDATE scan_runs SET status='failed', error_msg=?, summary_json=?, completed_at=datetime('now') WHERE id=?",
-                (diag["raw_error"], json.dumps(summary), run_id),
+                _SQL_FAIL_SCAN,
+                (diag["raw_error"], _dumps(summary), run_id),
             )
             await conn.commit()
+    finally:
+        await progress.stop()
 
 
 @router.get("/repos")
 async def get_repos(user: str = Query(...)):
-    token = await _get_latest_token()
+    token = await latest_github_token()
     if not token:
-        async with db() as conn:
+        async with db_read() as conn:
             rows = await conn.execute_fetchall(
                 "SELECT full_name, name, description, language, stars, default_branch FROM repos WHERE owner=? ORDER BY fetched_at DESC",
                 (user,),
@@ -420,9 +520,7 @@ async def get_repos(user: str = Query(...)):
             }
         raise HTTPException(status_code=400, detail="GitHub not connected. Connect token first.")
 
-    from services.github_client import list_repos
-
-    repos = list_repos(user, token)
+    repos = await list_repos(user, token)
     return {
         "user": user,
         "count": len(repos),
@@ -444,10 +542,10 @@ async def start_scan(req: ScanRequest, background_tasks: BackgroundTasks):
     if not req.repos:
         raise HTTPException(status_code=400, detail="Select at least one repository")
 
-    if not await _get_latest_token():
+    if not await latest_github_token():
         raise HTTPException(status_code=400, detail="GitHub not connected")
 
-    async with db() as conn:
+    async with db_read() as conn:
         active = await conn.execute_fetchone(
             "SELECT id FROM scan_runs WHERE status IN ('pending','running') ORDER BY started_at DESC LIMIT 1"
         )
@@ -458,10 +556,10 @@ async def start_scan(req: ScanRequest, background_tasks: BackgroundTasks):
         )
 
     run_id = str(uuid.uuid4())
-    async with db() as conn:
+    async with db_write() as conn:
         await conn.execute(
             "INSERT INTO scan_runs(id,status,repos_json,started_at) VALUES (?,?,?,datetime('now'))",
-            (run_id, "pending", json.dumps(req.repos)),
+            (run_id, "pending", _dumps(req.repos)),
         )
         await conn.commit()
 
@@ -472,7 +570,7 @@ async def start_scan(req: ScanRequest, background_tasks: BackgroundTasks):
 
 @router.get("/scan/{run_id}")
 async def scan_status(run_id: str):
-    async with db() as conn:
+    async with db_read() as conn:
         row = await conn.execute_fetchone("SELECT * FROM scan_runs WHERE id=?", (run_id,))
     if not row:
         raise HTTPException(status_code=404, detail="Scan run not found")
@@ -489,15 +587,15 @@ async def scan_status(run_id: str):
 @router.get("/scans")
 async def list_scans(limit: int = 10):
     lim = max(1, min(int(limit), 100))
-    async with db() as conn:
+    async with db_read() as conn:
         rows = await conn.execute_fetchall(
             "SELECT id, status, repos_json, started_at, completed_at, summary_json, error_msg FROM scan_runs ORDER BY started_at DESC LIMIT ?",
             (lim,),
         )
     items = []
     for r in rows:
-        repos = json.loads(r[2]) if r[2] else []
-        summary = json.loads(r[5]) if r[5] else {}
+        repos = r[2] or []
+        summary = r[5] or {}
         items.append(
             {
                 "id": r[0],
@@ -512,30 +610,65 @@ async def list_scans(limit: int = 10):
     return {"count": len(items), "items": items}
 
 
+# Everything the list views read; file lists and dependencies_json stay on the detail endpoint.
+_APP_LIST_COLUMNS = (
+    "id, scan_run_id, name, repo_full_name, language, framework, loc, complexity, risk_score, "
+    "pattern_id, pattern_name, gcp_target, has_dockerfile, has_terraform, has_jenkinsfile, "
+    "has_github_actions, has_pcf, has_db, has_messaging, db_types_json, findings_json, created_at"
+)
+# A list page assembled by SQLite, like migration's job view: the JSON columns
+# pass through as stored text instead of being decoded per row and re-encoded.
+_APP_LIST_ITEM = "json_object({})".format(", ".join(
+    f"'{col}', json({col})" if col.endswith("_json") else f"'{col}', {col}"
+    for col in _APP_LIST_COLUMNS.split(", ")
+))
+_SQL_APP_PAGE = f"SELECT COUNT(*), json_group_array({_APP_LIST_ITEM}) FROM ({{}})"
+
+
 @router.get("/applications")
-async def list_applications(run_id: str | None = None):
-    async with db() as conn:
+async def list_applications(run_id: str | None = None, limit: int = 100, offset: int = 0):
+    lim = max(1, min(int(limit), 1000))
+    off = max(0, int(offset))
+    async with db_read() as conn:
         if run_id:
-            rows = await conn.execute_fetchall("SELECT * FROM applications WHERE scan_run_id=? ORDER BY id", (run_id,))
+            total = (await conn.execute_fetchone("SELECT COUNT(*) FROM applications WHERE scan_run_id=?", (run_id,)))[0]
+            count, items = await conn.execute_fetchone(
+                _SQL_APP_PAGE.format(
+                    f"SELECT {_APP_LIST_COLUMNS} FROM applications WHERE scan_run_id=? ORDER BY id LIMIT ? OFFSET ?"
+                ),
+                (run_id, lim, off),
+            )
         else:
-            rows = await conn.execute_fetchall("SELECT * FROM applications ORDER BY created_at DESC")
-    return {"count": len(rows), "items": rows2list(rows)}
+            total = (await conn.execute_fetchone("SELECT COUNT(*) FROM applications"))[0]
+            count, items = await conn.execute_fetchone(
+                _SQL_APP_PAGE.format(
+                    f"SELECT {_APP_LIST_COLUMNS} FROM applications ORDER BY created_at DESC LIMIT ? OFFSET ?"
+                ),
+                (lim, off),
+            )
+    # A Response return skips FastAPI's jsonable_encoder walk; the items array
+    # is spliced in as already-encoded JSON. graph and bundles also return
+    # ORJSONResponse for their large payloads.
+    return ORJSONResponse(
+        {"count": count, "total": total, "limit": lim, "offset": off, "items": orjson.Fragment(items)}
+    )
 
 
 @router.get("/applications/{app_id}")
 async def get_application(app_id: str):
-    async with db() as conn:
+    async with db_read() as conn:
         row = await conn.execute_fetchone("SELECT * FROM applications WHERE id=?", (app_id,))
     if not row:
         raise HTTPException(status_code=404, detail="Application not found")
-    return row2dict(row)
+    # Expose the compressed file list under its original field name.
+    return {("files_json" if k == "files_zjson" else k): v for k, v in row2dict(row).items()}
 
 
 @router.get("/graph/{run_id}")
 async def dependency_graph(run_id: str):
-    async with db() as conn:
+    async with db_read() as conn:
         rows = await conn.execute_fetchall(
-            "SELECT id, name, pattern_id, gcp_target, risk_score, findings_json FROM applications WHERE scan_run_id=?",
+            "SELECT id, name, pattern_id, gcp_target, risk_score, integrations_json FROM applications WHERE scan_run_id=?",
             (run_id,),
         )
     apps = rows2list(rows)
@@ -567,7 +700,7 @@ async def dependency_graph(run_id: str):
         add_node(target_id, label=app.get("gcp_target") or "GCP", type="gcp")
         edges.append({"from": app["id"], "to": target_id, "type": "api", "label": "migrates_to"})
 
-        model = _extract_integration_model(app.get("findings_json"))
+        model = app["integrations_json"] or integration_profile(None)
         for link in model["app_links"]:
             target = link["target"]
             coupling = link.get("coupling", "loose")
@@ -599,131 +732,132 @@ async def dependency_graph(run_id: str):
                 "weight": 4 if coupling == "tight" else 2,
             })
 
-    return {"run_id": run_id, "nodes": nodes, "edges": edges}
+    return ORJSONResponse({"run_id": run_id, "nodes": nodes, "edges": edges})
 
 
 @router.get("/insights/{run_id}")
 async def assessment_insights(run_id: str):
-    async with db() as conn:
-        rows = await conn.execute_fetchall(
-            "SELECT id, name, pattern_id, risk_score, findings_json FROM applications WHERE scan_run_id=?",
+    # Aggregated in SQL over the integration profiles stored at scan time.
+    async with db_read() as conn:
+        pattern_rows = await conn.execute_fetchall(
+            """
+            SELECT COALESCE(NULLIF(pattern_id, ''), 'P1') AS pid, COUNT(*),
+                   SUM(COALESCE(risk_score, 0)),
+                   SUM(json_array_length(integrations_json, '$.app_targets')),
+                   SUM(json_array_length(integrations_json, '$.db_targets'))
+            FROM applications WHERE scan_run_id=? GROUP BY pid ORDER BY pid
+            """,
+            (run_id,),
+        )
+        if not pattern_rows:
+            return {
+                "run_id": run_id,
+                "app_count": 0,
+                "avg_risk": 0,
+                "pattern_distribution": [],
+                "integration_summary": {"app_to_app": 0, "app_to_db": 0, "unique_datastores": []},
+                "top_risks": [],
+            }
+        datastore_rows = await conn.execute_fetchall(
+            """
+            SELECT DISTINCT ds.value FROM applications, json_each(applications.integrations_json, '$.db_targets') AS ds
+            WHERE applications.scan_run_id=? ORDER BY ds.value
+            """,
+            (run_id,),
+        )
+        # Walks idx_apps_dashboard in (risk_score DESC, ...) order; no sort step.
+        risk_rows = await conn.execute_fetchall(
+            "SELECT id, name, risk_score, pattern_id FROM applications WHERE scan_run_id=? ORDER BY risk_score DESC LIMIT 5",
             (run_id,),
         )
 
-    apps = rows2list(rows)
-    if not apps:
-        return {
-            "run_id": run_id,
-            "app_count": 0,
-            "avg_risk": 0,
-            "pattern_distribution": [],
-            "integration_summary": {"app_to_app": 0, "app_to_db": 0, "unique_datastores": []},
-            "top_risks": [],
-        }
-
-    pattern_counts: dict[str, int] = {}
-    app_to_app_count = 0
-    app_to_db_count = 0
-    datastores = set()
-
-    for app in apps:
-        pid = app.get("pattern_id") or "P1"
-        pattern_counts[pid] = pattern_counts.get(pid, 0) + 1
-        app_targets, db_targets = _extract_integrations(app.get("findings_json"))
-        app_to_app_count += len(app_targets)
-        app_to_db_count += len(db_targets)
-        datastores.update(db_targets)
-
-    avg_risk = round(sum(float(a.get("risk_score") or 0) for a in apps) / len(apps), 2)
-    top_risks = sorted(
-        [
-            {"id": a["id"], "name": a["name"], "risk_score": float(a.get("risk_score") or 0), "pattern_id": a.get("pattern_id")}
-            for a in apps
-        ],
-        key=lambda x: x["risk_score"],
-        reverse=True,
-    )[:5]
-
+    app_count = sum(r[1] for r in pattern_rows)
     return {
         "run_id": run_id,
-        "app_count": len(apps),
-        "avg_risk": avg_risk,
-        "pattern_distribution": [{"pattern_id": k, "count": v} for k, v in sorted(pattern_counts.items())],
+        "app_count": app_count,
+        "avg_risk": round(sum(float(r[2] or 0) for r in pattern_rows) / app_count, 2),
+        "pattern_distribution": [{"pattern_id": r[0], "count": r[1]} for r in pattern_rows],
         "integration_summary": {
-            "app_to_app": app_to_app_count,
-            "app_to_db": app_to_db_count,
-            "unique_datastores": sorted(datastores),
+            "app_to_app": sum(r[3] or 0 for r in pattern_rows),
+            "app_to_db": sum(r[4] or 0 for r in pattern_rows),
+            "unique_datastores": [r[0] for r in datastore_rows],
         },
-        "top_risks": top_risks,
+        "top_risks": [
+            {"id": r[0], "name": r[1], "risk_score": float(r[2] or 0), "pattern_id": r[3]}
+            for r in risk_rows
+        ],
     }
 
 
 @router.get("/bundles/{run_id}")
 async def bundles(run_id: str):
-    async with db() as conn:
+    async with db_read() as conn:
         rows = await conn.execute_fetchall(
-            "SELECT id,name,pattern_id,risk_score,findings_json FROM applications WHERE scan_run_id=?",
+            "SELECT id,name,pattern_id,risk_score,findings_json,integrations_json FROM applications WHERE scan_run_id=?",
             (run_id,),
         )
     apps = rows2list(rows)
+    models = {a["id"]: a.pop("integrations_json") or integration_profile(None) for a in apps}
     if not apps:
         return {"run_id": run_id, "count": 0, "items": []}
 
     app_map = {a["id"]: a for a in apps}
-    neighbors: dict[str, set[str]] = {a["id"]: set() for a in apps}
+    # Union-find over app ids: near-linear component detection, no adjacency sets.
+    parent = {a["id"]: a["id"] for a in apps}
+
+    def find(x: str) -> str:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(a: str, b: str):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[rb] = ra
+
     affinity_score: dict[tuple[str, str], int] = {}
 
+    # Index datastore -> apps using it (in app order).
+    db_users: dict[str, list[str]] = {}
     for app in apps:
-        model = _extract_integration_model(app.get("findings_json"))
+        for ds in dict.fromkeys(d["datastore"] for d in models[app["id"]]["db_links"]):
+            db_users.setdefault(ds, []).append(app["id"])
+
+    for app in apps:
+        model = models[app["id"]]
         for link in model["app_links"]:
             target = link["target"]
             if target not in app_map:
                 continue
-            neighbors[app["id"]].add(target)
-            neighbors[target].add(app["id"])
+            union(app["id"], target)
             key = tuple(sorted((app["id"], target)))
             affinity_score[key] = max(affinity_score.get(key, 0), 3 if link.get("coupling") == "tight" else 1)
 
         for db_link in model["db_links"]:
             if db_link.get("coupling") == "tight":
-                for other in apps:
-                    if other["id"] == app["id"]:
+                for other_id in db_users.get(db_link["datastore"], ()):
+                    if other_id == app["id"]:
                         continue
-                    other_model = _extract_integration_model(other.get("findings_json"))
-                    other_dbs = {d["datastore"] for d in other_model["db_links"]}
-                    if db_link["datastore"] in other_dbs:
-                        neighbors[app["id"]].add(other["id"])
-                        neighbors[other["id"]].add(app["id"])
-                        key = tuple(sorted((app["id"], other["id"])))
-                        affinity_score[key] = max(affinity_score.get(key, 0), 4)
-
-    visited = set()
-    components = []
-    for app_id in neighbors:
-        if app_id in visited:
-            continue
-        stack = [app_id]
-        comp = []
-        visited.add(app_id)
-        while stack:
-            cur = stack.pop()
-            comp.append(cur)
-            for nxt in neighbors[cur]:
-                if nxt not in visited:
-                    visited.add(nxt)
-                    stack.append(nxt)
-        components.append(comp)
-
-    components.sort(key=lambda c: len(c), reverse=True)
+                    union(app["id"], other_id)
+                    key = tuple(sorted((app["id"], other_id)))
+                    affinity_score[key] = max(affinity_score.get(key, 0), 4)
+
+    # Members keep app order; every affinity pair lies inside one component.
+    by_root: dict[str, list[str]] = {}
+    for app_id in parent:
+        by_root.setdefault(find(app_id), []).append(app_id)
+    root_affinity: dict[str, int] = {}
+    for (a, _), score in affinity_score.items():
+        root = find(a)
+        root_affinity[root] = root_affinity.get(root, 0) + score
+
+    components = sorted(by_root.items(), key=lambda c: len(c[1]), reverse=True)
     items = []
-    for i, comp in enumerate(components, start=1):
+    for i, (root, comp) in enumerate(components, start=1):
         members = [app_map[x] for x in comp]
-        pattern = max(
-            {m.get("pattern_id", "P1"): sum(1 for x in members if x.get("pattern_id", "P1") == m.get("pattern_id", "P1")) for m in members},
-            key=lambda k: {m.get("pattern_id", "P1"): sum(1 for x in members if x.get("pattern_id", "P1") == m.get("pattern_id", "P1")) for m in members}[k],
-        )
-        internal_pairs = [tuple(sorted((a, b))) for a in comp for b in comp if a < b]
-        bundle_affinity = sum(affinity_score.get(p, 0) for p in internal_pairs)
+        pattern = Counter(m.get("pattern_id", "P1") for m in members).most_common(1)[0][0]
+        bundle_affinity = root_affinity.get(root, 0)
         coupling = "tight" if bundle_affinity >= max(4, len(comp) * 2) else "loose"
         items.append(
             {
@@ -737,7 +871,7 @@ async def bundles(run_id: str):
                 "bundle_reason": "Tightly coupled via shared DB/integration" if coupling == "tight" else "Loosely coupled; can migrate in silos",
             }
         )
-    return {"run_id": run_id, "count": len(items), "items": items}
+    return ORJSONResponse({"run_id": run_id, "count": len(items), "items": items})
 
 
 @router.post("/bundles/{bundle_id}/approve")
@@ -791,29 +925,18 @@ async def semantic_search(payload: dict):
     if not query:
         raise HTTPException(status_code=400, detail="query required")
 
-    q_vec = embed_text(query)
-    async with db() as conn:
-        rows = await conn.execute_fetchall("SELECT id, app_id, file_path, chunk_text, embedding_json FROM code_chunks")
-
-    scored = []
-    for row in rows:
-        emb = json.loads(row[4]) if row[4] else []
-        score = cosine_similarity(q_vec, emb)
-        scored.append({
-            "id": row[0],
-            "app_id": row[1],
-            "file_path": row[2],
-            "chunk_text": row[3],
-            "score": round(float(score), 4),
-        })
+    q_vec = await asyncio.to_thread(embed_query, query)
+    async with db_read() as conn:
+        hits = await search_code_chunks(conn, q_vec, 10)
 
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return {"query": query, "results": scored[:10]}
+    for hit in hits:
+        hit["score"] = round(float(hit["score"]), 4)
+    return {"query": query, "results": hits}
 
 
 @router.get("/pattern-instructions")
 async def get_pattern_instructions():
-    async with db() as conn:
+    async with db_read() as conn:
         rows = await conn.execute_fetchall("SELECT pattern_id, instructions, updated_at FROM pattern_instructions ORDER BY pattern_id")
     return {
         "items": [
@@ -827,10 +950,10 @@ async def get_pattern_instructions():
 async def save_pattern_instructions(payload: dict):
     pattern_id = (payload.get("pattern_id") or "").upper()
     instructions = payload.get("instructions") or ""
-    if pattern_id not in {"P1", "P2", "P3", "P4", "P5"}:
+    if pattern_id not in _PATTERN_IDS:
         raise HTTPException(status_code=400, detail="pattern_id must be P1..P5")
 
-    async with db() as conn:
+    async with db_write() as conn:
         await conn.execute(
             """
             INSERT INTO pattern_instructions(pattern_id, instructions, updated_at)
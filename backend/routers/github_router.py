@@ -1,13 +1,56 @@
-import json
 import os
+from typing import Any
+
+import orjson
 from fastapi import APIRouter, HTTPException
 
-from database import db
+from database import db_read, db_write, invalidate_token_cache, latest_github_token
 from models import GitHubConnectRequest
 from services import github_client
 
 router = APIRouter()
 
+_SQL_UPSERT_TOKEN = """
+INSERT INTO github_tokens(username, token, profile_json)
+VALUES (?,?,?)
+ON CONFLICT(username) DO UPDATE SET
+  token=excluded.token,
+  connected_at=datetime('now'),
+  profile_json=excluded.profile_json
+"""
+
+# Multi-row upsert: {rows} is _REPO_ROW repeated once per repo in the batch.
+_REPO_ROW = "(?,?,?,?,?,?,?,?,?,?,?,?,?,?,datetime('now'))"
+# Keeps a batch well under SQLite's bound-parameter limit (14 per row).
+REPO_UPSERT_BATCH = 500
+_SQL_UPSERT_REPOS = """
+INSERT INTO repos(github_id, owner, name, full_name, description, language, stars, forks, size_kb,
+                  default_branch, private, html_url, clone_url, topics_json, fetched_at)
+VALUES {rows}
+ON CONFLICT(full_name) DO UPDATE SET
+  description=excluded.description,
+  language=excluded.language,
+  stars=excluded.stars,
+  forks=excluded.forks,
+  size_kb=excluded.size_kb,
+  default_branch=excluded.default_branch,
+  private=excluded.private,
+  html_url=excluded.html_url,
+  clone_url=excluded.clone_url,
+  topics_json=excluded.topics_json,
+  fetched_at=datetime('now')
+"""
+
+_SQL_UPSERT_GITHUB_CACHE = """
+INSERT INTO github_cache(url, etag, last_modified, body, fetched_at)
+VALUES (?,?,?,?,datetime('now'))
+ON CONFLICT(url) DO UPDATE SET
+  etag=excluded.etag,
+  last_modified=excluded.last_modified,
+  body=excluded.body,
+  fetched_at=datetime('now')
+"""
+
 
 def _mask_token(token: str) -> str:
     if len(token) < 8:
@@ -16,14 +59,33 @@ def _mask_token(token: str) -> str:
 
 
 async def _get_saved_token(user: str | None = None) -> str | None:
-    async with db() as conn:
-        if user:
-            row = await conn.execute_fetchone("SELECT token FROM github_tokens WHERE username=?", (user,))
-        else:
-            row = await conn.execute_fetchone("SELECT token FROM github_tokens ORDER BY connected_at DESC LIMIT 1")
+    if not user:
+        return await latest_github_token()
+    async with db_read() as conn:
+        row = await conn.execute_fetchone("SELECT token FROM github_tokens WHERE username=?", (user,))
         return row[0] if row else None
 
 
+async def _github_get(path: str, token: str | None) -> tuple[Any, bool]:
+    """
+    Conditional GitHub GET backed by github_cache. Returns (data, changed);
+    on a 304 the cached body is returned with changed=False.
+    """
+    async with db_read() as conn:
+        cached = await conn.execute_fetchone("SELECT etag, last_modified, body FROM github_cache WHERE url=?", (path,))
+    etag, last_modified = (cached[0], cached[1]) if cached else (None, None)
+    body, etag, last_modified = await github_client.conditional_request(path, token, etag, last_modified)
+    if body is None and cached:
+        return orjson.loads(cached[2]), False
+
+    data = orjson.loads(body or b"null")
+    if etag or last_modified:
+        async with db_write() as conn:
+            await conn.execute(_SQL_UPSERT_GITHUB_CACHE, (path, etag, last_modified, body))
+            await conn.commit()
+    return data, True
+
+
 async def bootstrap_env_credentials() -> bool:
     user = os.getenv("JARVIS_GITHUB_USER", "").strip()
     token = os.getenv("JARVIS_GITHUB_PAT", "").strip()
@@ -31,46 +93,34 @@ async def bootstrap_env_credentials() -> bool:
         return False
 
     try:
-        profile = github_client.get_user(token)
+        profile = await github_client.get_user(token)
     except Exception:
         return False
 
-    async with db() as conn:
+    async with db_write() as conn:
         await conn.execute(
-            """
-            INSERT INTO github_tokens(username, token, profile_json)
-            VALUES (?,?,?)
-            ON CONFLICT(username) DO UPDATE SET
-              token=excluded.token,
-              connected_at=datetime('now'),
-              profile_json=excluded.profile_json
-            """,
-            (user, token, json.dumps(profile)),
+            _SQL_UPSERT_TOKEN,
+            (user, token, orjson.dumps(profile).decode()),
         )
         await conn.commit()
+    invalidate_token_cache()
     return True
 
 
 @router.post("/connect")
 async def connect(req: GitHubConnectRequest):
     try:
-        profile = github_client.get_user(req.token)
+        profile = await github_client.get_user(req.token)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"GitHub auth failed: {e}")
 
-    async with db() as conn:
+    async with db_write() as conn:
         await conn.execute(
-            """
-            INSERT INTO github_tokens(username, token, profile_json)
-            VALUES (?,?,?)
-            ON CONFLICT(username) DO UPDATE SET
-              token=excluded.token,
-              connected_at=datetime('now'),
-              profile_json=excluded.profile_json
-            """,
-            (req.user, req.token, json.dumps(profile)),
+            _SQL_UPSERT_TOKEN,
+            (req.user, req.token, orjson.dumps(profile).decode()),
         )
         await conn.commit()
+    invalidate_token_cache()
 
     return {
         "connected": True,
@@ -88,18 +138,16 @@ async def profile(user: str | None = None):
     if not token:
         raise HTTPException(status_code=404, detail="No GitHub connection found")
     try:
-        return github_client.get_user(token)
+        data, _ = await _github_get("/user", token)
+        return data
     except Exception:
-        async with db() as conn:
+        async with db_read() as conn:
             if user:
                 row = await conn.execute_fetchone("SELECT profile_json FROM github_tokens WHERE username=?", (user,))
             else:
                 row = await conn.execute_fetchone("SELECT profile_json FROM github_tokens ORDER BY connected_at DESC LIMIT 1")
-        if row and row[0]:
-            try:
-                return json.loads(row[0])
-            except Exception:
-                pass
+        if row and isinstance(row[0], dict):
+            return row[0]
         raise HTTPException(status_code=400, detail="Failed to read profile")
 
 
@@ -107,48 +155,44 @@ async def profile(user: str | None = None):
 async def repos(user: str):
     token = await _get_saved_token(user)
     try:
-        data = github_client.list_repos(user, token)
+        data, changed = await _github_get(github_client.repos_path(user), token)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed listing repos: {e}")
-
-    async with db() as conn:
-        for r in data:
-            await conn.execute(
-                """
-                INSERT INTO repos(github_id, owner, name, full_name, description, language, stars, forks, size_kb,
-                                  default_branch, private, html_url, clone_url, topics_json, fetched_at)
-                VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,datetime('now'))
-                ON CONFLICT(full_name) DO UPDATE SET
-                    description=excluded.description,
-                    language=excluded.language,
-                    stars=excluded.stars,
-                    forks=excluded.forks,
-                    size_kb=excluded.size_kb,
-                    default_branch=excluded.default_branch,
-                    private=excluded.private,
-                    html_url=excluded.html_url,
-                    clone_url=excluded.clone_url,
-                    topics_json=excluded.topics_json,
-                    fetched_at=datetime('now')
-                """,
-                (
-                    r.get("id"),
-                    r.get("owner", {}).get("login", user),
-                    r.get("name"),
-                    r.get("full_name"),
-                    r.get("description"),
-                    r.get("language"),
-                    r.get("stargazers_count", 0),
-                    r.get("forks_count", 0),
-                    r.get("size", 0),
-                    r.get("default_branch", "main"),
-                    1 if r.get("private") else 0,
-                    r.get("html_url"),
-                    r.get("clone_url"),
-                    json.dumps(r.get("topics", [])),
-                ),
+    if not isinstance(data, list):
+        data, changed = [], False
+
+    # A 304 means the rows stored on the last listing are still current.
+    if changed and data:
+        # One row per full_name: a multi-row upsert cannot touch the same row twice.
+        rows = {
+            r.get("full_name"): (
+                r.get("id"),
+                r.get("owner", {}).get("login", user),
+                r.get("name"),
+                r.get("full_name"),
+                r.get("description"),
+                r.get("language"),
+                r.get("stargazers_count", 0),
+                r.get("forks_count", 0),
+                r.get("size", 0),
+                r.get("default_branch", "main"),
+                1 if r.get("private") else 0,
+                r.get("html_url"),
+                r.get("clone_url"),
+                orjson.dumps(r.get("topics", [])).decode(),
             )
-        await conn.commit()
+            for r in data
+        }
+        batch = list(rows.values())
+        async with db_write() as conn:
+            await conn.execute("BEGIN IMMEDIATE")
+            for i in range(0, len(batch), REPO_UPSERT_BATCH):
+                chunk = batch[i:i + REPO_UPSERT_BATCH]
+                await conn.execute(
+                    _SQL_UPSERT_REPOS.format(rows=",".join([_REPO_ROW] * len(chunk))),
+                    [v for row in chunk for v in row],
+                )
+            await conn.commit()
 
     return {
         "user": user,
@@ -172,10 +216,13 @@ async def content(user: str, repo: str, path: str = ""):
     token = await _get_saved_token(user)
     try:
         if path:
-            txt = github_client.get_file_content(user, repo, path, token)
-            return {"path": path, "content": txt}
-        meta = github_client.get_repo(user, repo, token)
-        tree = github_client.get_repo_tree(user, repo, meta.get("default_branch", "main"), token)
+            obj, _ = await _github_get(github_client.contents_path(user, repo, path), token)
+            return {"path": path, "content": github_client.decode_content(obj)}
+        meta, _ = await _github_get(github_client.repo_path(user, repo), token)
+        tree_data, _ = await _github_get(
+            github_client.tree_path(user, repo, meta.get("default_branch", "main")), token
+        )
+        tree = tree_data.get("tree", []) if isinstance(tree_data, dict) else []
         return {"repo": f"{user}/{repo}", "files": [t.get("path") for t in tree if t.get("type") == "blob"]}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed repo content read: {e}")
@@ -183,10 +230,11 @@ async def content(user: str, repo: str, path: str = ""):
 
 @router.delete("/connect")
 async def disconnect(user: str | None = None):
-    async with db() as conn:
+    async with db_write() as conn:
         if user:
             await conn.execute("DELETE FROM github_tokens WHERE username=?", (user,))
         else:
             await conn.execute("DELETE FROM github_tokens")
         await conn.commit()
+    invalidate_token_cache()
     return {"disconnected": True}
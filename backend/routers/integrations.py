@@ -1,18 +1,20 @@
-import json
+import orjson
 from fastapi import APIRouter, HTTPException
 
-from database import db, row2dict, rows2list
+from database import db_read, db_write, row2dict, rows2list
 from services.agentic_orchestrator import run_specialist_agent
 
 router = APIRouter()
 
-_ALLOWED = {"servicenow", "sharepoint", "jenkins"}
+_ALLOWED: frozenset[str] = frozenset({"servicenow", "sharepoint", "jenkins"})
 
 
 @router.get("/services")
 async def list_services():
-    async with db() as conn:
-        rows = await conn.execute_fetchall("SELECT * FROM integration_settings ORDER BY service")
+    async with db_read() as conn:
+        rows = await conn.execute_fetchall(
+            "SELECT id, service, enabled, status, last_sync FROM integration_settings ORDER BY service"
+        )
     return {"count": len(rows), "items": rows2list(rows)}
 
 
@@ -21,8 +23,11 @@ async def get_service(service: str):
     service = service.lower()
     if service not in _ALLOWED:
         raise HTTPException(status_code=404, detail="Unsupported integration service")
-    async with db() as conn:
-        row = await conn.execute_fetchone("SELECT * FROM integration_settings WHERE service=?", (service,))
+    async with db_read() as conn:
+        row = await conn.execute_fetchone(
+            "SELECT id, service, enabled, config_json, status, last_sync FROM integration_settings WHERE service=?",
+            (service,),
+        )
     if not row:
         raise HTTPException(status_code=404, detail="Service not configured")
     return row2dict(row)
@@ -38,7 +43,7 @@ async def save_service(service: str, payload: dict):
     config = payload.get("config") or {}
     status = payload.get("status") or ("connected" if enabled else "disconnected")
 
-    async with db() as conn:
+    async with db_write() as conn:
         await conn.execute(
             """
             INSERT INTO integration_settings(service, enabled, config_json, status, last_sync)
@@ -49,7 +54,7 @@ async def save_service(service: str, payload: dict):
               status=excluded.status,
               last_sync=datetime('now')
             """,
-            (service, enabled, json.dumps(config), status),
+            (service, enabled, orjson.dumps(config).decode(), status),
         )
         await conn.commit()
 
@@ -62,8 +67,9 @@ async def test_service(service: str):
     if service not in _ALLOWED:
         raise HTTPException(status_code=404, detail="Unsupported integration service")
 
-    async with db() as conn:
-        row = await conn.execute_fetchone("SELECT * FROM integration_settings WHERE service=?", (service,))
+    # Only the flags are needed here; skip decoding config_json.
+    async with db_read() as conn:
+        row = await conn.execute_fetchone("SELECT enabled, status FROM integration_settings WHERE service=?", (service,))
     if not row:
         raise HTTPException(status_code=404, detail="Service not configured")
 
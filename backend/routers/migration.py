@@ -1,32 +1,72 @@
-import json
 import uuid
-from fastapi import APIRouter, HTTPException
 
-from database import db, row2dict, rows2list
+import orjson
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+
+from database import db_read, db_write, row2dict, rows2list
 from models import ApprovalRequest, MigrationRunRequest
+from routers.pmo import invalidate_pmo_cache
 from services.agentic_orchestrator import orchestrate_workload, run_specialist_agent_json
 from services.migration_planner import (
     build_diff_payload,
+    generate_all,
     generate_jenkinsfile,
     generate_pipeline_yaml,
     generate_terraform,
-    get_architecture,
 )
 
 router = APIRouter()
 
+_WAVE_COLUMNS = "id, name, status, apps_json, progress, started_at, completed_at, created_at"
+# Job status view, assembled by SQLite so the stored JSON columns pass through
+# without a decode/encode round trip. The large generated artifacts are
+# served by /jobs/{id}/artifacts.
+_SQL_JOB_JSON = """
+SELECT json_object(
+  'id', id, 'wave_id', wave_id, 'app_id', app_id, 'pattern_id', pattern_id,
+  'status', status, 'progress', progress,
+  'gcp_arch_json', json(gcp_arch_json), 'diff_json', json(diff_json), 'logs_json', json(logs_json),
+  'started_at', started_at, 'completed_at', completed_at,
+  'approved_by', approved_by, 'approval_comment', approval_comment, 'created_at', created_at
+) FROM migration_jobs WHERE id=?
+"""
+# Latest job's diff view, built the same way; changed_files is read out of
+# diff_json by SQLite instead of decoding the whole diff to pick one key.
+_SQL_DIFF_JSON = """
+SELECT json_object(
+  'app_id', ?, 'job_id', id,
+  'destination_architecture', json(COALESCE(NULLIF(gcp_arch_json, 'null'), '{}')),
+  'changed_files', json(COALESCE(diff_json -> '$.changed_files', '[]')),
+  'diff', json(COALESCE(NULLIF(diff_json, 'null'), '{}'))
+) FROM migration_jobs WHERE app_id=? ORDER BY created_at DESC LIMIT 1
+"""
+
+# Static catalogue, serialized once at import.
+_PATTERN_AGENTS_BODY = orjson.dumps(
+    {
+        "agents": [
+            {"pattern": "P1", "name": "GCE Replatform Agent", "provider": "ollama", "mcp_enabled": True},
+            {"pattern": "P2", "name": "Load Balancer Agent", "provider": "ollama", "mcp_enabled": True},
+            {"pattern": "P3", "name": "Database Rebuild Agent", "provider": "ollama", "mcp_enabled": True},
+            {"pattern": "P4", "name": "PCF to GKE Agent", "provider": "ollama", "mcp_enabled": True},
+            {"pattern": "P5", "name": "Messaging Rebuild Agent", "provider": "ollama", "mcp_enabled": True},
+        ]
+    }
+)
+
 
 @router.get("/waves")
 async def list_waves():
-    async with db() as conn:
-        rows = await conn.execute_fetchall("SELECT * FROM migration_waves ORDER BY id")
+    async with db_read() as conn:
+        rows = await conn.execute_fetchall(f"SELECT {_WAVE_COLUMNS} FROM migration_waves ORDER BY id")
     return {"count": len(rows), "items": rows2list(rows)}
 
 
 @router.get("/waves/{wave_id}")
 async def get_wave(wave_id: str):
-    async with db() as conn:
-        row = await conn.execute_fetchone("SELECT * FROM migration_waves WHERE id=?", (wave_id,))
+    async with db_read() as conn:
+        row = await conn.execute_fetchone(f"SELECT {_WAVE_COLUMNS} FROM migration_waves WHERE id=?", (wave_id,))
     if not row:
         raise HTTPException(status_code=404, detail="Wave not found")
     return row2dict(row)
@@ -34,138 +74,138 @@ async def get_wave(wave_id: str):
 
 @router.post("/waves/{wave_id}/start")
 async def start_wave(wave_id: str):
-    async with db() as conn:
+    async with db_write() as conn:
         await conn.execute(
             "UPDATE migration_waves SET status='active', started_at=COALESCE(started_at, datetime('now')) WHERE id=?",
             (wave_id,),
         )
         await conn.commit()
+    invalidate_pmo_cache()
     return {"wave_id": wave_id, "status": "active"}
 
 
 @router.get("/agents")
 async def pattern_agents():
-    return {
-        "agents": [
-            {"pattern": "P1", "name": "GCE Replatform Agent", "provider": "ollama", "mcp_enabled": True},
-            {"pattern": "P2", "name": "Load Balancer Agent", "provider": "ollama", "mcp_enabled": True},
-            {"pattern": "P3", "name": "Database Rebuild Agent", "provider": "ollama", "mcp_enabled": True},
-            {"pattern": "P4", "name": "PCF to GKE Agent", "provider": "ollama", "mcp_enabled": True},
-            {"pattern": "P5", "name": "Messaging Rebuild Agent", "provider": "ollama", "mcp_enabled": True},
-        ]
-    }
+    return Response(content=_PATTERN_AGENTS_BODY, media_type="application/json")
 
 
 @router.post("/run")
 async def run_migration(req: MigrationRunRequest):
-    async with db() as conn:
-        app_row = await conn.execute_fetchone("SELECT * FROM applications WHERE id=?", (req.app_id,))
-        if not app_row:
-            raise HTTPException(status_code=404, detail="Application not found")
-
-        app = row2dict(app_row)
-        pattern = req.pattern or app.get("pattern_id") or "P1"
-
-        orchestration = await orchestrate_workload(
-            objective=f"Execute migration plan for app {app.get('name', req.app_id)} with pattern {pattern}",
-            tasks=[
-                {
-                    "agent": "migration",
-                    "objective": "Create migration approach, key architecture decisions, and infra transformation strategy.",
-                    "context": {"app_id": req.app_id, "pattern": pattern, "wave_id": req.wave_id},
-                    "mcp_calls": [
-                        {"tool": "get_application_context", "args": {"app_id": req.app_id}},
-                        {"tool": "get_wave_context", "args": {"wave_id": req.wave_id or ""}},
-                    ],
-                    "max_words": 180,
-                },
-                {
-                    "agent": "testing",
-                    "objective": "Generate quality gates and release readiness checks for this migration.",
-                    "context": {"app_id": req.app_id, "pattern": pattern},
-                    "mcp_calls": [{"tool": "get_testing_context", "args": {"app_id": req.app_id}}],
-                    "max_words": 140,
-                },
-                {
-                    "agent": "pmo",
-                    "objective": "Assess governance risks and stakeholder actions for go-live.",
-                    "context": {"app_id": req.app_id, "pattern": pattern},
-                    "mcp_calls": [{"tool": "get_pmo_context", "args": {}}],
-                    "max_words": 140,
-                },
-            ],
-            shared_context={"app_id": req.app_id, "pattern": pattern, "wave_id": req.wave_id},
-        )
-
-        artifact_schema = {
-            "terraform_hcl": "string",
-            "pipeline_yaml": "string",
-            "jenkinsfile": "string",
-            "gcp_architecture": {
-                "target": "string",
-                "services": ["string"],
-                "network": "string",
-            },
-            "changed_files": [
-                {"path": "string", "change": "string", "reason": "string"}
-            ],
-        }
+    # The DB is only touched before and after the agent calls, never across them.
+    async with db_read() as conn:
+        app_row = await conn.execute_fetchone("SELECT name, pattern_id FROM applications WHERE id=?", (req.app_id,))
+    if not app_row:
+        raise HTTPException(status_code=404, detail="Application not found")
 
-        terraform_hcl = ""
-        pipeline_yaml = ""
-        jenkinsfile = ""
-        gcp_arch = {}
-        changed_files = []
-        try:
-            structured = await run_specialist_agent_json(
-                agent="migration",
-                objective=(
-                    f"Generate implementation artifacts for {app.get('name', req.app_id)} using pattern {pattern}. "
-                    "Return practical Terraform, GitHub Actions workflow, Jenkinsfile, and changed file list."
-                ),
-                schema_hint=artifact_schema,
-                context={
-                    "app_id": req.app_id,
-                    "pattern": pattern,
-                    "app_name": app.get("name", req.app_id),
-                    "orchestrator_summary": orchestration.get("summary"),
-                },
-                mcp_calls=[
+    app = row2dict(app_row)
+    pattern = req.pattern or app.get("pattern_id") or "P1"
+
+    orchestration = await orchestrate_workload(
+        objective=f"Execute migration plan for app {app.get('name', req.app_id)} with pattern {pattern}",
+        tasks=[
+            {
+                "agent": "migration",
+                "objective": "Create migration approach, key architecture decisions, and infra transformation strategy.",
+                "context": {"app_id": req.app_id, "pattern": pattern, "wave_id": req.wave_id},
+                "mcp_calls": [
                     {"tool": "get_application_context", "args": {"app_id": req.app_id}},
                     {"tool": "get_wave_context", "args": {"wave_id": req.wave_id or ""}},
-                    {"tool": "get_latest_job_context", "args": {"app_id": req.app_id}},
                 ],
-            )
-            data = structured.get("data") or {}
-            terraform_hcl = str(data.get("terraform_hcl") or "").strip()
-            pipeline_yaml = str(data.get("pipeline_yaml") or "").strip()
-            jenkinsfile = str(data.get("jenkinsfile") or "").strip()
-            gcp_arch = data.get("gcp_architecture") if isinstance(data.get("gcp_architecture"), dict) else {}
-            changed_files = data.get("changed_files") if isinstance(data.get("changed_files"), list) else []
-        except Exception:
-            terraform_hcl = ""
-
-        if not terraform_hcl:
-            terraform_hcl = generate_terraform(app.get("name", req.app_id), pattern)
-        if not pipeline_yaml:
-            pipeline_yaml = generate_pipeline_yaml(app.get("name", req.app_id), pattern)
-        if not jenkinsfile:
-            jenkinsfile = generate_jenkinsfile(app.get("name", req.app_id), pattern)
-        if not gcp_arch:
-            gcp_arch = get_architecture(pattern)
-
-        diff_payload = build_diff_payload(pattern)
-        if changed_files:
-            diff_payload["changed_files"] = changed_files
-
-        job_id = f"JOB-{uuid.uuid4().hex[:10]}"
-        await conn.execute(
+                "max_words": 180,
+            },
+            {
+                "agent": "testing",
+                "objective": "Generate quality gates and release readiness checks for this migration.",
+                "context": {"app_id": req.app_id, "pattern": pattern},
+                "mcp_calls": [{"tool": "get_testing_context", "args": {"app_id": req.app_id}}],
+                "max_words": 140,
+            },
+            {
+                "agent": "pmo",
+                "objective": "Assess governance risks and stakeholder actions for go-live.",
+                "context": {"app_id": req.app_id, "pattern": pattern},
+                "mcp_calls": [{"tool": "get_pmo_context", "args": {}}],
+                "max_words": 140,
+            },
+        ],
+        shared_context={"app_id": req.app_id, "pattern": pattern, "wave_id": req.wave_id},
+    )
+
+    artifact_schema = {
+        "terraform_hcl": "string",
+        "pipeline_yaml": "string",
+        "jenkinsfile": "string",
+        "gcp_architecture": {
+            "target": "string",
+            "services": ["string"],
+            "network": "string",
+        },
+        "changed_files": [
+            {"path": "string", "change": "string", "reason": "string"}
+        ],
+    }
+
+    terraform_hcl = ""
+    pipeline_yaml = ""
+    jenkinsfile = ""
+    gcp_arch = {}
+    changed_files = []
+    try:
+        structured = await run_specialist_agent_json(
+            agent="migration",
+            objective=(
+                f"Generate implementation artifacts for {app.get('name', req.app_id)} using pattern {pattern}. "
+                "Return practical Terraform, GitHub Actions workflow, Jenkinsfile, and changed file list."
+            ),
+            schema_hint=artifact_schema,
+            context={
+                "app_id": req.app_id,
+                "pattern": pattern,
+                "app_name": app.get("name", req.app_id),
+                "orchestrator_summary": orchestration.get("summary"),
+            },
+            mcp_calls=[
+                {"tool": "get_application_context", "args": {"app_id": req.app_id}},
+                {"tool": "get_wave_context", "args": {"wave_id": req.wave_id or ""}},
+                {"tool": "get_latest_job_context", "args": {"app_id": req.app_id}},
+            ],
+        )
+        data = structured.get("data") or {}
+        terraform_hcl = str(data.get("terraform_hcl") or "").strip()
+        pipeline_yaml = str(data.get("pipeline_yaml") or "").strip()
+        jenkinsfile = str(data.get("jenkinsfile") or "").strip()
+        gcp_arch = data.get("gcp_architecture") if isinstance(data.get("gcp_architecture"), dict) else {}
+        changed_files = data.get("changed_files") if isinstance(data.get("changed_files"), list) else []
+    except Exception:
+        terraform_hcl = ""
+
+    # Whatever the agent left out comes from the templates, all in one lookup.
+    # The fallback architecture is pre-serialized; only an agent-supplied one
+    # needs encoding.
+    fallback = generate_all(app.get("name", req.app_id), pattern)
+    terraform_hcl = terraform_hcl or fallback["terraform"]
+    pipeline_yaml = pipeline_yaml or fallback["pipeline_yaml"]
+    jenkinsfile = jenkinsfile or fallback["jenkinsfile"]
+    gcp_arch_json = orjson.dumps(gcp_arch) if gcp_arch else fallback["architecture_json"]
+
+    diff_payload = build_diff_payload(pattern)
+    if changed_files:
+        diff_payload["changed_files"] = changed_files
+
+    job_id = f"JOB-{uuid.uuid4().hex[:10]}"
+    artifact_id = f"TFA-{uuid.uuid4().hex[:8]}"
+    async with db_write() as conn:
+        # Job and artifact rows land in one write transaction; RETURNING hands
+        # back the stored created_at without a follow-up read.
+        await conn.execute("BEGIN IMMEDIATE")
+        job_rows = await conn.execute_fetchall(
             """
             INSERT INTO migration_jobs(
               id, wave_id, app_id, pattern_id, status, progress,
               terraform_hcl, pipeline_yaml, jenkinsfile, gcp_arch_json, diff_json,
               started_at, created_at
             ) VALUES (?,?,?,?,?,?,?,?,?,?,?,datetime('now'),datetime('now'))
+            RETURNING created_at
             """,
             (
                 job_id,
@@ -177,12 +217,11 @@ async def run_migration(req: MigrationRunRequest):
                 terraform_hcl,
                 pipeline_yaml,
                 jenkinsfile,
-                json.dumps(gcp_arch),
-                json.dumps(diff_payload),
+                gcp_arch_json.decode(),
+                orjson.dumps(diff_payload).decode(),
             ),
         )
 
-        artifact_id = f"TFA-{uuid.uuid4().hex[:8]}"
         await conn.execute(
             """
             INSERT INTO terraform_artifacts(
@@ -199,39 +238,53 @@ async def run_migration(req: MigrationRunRequest):
                 "output \"target\" { value = \"gcp\" }",
                 pipeline_yaml,
                 jenkinsfile,
-                json.dumps(diff_payload.get("changed_files", [])),
+                orjson.dumps(diff_payload.get("changed_files", [])).decode(),
             ),
         )
 
         await conn.commit()
 
-    return {
+    # Returned directly so the large artifact strings skip jsonable_encoder.
+    return ORJSONResponse({
         "job_id": job_id,
         "status": "awaiting_approval",
+        "created_at": job_rows[0][0],
         "app_id": req.app_id,
         "pattern": pattern,
-        "destination_architecture": gcp_arch,
+        "destination_architecture": orjson.Fragment(gcp_arch_json),
         "changed_files": diff_payload.get("changed_files", []),
         "agentic": {
             "orchestrator": "enabled",
             "provider": "ollama",
             "summary": orchestration.get("summary"),
         },
-    }
+    })
 
 
 @router.get("/jobs/{job_id}")
 async def get_job(job_id: str):
-    async with db() as conn:
-        row = await conn.execute_fetchone("SELECT * FROM migration_jobs WHERE id=?", (job_id,))
+    async with db_read() as conn:
+        row = await conn.execute_fetchone(_SQL_JOB_JSON, (job_id,))
     if not row:
         raise HTTPException(status_code=404, detail="Migration job not found")
-    return row2dict(row)
+    return Response(content=row[0], media_type="application/json")
+
+
+@router.get("/jobs/{job_id}/artifacts")
+async def get_job_artifacts(job_id: str):
+    async with db_read() as conn:
+        row = await conn.execute_fetchone(
+            "SELECT id, terraform_hcl, pipeline_yaml, jenkinsfile FROM migration_jobs WHERE id=?",
+            (job_id,),
+        )
+    if not row:
+        raise HTTPException(status_code=404, detail="Migration job not found")
+    return ORJSONResponse(row2dict(row))
 
 
 @router.post("/terraform/{app_id}")
 async def generate_tf(app_id: str):
-    async with db() as conn:
+    async with db_read() as conn:
         row = await conn.execute_fetchone("SELECT name, pattern_id FROM applications WHERE id=?", (app_id,))
     if not row:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -250,12 +303,12 @@ async def generate_tf(app_id: str):
         terraform_hcl = ""
     if not terraform_hcl:
         terraform_hcl = generate_terraform(name, pattern)
-    return {"app_id": app_id, "pattern": pattern, "terraform": terraform_hcl}
+    return ORJSONResponse({"app_id": app_id, "pattern": pattern, "terraform": terraform_hcl})
 
 
 @router.post("/pipeline/{app_id}")
 async def generate_pipeline(app_id: str):
-    async with db() as conn:
+    async with db_read() as conn:
         row = await conn.execute_fetchone("SELECT name, pattern_id FROM applications WHERE id=?", (app_id,))
     if not row:
         raise HTTPException(status_code=404, detail="Application not found")
@@ -281,18 +334,18 @@ async def generate_pipeline(app_id: str):
     if not jenkinsfile:
         jenkinsfile = generate_jenkinsfile(name, pattern)
 
-    return {
+    return ORJSONResponse({
         "app_id": app_id,
         "pattern": pattern,
         "github_actions": github_actions,
         "jenkinsfile": jenkinsfile,
-    }
+    })
 
 
 @router.post("/approve/{job_id}")
 async def approve(job_id: str, req: ApprovalRequest):
     status = "approved" if req.approve else "failed"
-    async with db() as conn:
+    async with db_write() as conn:
         await conn.execute(
             """
             UPDATE migration_jobs
@@ -302,28 +355,17 @@ async def approve(job_id: str, req: ApprovalRequest):
             (status, req.approved_by, req.comment, status, job_id),
         )
         await conn.commit()
+    invalidate_pmo_cache()
     return {"job_id": job_id, "status": status, "approved_by": req.approved_by, "comment": req.comment}
 
 
 @router.get("/diff/{app_id}")
 async def migration_diff(app_id: str):
-    async with db() as conn:
-        row = await conn.execute_fetchone(
-            "SELECT id, diff_json, gcp_arch_json FROM migration_jobs WHERE app_id=? ORDER BY created_at DESC LIMIT 1",
-            (app_id,),
-        )
+    async with db_read() as conn:
+        row = await conn.execute_fetchone(_SQL_DIFF_JSON, (app_id, app_id))
     if not row:
         raise HTTPException(status_code=404, detail="No migration job found for app")
-
-    diff = json.loads(row[1] or "{}")
-    arch = json.loads(row[2] or "{}")
-    return {
-        "app_id": app_id,
-        "job_id": row[0],
-        "destination_architecture": arch,
-        "changed_files": diff.get("changed_files", []),
-        "diff": diff,
-    }
+    return Response(content=row[0], media_type="application/json")
 
 
 @router.post("/issue")
@@ -1,25 +1,69 @@
+import time
+from typing import Any, Awaitable, Callable
+
 from fastapi import APIRouter
 
-from database import db, rows2list
+from database import SQL_COUNT_APPLICATIONS, SQL_COUNT_MIGRATED_APPS, db_read, rows2list
 from models import ReportRequest
-from services.agentic_orchestrator import orchestrate_workload, run_specialist_agent_json
+from services.agentic_orchestrator import mcp_request_cache, orchestrate_workload, run_specialist_agent_json
 
 router = APIRouter()
 
+# Dashboard views change on human timescales but are polled; each is cached
+# for a short TTL. Writers that move these numbers call invalidate_pmo_cache().
+PMO_CACHE_TTL_SEC = 60
+_pmo_cache: dict[str, tuple[Any, float]] = {}
+_pmo_generation = 0
+
+
+def invalidate_pmo_cache():
+    global _pmo_generation
+    _pmo_generation += 1
+    _pmo_cache.clear()
+
+
+async def _cached(key: str, build: Callable[[], Awaitable[Any]]) -> Any:
+    hit = _pmo_cache.get(key)
+    if hit and hit[1] > time.monotonic():
+        return hit[0]
+    generation = _pmo_generation
+    value = await build()
+    # Skip the store if a write invalidated the cache while we were reading.
+    if generation == _pmo_generation:
+        _pmo_cache[key] = (value, time.monotonic() + PMO_CACHE_TTL_SEC)
+    return value
+
+
+_TIMELINE = {
+    "milestones": [
+        {"name": "Wave 1 complete", "planned": "2026-03-15", "status": "planned"},
+        {"name": "Wave 2 complete", "planned": "2026-04-30", "status": "planned"},
+        {"name": "Cutover", "planned": "2026-06-01", "status": "planned"},
+    ]
+}
+
+
+# All dashboard figures in one statement: a single hop to the connection thread.
+_SQL_DASHBOARD = (
+    f"SELECT ({SQL_COUNT_APPLICATIONS}), ({SQL_COUNT_MIGRATED_APPS}), "
+    "(SELECT COUNT(*) FROM pmo_risks WHERE rating IN ('critical','high') AND status='open'), "
+    "COALESCE((SELECT SUM(actual) FROM pmo_budget),0), "
+    "COALESCE((SELECT SUM(planned) FROM pmo_budget),0)"
+)
+
 
 @router.get("/dashboard")
 async def dashboard():
-    async with db() as conn:
-        apps = await conn.execute_fetchone("SELECT COUNT(*) FROM applications")
-        migrated = await conn.execute_fetchone("SELECT COUNT(*) FROM migration_jobs WHERE status IN ('approved','complete')")
-        risks = await conn.execute_fetchone("SELECT COUNT(*) FROM pmo_risks WHERE rating IN ('critical','high') AND status='open'")
-        budget = await conn.execute_fetchone("SELECT COALESCE(SUM(actual),0), COALESCE(SUM(planned),0) FROM pmo_budget")
-
-    apps_n = apps[0] if apps else 0
-    mig_n = migrated[0] if migrated else 0
-    risk_n = risks[0] if risks else 0
-    actual = float(budget[0] if budget else 0)
-    planned = float(budget[1] if budget else 0)
+    return await _cached("dashboard", _build_dashboard)
+
+
+async def _build_dashboard():
+    async with db_read() as conn:
+        row = await conn.execute_fetchone(_SQL_DASHBOARD)
+
+    apps_n, mig_n, risk_n, actual, planned = row or (0, 0, 0, 0, 0)
+    actual = float(actual)
+    planned = float(planned)
 
     return {
         "total_apps": apps_n,
@@ -32,36 +76,55 @@ async def dashboard():
     }
 
 
+PMO_PAGE_LIMIT = 100
+PMO_PAGE_MAX = 1000
+
+
+async def _list_table(table: str, limit: int, offset: int) -> dict:
+    lim = max(1, min(int(limit), PMO_PAGE_MAX))
+    off = max(0, int(offset))
+
+    async def build():
+        async with db_read() as conn:
+            # The window total rides along with the page: one statement, one hop.
+            rows = await conn.execute_fetchall(
+                f"SELECT *, COUNT(*) OVER () AS _total FROM {table} ORDER BY id LIMIT ? OFFSET ?",
+                (lim, off),
+            )
+            if rows:
+                total = rows[0]["_total"]
+            else:
+                total = (await conn.execute_fetchone(f"SELECT COUNT(*) FROM {table}"))[0] if off else 0
+        items = rows2list(rows)
+        for item in items:
+            del item["_total"]
+        return {"count": len(items), "total": total, "limit": lim, "offset": off, "items": items}
+
+    # Only the default page, which the dashboard polls, is cached; arbitrary
+    # limit/offset pairs would otherwise grow the cache without bound.
+    if lim == PMO_PAGE_LIMIT and off == 0:
+        return await _cached(table, build)
+    return await build()
+
+
 @router.get("/phases")
-async def phases():
-    async with db() as conn:
-        rows = await conn.execute_fetchall("SELECT * FROM migration_waves ORDER BY id")
-    return {"count": len(rows), "items": rows2list(rows)}
+async def phases(limit: int = PMO_PAGE_LIMIT, offset: int = 0):
+    return await _list_table("migration_waves", limit, offset)
 
 
 @router.get("/risks")
-async def risks():
-    async with db() as conn:
-        rows = await conn.execute_fetchall("SELECT * FROM pmo_risks ORDER BY id")
-    return {"count": len(rows), "items": rows2list(rows)}
+async def risks(limit: int = PMO_PAGE_LIMIT, offset: int = 0):
+    return await _list_table("pmo_risks", limit, offset)
 
 
 @router.get("/budget")
-async def budget():
-    async with db() as conn:
-        rows = await conn.execute_fetchall("SELECT * FROM pmo_budget ORDER BY id")
-    return {"count": len(rows), "items": rows2list(rows)}
+async def budget(limit: int = PMO_PAGE_LIMIT, offset: int = 0):
+    return await _list_table("pmo_budget", limit, offset)
 
 
 @router.get("/timeline")
 async def timeline():
-    return {
-        "milestones": [
-            {"name": "Wave 1 complete", "planned": "2026-03-15", "status": "planned"},
-            {"name": "Wave 2 complete", "planned": "2026-04-30", "status": "planned"},
-            {"name": "Cutover", "planned": "2026-06-01", "status": "planned"},
-        ]
-    }
+    return _TIMELINE
 
 
 @router.get("/reports/{report_type}")
@@ -86,6 +149,7 @@ async def get_report(report_type: str):
 
 
 @router.post("/reports/generate")
+@mcp_request_cache
 async def generate_report(req: ReportRequest):
     orchestration = await orchestrate_workload(
         objective=f"Generate {req.type} report for period {req.period}",
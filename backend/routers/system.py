@@ -1,12 +1,14 @@
-import json
+import asyncio
 import os
 import platform
+import re
+from itertools import islice
 
 from fastapi import APIRouter, HTTPException
 
-from database import DB_PATH, db, rows2list
-from services.agentic_orchestrator import orchestrate_workload, run_specialist_agent
-from services.embeddings import cosine_similarity, embed_text
+from database import db_path, db_read, search_code_chunks
+from services.agentic_orchestrator import mcp_request_cache, orchestrate_workload, run_specialist_agent
+from services.embeddings import embed_query, embed_query_cache_stats
 from services.llm_client import ollama_chat_model, ollama_embed_model, ollama_list_models
 
 router = APIRouter()
@@ -21,7 +23,7 @@ async def health():
         "status": "ok",
         "service": "jarvis-backend",
         "python": platform.python_version(),
-        "db_path": str(DB_PATH),
+        "db_path": str(db_path()),
     }
 
 
@@ -30,45 +32,32 @@ async def _search_vector_context(query: str, limit: int = 6) -> list[dict]:
     if not q:
         return []
 
-    q_vec = embed_text(q)
-    async with db() as conn:
-        rows = await conn.execute_fetchall(
-            "SELECT app_id, file_path, chunk_text, embedding_json FROM code_chunks"
-        )
-    items = rows2list(rows)
-
-    scored = []
-    for item in items:
-        try:
-            emb = json.loads(item.get("embedding_json") or "[]")
-            sim = cosine_similarity(q_vec, emb)
-            scored.append(
-                {
-                    "app_id": item.get("app_id"),
-                    "file_path": item.get("file_path"),
-                    "chunk_text": (item.get("chunk_text") or "")[:800],
-                    "score": sim,
-                }
-            )
-        except Exception:
-            continue
+    # Embedding (an Ollama round-trip on a cache miss) and scoring both run
+    # off the event loop so concurrent chats keep being served.
+    q_vec = await asyncio.to_thread(embed_query, q)
+    async with db_read() as conn:
+        hits = await search_code_chunks(conn, q_vec, max(1, min(limit, 10)))
+    for hit in hits:
+        hit.pop("id", None)
+        hit["chunk_text"] = (hit.get("chunk_text") or "")[:800]
+    return hits
+
 
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored[: max(1, min(limit, 10))]
+_WORD = re.compile(r"\S+")
 
 
-def _count_words(text: str) -> int:
-    return len([w for w in str(text or "").strip().split() if w])
+def _count_words(text: str, limit: int | None = None) -> int:
+    """Word count, or min(count, limit): stops scanning user input once limit is reached."""
+    return sum(1 for _ in islice(_WORD.finditer(str(text or "")), limit))
 
 
 def _trim_words(text: str, max_words: int) -> str:
-    words = [w for w in str(text or "").strip().split() if w]
-    if len(words) <= max_words:
-        return " ".join(words)
-    return " ".join(words[:max_words])
+    # maxsplit leaves at most one unsplit remainder instead of a list of every word.
+    return " ".join(str(text or "").split(None, max_words)[:max_words])
 
 
 @router.post("/jarvis/chat")
+@mcp_request_cache
 async def jarvis_chat(payload: dict):
     message = (payload or {}).get("message", "")
     persona = (payload or {}).get("persona", "assessment")
@@ -78,7 +67,7 @@ async def jarvis_chat(payload: dict):
     if not str(message).strip():
         raise HTTPException(status_code=400, detail="message is required")
 
-    if _count_words(str(message)) > MAX_CHAT_INPUT_WORDS:
+    if _count_words(str(message), MAX_CHAT_INPUT_WORDS + 1) > MAX_CHAT_INPUT_WORDS:
         raise HTTPException(
             status_code=400,
             detail=f"Chat input exceeds {MAX_CHAT_INPUT_WORDS} words. Please shorten your message.",
@@ -114,6 +103,7 @@ async def jarvis_chat(payload: dict):
                 }
             ],
             shared_context={"channel": "jarvis-chat", "persona": persona, "ui_context": ui_context},
+            max_words=MAX_CHAT_OUTPUT_WORDS,
         )
         response_text = str(orchestration.get("summary") or "").strip()
         if not response_text:
@@ -152,6 +142,7 @@ async def kpis():
         "migrated": 0,
         "at_risk": 0,
         "open_issues": 0,
+        "embedding_cache": embed_query_cache_stats(),
     }
 
 
@@ -159,7 +150,7 @@ async def kpis():
 async def agents():
     models = []
     try:
-        models = ollama_list_models()
+        models = await ollama_list_models()
     except Exception:
         models = []
 
@@ -1,7 +1,9 @@
 import uuid
+from collections import OrderedDict, defaultdict, deque
+
 from fastapi import APIRouter, HTTPException
 
-from services.agentic_orchestrator import run_specialist_agent, run_specialist_agent_json
+from services.agentic_orchestrator import mcp_request_cache, run_specialist_agent, run_specialist_agent_json
 
 router = APIRouter()
 
@@ -12,7 +14,24 @@ _DEMO_SUITES = [
     {"id": "UAT", "name": "UAT Tests", "type": "uat"},
 ]
 
-_RUNS = {}
+# Run records live in memory, oldest first; the cap bounds growth. Since the
+# oldest run overall is also the oldest for its app, eviction pops from the
+# left of both views.
+MAX_RUNS = 5000
+_RUNS: OrderedDict[str, dict] = OrderedDict()
+_RUNS_BY_APP: defaultdict[str, deque] = defaultdict(deque)
+
+
+def _record_run(rec: dict) -> dict:
+    _RUNS[rec["run_id"]] = rec
+    _RUNS_BY_APP[rec["app_id"]].append(rec)
+    while len(_RUNS) > MAX_RUNS:
+        _, old = _RUNS.popitem(last=False)
+        by_app = _RUNS_BY_APP[old["app_id"]]
+        by_app.popleft()
+        if not by_app:
+            del _RUNS_BY_APP[old["app_id"]]
+    return rec
 
 
 @router.get("/suites")
@@ -63,7 +82,7 @@ async def run_suite(suite_id: str, payload: dict):
         skipped = 1
 
     run_id = f"RUN-{uuid.uuid4().hex[:10]}"
-    _RUNS[run_id] = {
+    return _record_run({
         "run_id": run_id,
         "suite_id": suite_id,
         "app_id": app_id,
@@ -74,8 +93,7 @@ async def run_suite(suite_id: str, payload: dict):
         "quality_summary": quality_summary,
         "provider": "ollama",
         "mcp_enabled": True,
-    }
-    return _RUNS[run_id]
+    })
 
 
 @router.get("/runs/{run_id}")
@@ -87,11 +105,26 @@ async def run_status(run_id: str):
 
 @router.get("/results/{app_id}")
 async def results(app_id: str):
-    out = [r for r in _RUNS.values() if r.get("app_id") == app_id]
+    out = list(_RUNS_BY_APP.get(app_id, ()))
     return {"app_id": app_id, "count": len(out), "items": out}
 
 
+def _synthesize_run(app_id: str, suite: dict, proposed: dict) -> dict:
+    return {
+        "run_id": f"RUN-{uuid.uuid4().hex[:10]}",
+        "suite_id": suite["id"],
+        "app_id": app_id,
+        "status": str(proposed.get("status") or "complete"),
+        "passed": max(0, int(proposed.get("passed") or 20)),
+        "failed": max(0, int(proposed.get("failed") or 0)),
+        "skipped": max(0, int(proposed.get("skipped") or 0)),
+        "provider": "ollama",
+        "mcp_enabled": True,
+    }
+
+
 @router.post("/run-all")
+@mcp_request_cache
 async def run_all(payload: dict):
     app_id = payload.get("app_id")
     if not app_id:
@@ -127,23 +160,7 @@ async def run_all(payload: dict):
             if isinstance(item, dict) and item.get("suite_id"):
                 plan_map[str(item.get("suite_id"))] = item
 
-    results = []
-    for suite in _DEMO_SUITES:
-        rid = f"RUN-{uuid.uuid4().hex[:10]}"
-        proposed = plan_map.get(suite["id"], {})
-        rec = {
-            "run_id": rid,
-            "suite_id": suite["id"],
-            "app_id": app_id,
-            "status": str(proposed.get("status") or "complete"),
-            "passed": max(0, int(proposed.get("passed") or 20)),
-            "failed": max(0, int(proposed.get("failed") or 0)),
-            "skipped": max(0, int(proposed.get("skipped") or 0)),
-            "provider": "ollama",
-            "mcp_enabled": True,
-        }
-        _RUNS[rid] = rec
-        results.append(rec)
+    results = [_record_run(_synthesize_run(app_id, suite, plan_map.get(suite["id"], {}))) for suite in _DEMO_SUITES]
 
     summary = ""
     try:
@@ -0,0 +1,176 @@
+"""
+Build the precomputed demo assessment dataset loaded by init_db.
+
+Run from the backend directory whenever the demo catalog changes:
+
+    python scripts/build_demo_seed.py
+"""
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+OUT_PATH = Path(__file__).resolve().parent.parent / "data" / "demo_seed.json"
+DEMO_RUN_ID = "DEMO-RUN-001"
+
+
+# Everything that only depends on the pattern, resolved once instead of per app.
+PATTERN_META = {
+    "P1": SimpleNamespace(
+        name="Web + DMZ Replatform", gcp="GCE + Cloud Armor + Cloud SQL",
+        framework="spring", language="Java", infra_file="network/dmz.tf",
+        has_db=1, has_messaging=1, has_dockerfile=1, has_pcf=0, tight=True, db_coupling="loose",
+        db_types=["postgres"], dependencies=["maven", "redis"], protocols=["REST", "gRPC"],
+    ),
+    "P2": SimpleNamespace(
+        name="Global L7 Load Balancer Modernization", gcp="Global External HTTP(S) Load Balancer",
+        framework="node", language="TypeScript", infra_file="network/lb.tf",
+        has_db=0, has_messaging=0, has_dockerfile=0, has_pcf=0, tight=False, db_coupling="loose",
+        db_types=[], dependencies=["npm", "nginx"], protocols=["REST", "gRPC"],
+    ),
+    "P3": SimpleNamespace(
+        name="Database Migration and Rebuild", gcp="Cloud SQL + Database Migration Service",
+        framework="dotnet", language="C#", infra_file="database/migration.tf",
+        has_db=1, has_messaging=0, has_dockerfile=0, has_pcf=0, tight=True, db_coupling="tight",
+        db_types=["mysql"], dependencies=["dotnet", "sqlclient"], protocols=["event"],
+    ),
+    "P4": SimpleNamespace(
+        name="PCF to GKE Replatform", gcp="GKE + Artifact Registry",
+        framework="java", language="Java", infra_file="k8s/deployment.yaml",
+        has_db=1, has_messaging=0, has_dockerfile=1, has_pcf=1, tight=True, db_coupling="tight",
+        db_types=["postgres"], dependencies=["maven", "redis"], protocols=["REST", "gRPC"],
+    ),
+    "P5": SimpleNamespace(
+        name="Messaging Modernization", gcp="Pub/Sub + Cloud Run",
+        framework="python", language="Python", infra_file="messaging/pubsub.tf",
+        has_db=0, has_messaging=1, has_dockerfile=1, has_pcf=0, tight=False, db_coupling="loose",
+        db_types=[], dependencies=["pip", "pubsub"], protocols=["event"],
+    ),
+}
+
+SEED_REPOS = {
+    "P1": ["customer-portal", "partner-gateway", "agent-hub", "claims-web", "payments-web", "retail-portal", "onboarding-web", "dealer-portal", "billing-web", "support-web"],
+    "P2": ["traffic-edge", "api-edge", "checkout-edge", "catalog-edge", "policy-edge", "mobile-edge", "identity-edge", "pricing-edge", "routing-edge", "partner-edge"],
+    "P3": ["ledger-core", "policy-db-sync", "order-ledger", "audit-store", "settlement-db", "recon-db", "customer-master", "claims-ledger", "risk-warehouse", "payment-ledger"],
+    "P4": ["pcf-order", "pcf-billing", "pcf-reporting", "pcf-pricing", "pcf-notify", "pcf-session", "pcf-eligibility", "pcf-catalog", "pcf-search", "pcf-analytics"],
+    "P5": ["event-router", "notification-bus", "integration-stream", "risk-events", "payment-events", "customer-events", "order-events", "claims-events", "audit-events", "telemetry-events"],
+}
+
+
+def build_demo_seed() -> dict:
+    demo_repos = []
+    demo_apps = []
+    app_counter = 1
+    for order, (pid, meta) in enumerate(PATTERN_META.items()):
+        main_file = "src/main/app.py" if meta.language == "Python" else "src/main/App.java"
+        for idx, base in enumerate(SEED_REPOS[pid], start=1):
+            app_id = f"DEMO-APP-{app_counter:03d}"
+            repo_full = f"predefined/demo-org/{base}"
+            app_name = base.replace("-", " ").title().replace("Pcf", "PCF")
+
+            integration_targets = [
+                f"DEMO-APP-{((app_counter) % 50) + 1:03d}",
+                f"DEMO-APP-{((app_counter + 7) % 50) + 1:03d}",
+            ]
+            primary_coupling = "tight" if meta.tight and idx % 2 == 0 else "loose"
+            integration_points = [
+                {"target": integration_targets[0], "coupling": primary_coupling},
+                {"target": integration_targets[1], "coupling": "loose" if primary_coupling == "tight" else "tight"},
+            ]
+            files = [
+                main_file,
+                "Jenkinsfile",
+                ".github/workflows/deploy.yml",
+                "terraform/main.tf",
+                meta.infra_file,
+            ]
+            findings = [
+                {
+                    "type": "metadata",
+                    "tags": ["predefined", "demo", "assessment-catalog"],
+                    "portfolio": "enterprise-migration",
+                    "coupling_profile": {
+                        "app": primary_coupling,
+                        "database": meta.db_coupling,
+                    },
+                },
+                {
+                    "type": "app_to_app_integration",
+                    "protocols": meta.protocols,
+                    "targets": integration_targets,
+                    "integration_points": integration_points,
+                    "coupling": primary_coupling,
+                },
+                {
+                    "type": "app_to_db_integration",
+                    "datastores": meta.db_types or ["none"],
+                    "mode": "read-write" if meta.has_db else "n/a",
+                    "coupling": meta.db_coupling,
+                },
+                {
+                    "type": "scan_details",
+                    "code_artifacts": {
+                        "languages": [meta.language],
+                        "pipelines": ["Jenkinsfile", ".github/workflows/deploy.yml"],
+                        "iac": ["terraform/main.tf"],
+                        "key_files": files,
+                    },
+                },
+            ]
+
+            demo_repos.append(repo_full)
+            demo_apps.append(
+                {
+                    "id": app_id,
+                    "scan_run_id": DEMO_RUN_ID,
+                    "name": app_name,
+                    "repo_full_name": repo_full,
+                    "language": meta.language,
+                    "framework": meta.framework,
+                    "loc": 12000 + (idx * 1400) + (order * 900),
+                    "complexity": "high" if meta.tight and idx % 3 == 0 else "medium",
+                    "risk_score": float(38 + (idx * 3) + (order * 4)),
+                    "pattern_id": pid,
+                    "pattern_name": meta.name,
+                    "gcp_target": meta.gcp,
+                    "has_dockerfile": meta.has_dockerfile,
+                    "has_terraform": 1,
+                    "has_jenkinsfile": 1,
+                    "has_github_actions": 1,
+                    "has_pcf": meta.has_pcf,
+                    "has_db": meta.has_db,
+                    "has_messaging": meta.has_messaging,
+                    "db_types_json": meta.db_types,
+                    "dependencies_json": meta.dependencies,
+                    "files_json": files,
+                    "findings_json": findings,
+                }
+            )
+            app_counter += 1
+
+    summary = {
+        "repo_count": len(demo_repos),
+        "app_count": len(demo_apps),
+        "total_loc": sum(a["loc"] for a in demo_apps),
+        "stage": "Demo scan seeded",
+        "progress": 100,
+        "seeded": True,
+    }
+
+    return {
+        "scan_runs": [
+            {
+                "id": DEMO_RUN_ID,
+                "status": "complete",
+                "repos_json": demo_repos,
+                "summary_json": summary,
+            }
+        ],
+        "applications": demo_apps,
+    }
+
+
+if __name__ == "__main__":
+    OUT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    OUT_PATH.write_text(json.dumps(build_demo_seed(), indent=1) + "\n", encoding="utf-8")
+    print(f"wrote {OUT_PATH}")
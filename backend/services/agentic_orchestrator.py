@@ -1,6 +1,13 @@
-import json
+import asyncio
+import functools
+import hashlib
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
 from typing import Any
 
+import orjson
+
 from services.llm_client import ollama_chat, ollama_chat_json, ollama_chat_model
 from services.mcp_runtime import MCP_TOOLS, invoke_mcp_tool
 
@@ -33,6 +40,79 @@ _AGENT_SYSTEM_PROMPTS: dict[str, str] = {
     ),
 }
 
+# Built once; chat messages are only ever serialized, never mutated.
+_SYSTEM_MESSAGES: dict[str, dict[str, str]] = {
+    name: {"role": "system", "content": prompt} for name, prompt in _AGENT_SYSTEM_PROMPTS.items()
+}
+
+
+# Request-scoped MCP results, keyed by (tool, args). None outside a scope.
+_mcp_cache: ContextVar[dict | None] = ContextVar("_mcp_cache", default=None)
+
+
+def mcp_request_cache(fn):
+    """
+    Decorate an async handler/orchestration so identical MCP tool calls made
+    by any agent inside it run once. Nested scopes share the outermost cache.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        if _mcp_cache.get() is not None:
+            return await fn(*args, **kwargs)
+        token = _mcp_cache.set({})
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            _mcp_cache.reset(token)
+
+    return wrapper
+
+
+def _cached_tool_call(tool: str, args: dict[str, Any]):
+    cache = _mcp_cache.get()
+    if cache is None:
+        return invoke_mcp_tool(tool, args)
+    key = (tool, orjson.dumps(args, option=orjson.OPT_SORT_KEYS))
+    if key not in cache:
+        # Cache the task, so concurrent callers share one in-flight call too.
+        cache[key] = asyncio.ensure_future(invoke_mcp_tool(tool, args))
+    # Shielded: a cancelled caller must not cancel the call for the others.
+    return asyncio.shield(cache[key])
+
+
+async def _gather_or_cancel(*coros):
+    """
+    asyncio.gather, except the first failure cancels the remaining tasks
+    (and waits for them) before it propagates, so nothing outlives the request.
+    """
+    tasks = [asyncio.ensure_future(c) for c in coros]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _run_mcp_calls(mcp_calls: list[dict[str, Any]] | None) -> list[dict[str, Any]]:
+    """Invoke the requested MCP tools concurrently; results keep the request order."""
+    calls = []
+    for call in (mcp_calls or []):
+        tool = str(call.get("tool") or "").strip()
+        if tool:
+            calls.append((tool, call.get("args") or {}))
+
+    async def invoke(tool: str, args: dict[str, Any]) -> dict[str, Any]:
+        if tool not in MCP_TOOLS:
+            return {"tool": tool, "error": "unsupported_tool"}
+        try:
+            return {"tool": tool, "result": await _cached_tool_call(tool, args)}
+        except Exception as e:
+            return {"tool": tool, "error": str(e)}
+
+    return list(await asyncio.gather(*(invoke(tool, args) for tool, args in calls)))
+
 
 async def run_specialist_agent(
     *,
@@ -46,19 +126,7 @@ async def run_specialist_agent(
     if chosen not in _AGENT_SYSTEM_PROMPTS:
         chosen = "assessment"
 
-    mcp_results: list[dict[str, Any]] = []
-    for call in (mcp_calls or []):
-        tool = str(call.get("tool") or "").strip()
-        if not tool:
-            continue
-        if tool not in MCP_TOOLS:
-            mcp_results.append({"tool": tool, "error": "unsupported_tool"})
-            continue
-        try:
-            result = await invoke_mcp_tool(tool, call.get("args") or {})
-            mcp_results.append({"tool": tool, "result": result})
-        except Exception as e:
-            mcp_results.append({"tool": tool, "error": str(e)})
+    mcp_results = await _run_mcp_calls(mcp_calls)
 
     prompt = {
         "objective": objective,
@@ -72,19 +140,19 @@ async def run_specialist_agent(
     }
 
     messages = [
-        {"role": "system", "content": _AGENT_SYSTEM_PROMPTS[chosen]},
+        _SYSTEM_MESSAGES[chosen],
         {
             "role": "user",
             "content": (
                 "Generate a professional agent response. "
                 "Do not invent unavailable data. "
                 "Use MCP evidence provided.\n\n"
-                + json.dumps(prompt)
+                + orjson.dumps(prompt).decode()
             ),
         },
     ]
 
-    text = ollama_chat(messages)
+    text = await ollama_chat(messages)
     return {
         "agent": chosen,
         "model": ollama_chat_model(),
@@ -105,19 +173,7 @@ async def run_specialist_agent_json(
     if chosen not in _AGENT_SYSTEM_PROMPTS:
         chosen = "assessment"
 
-    mcp_results: list[dict[str, Any]] = []
-    for call in (mcp_calls or []):
-        tool = str(call.get("tool") or "").strip()
-        if not tool:
-            continue
-        if tool not in MCP_TOOLS:
-            mcp_results.append({"tool": tool, "error": "unsupported_tool"})
-            continue
-        try:
-            result = await invoke_mcp_tool(tool, call.get("args") or {})
-            mcp_results.append({"tool": tool, "result": result})
-        except Exception as e:
-            mcp_results.append({"tool": tool, "error": str(e)})
+    mcp_results = await _run_mcp_calls(mcp_calls)
 
     payload = {
         "objective": objective,
@@ -127,39 +183,59 @@ async def run_specialist_agent_json(
     }
 
     messages = [
-        {"role": "system", "content": _AGENT_SYSTEM_PROMPTS[chosen]},
+        _SYSTEM_MESSAGES[chosen],
         {
             "role": "user",
             "content": (
                 "Return only valid JSON object for the requested schema. "
-                "No markdown, no explanations.\n\n" + json.dumps(payload)
+                "No markdown, no explanations.\n\n" + orjson.dumps(payload).decode()
             ),
         },
     ]
 
-    parsed = ollama_chat_json(messages, num_predict=700)
+    parsed = await ollama_chat_json(messages, num_predict=700)
     return {"agent": chosen, "model": ollama_chat_model(), "data": parsed, "mcp": mcp_results}
 
 
+# Plans only fix the order outputs are reported in, and recur for the same
+# objective/task shape (chat, PMO reports), so successful ones are reused.
+PLAN_CACHE_TTL_SEC = 300
+PLAN_CACHE_SIZE = 512
+_plan_cache: OrderedDict[str, tuple[list[int], str, float]] = OrderedDict()
+
+
+def _plan_key(objective: str, tasks: list[dict[str, Any]]) -> str:
+    shape = {
+        "objective": objective,
+        "tasks": [{"agent": t.get("agent"), "objective": t.get("objective")} for t in tasks],
+    }
+    return hashlib.blake2b(orjson.dumps(shape, option=orjson.OPT_SORT_KEYS), digest_size=16).hexdigest()
+
+
+@mcp_request_cache
 async def orchestrate_workload(
     *,
     objective: str,
     tasks: list[dict[str, Any]],
     shared_context: dict[str, Any] | None = None,
+    max_words: int | None = None,
 ) -> dict[str, Any]:
+    """max_words caps the streamed summary; callers must trim it to that many words."""
     safe_tasks = tasks or []
+    # Encoded once and spliced into both the plan and the aggregate prompts.
+    shared_json = orjson.Fragment(orjson.dumps(shared_context or {}))
 
     plan_messages = [
-        {"role": "system", "content": _AGENT_SYSTEM_PROMPTS["orchestrator"]},
+        _SYSTEM_MESSAGES["orchestrator"],
         {
             "role": "user",
             "content": (
                 "Return JSON with keys execution_order (array of indexes), rationale (string). "
                 "Use all tasks exactly once.\n\n"
-                + json.dumps(
+                + orjson.dumps(
                     {
                         "objective": objective,
-                        "shared_context": shared_context or {},
+                        "shared_context": shared_json,
                         "tasks": [
                             {
                                 "index": i,
@@ -169,54 +245,78 @@ async def orchestrate_workload(
                             for i, t in enumerate(safe_tasks)
                         ],
                     }
-                )
+                ).decode()
             ),
         },
     ]
 
-    execution_order = list(range(len(safe_tasks)))
-    rationale = "default-sequential"
-    try:
-        plan = ollama_chat_json(plan_messages, num_predict=260)
-        order = plan.get("execution_order")
-        if isinstance(order, list):
-            order_int = [int(x) for x in order if isinstance(x, int) or str(x).isdigit()]
-            if sorted(order_int) == list(range(len(safe_tasks))):
-                execution_order = order_int
-        rationale = str(plan.get("rationale") or rationale)
-    except Exception:
-        pass
-
-    outputs: list[dict[str, Any]] = []
-    for idx in execution_order:
-        task = safe_tasks[idx]
-        result = await run_specialist_agent(
-            agent=str(task.get("agent") or "assessment"),
-            objective=str(task.get("objective") or objective),
-            context={**(shared_context or {}), **(task.get("context") or {})},
-            mcp_calls=task.get("mcp_calls") or [],
-            max_words=int(task.get("max_words") or 220),
-        )
-        outputs.append({"task_index": idx, **result})
+    async def plan_order() -> tuple[list[int], str]:
+        key = _plan_key(objective, safe_tasks)
+        hit = _plan_cache.get(key)
+        if hit and hit[2] > time.monotonic():
+            _plan_cache.move_to_end(key)
+            return list(hit[0]), hit[1]
+
+        default_order = list(range(len(safe_tasks)))
+        default_rationale = "default-sequential"
+        accepted = False
+        try:
+            plan = await ollama_chat_json(plan_messages, num_predict=260)
+            order = plan.get("execution_order")
+            if isinstance(order, list):
+                execution_order = [int(x) for x in order if isinstance(x, int) or str(x).isdigit()]
+                accepted = sorted(execution_order) == default_order
+            if accepted:
+                rationale = str(plan.get("rationale") or default_rationale)
+        except Exception:
+            # A bad plan only costs the ordering; never fail the whole request.
+            accepted = False
+        if not accepted:
+            # Not cached, so the next request for this objective can plan again.
+            return default_order, default_rationale
+
+        _plan_cache[key] = (execution_order, rationale, time.monotonic() + PLAN_CACHE_TTL_SEC)
+        _plan_cache.move_to_end(key)
+        while len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+        return list(execution_order), rationale
+
+    # Specialist tasks are independent, so they run concurrently alongside the
+    # planning call; the plan only decides the order outputs are reported in.
+    # One failing specialist cancels the rest rather than leaving them running.
+    (execution_order, rationale), *results = await _gather_or_cancel(
+        plan_order(),
+        *(
+            run_specialist_agent(
+                agent=str(task.get("agent") or "assessment"),
+                objective=str(task.get("objective") or objective),
+                context={**(shared_context or {}), **(task.get("context") or {})},
+                mcp_calls=task.get("mcp_calls") or [],
+                max_words=int(task.get("max_words") or 220),
+            )
+            for task in safe_tasks
+        ),
+    )
+    outputs: list[dict[str, Any]] = [{"task_index": idx, **results[idx]} for idx in execution_order]
 
     aggregate_messages = [
-        {"role": "system", "content": _AGENT_SYSTEM_PROMPTS["orchestrator"]},
+        _SYSTEM_MESSAGES["orchestrator"],
         {
             "role": "user",
             "content": (
                 "Aggregate specialist outputs into one concise response with no more than 260 words. "
                 "Highlight decisions and next steps.\n\n"
-                + json.dumps(
+                + orjson.dumps(
                     {
                         "objective": objective,
-                        "shared_context": shared_context or {},
+                        "shared_context": shared_json,
                         "outputs": outputs,
                     }
-                )
+                ).decode()
             ),
         },
     ]
-    summary = ollama_chat(aggregate_messages, num_predict=420)
+    summary = await ollama_chat(aggregate_messages, num_predict=420, max_words=max_words)
 
     return {
         "objective": objective,
@@ -15,6 +15,11 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Optional
 
+try:
+    import ahocorasick
+except ImportError:  # optional; every signal then runs as its compiled regex
+    ahocorasick = None
+
 
 # ── Pattern definitions ──────────────────────────────────────
 @dataclass
@@ -97,6 +102,134 @@ SIGNALS: List[tuple] = [
     (r"@serviceactivator|@messaginggateway","P5",0.4),
 ]
 
+# An alternative made only of plain characters (and escaped dots) is a literal.
+_LITERAL_ALT = re.compile(r"(?:[^\\.^$*+?{}\[\]()|]|\\\.)+")
+
+# Non-ASCII letters that re.IGNORECASE matches against ASCII ones but that
+# str.lower() leaves alone (or expands); folded before case-insensitive
+# automaton passes so they stay equivalent to the regex.
+_IGNORECASE_FOLDS = str.maketrans({"\u0130": "i", "\u0131": "i", "\u017f": "s"})
+
+
+class _RuleSet:
+    """
+    Presence test for many regex rules in one pass over the text.
+
+    A rule hits when any of its top-level alternatives does, so plain-literal
+    alternatives ("terraform", "main\\.tf") all go into one Aho-Corasick
+    automaton per case mode, and a rule's remaining alternatives run as
+    separate residual regexes only when no literal already hit (separately,
+    since sre only skips ahead on a literal prefix for a single branch, and
+    "app.?server|web.?server" scanned ~15x slower than its halves). Kept exact
+    rather than one union regex: rules overlap ("sql" inside "postgresql"),
+    and a union's non-overlapping finditer would drop hits. Without
+    pyahocorasick every rule is its compiled regex.
+    """
+
+    def __init__(self, rules: List[tuple[str, bool]]):
+        self.residual: List[tuple[re.Pattern, ...]] = []
+        self.suffixes: List[tuple[str, ...]] = []
+        self.ignorecase = [ignorecase for _, ignorecase in rules]
+        owners: dict[bool, dict[str, list[int]]] = {False: {}, True: {}}
+        for idx, (regex, ignorecase) in enumerate(rules):
+            # Case-insensitive rules run over pre-folded text, so they only need
+            # the flag when the regex itself spells something upper case.
+            flags = re.IGNORECASE if ignorecase and not regex.islower() else 0
+            if ahocorasick is None:
+                self.suffixes.append(())
+                self.residual.append((re.compile(regex, flags),))
+                continue
+            rest, ends = [], []
+            for alt in regex.split("|"):
+                if _LITERAL_ALT.fullmatch(alt):
+                    word = alt.replace("\\.", ".")
+                    owners[ignorecase].setdefault(word.lower() if ignorecase else word, []).append(idx)
+                elif alt.endswith("$") and _LITERAL_ALT.fullmatch(alt[:-1]):
+                    # "\.tf$": an unanchored search still walks every "." in
+                    # the text, but "$" only matches at the end or before a
+                    # final newline, so two endswith checks are the same test.
+                    word = alt[:-1].replace("\\.", ".")
+                    word = word.lower() if ignorecase else word
+                    ends += (word, word + "\n")
+                else:
+                    rest.append(alt)
+            self.suffixes.append(tuple(ends))
+            self.residual.append(tuple(re.compile(alt, flags) for alt in rest))
+        self.automata: dict[bool, object] = {}
+        for ignorecase, words in owners.items():
+            if words:
+                automaton = ahocorasick.Automaton()
+                for word, idxs in words.items():
+                    automaton.add_word(word, tuple(idxs))
+                automaton.make_automaton()
+                self.automata[ignorecase] = automaton
+
+    def matches(self, folded: str, text: Optional[str] = None) -> set[int]:
+        """
+        Indexes of the rules that match somewhere in the text. folded is the
+        _casefold() of it, scanned by case-insensitive rules; text is the
+        original, needed only when the set has case-sensitive rules.
+        """
+        hits = self.literal_hits(folded, text)
+        for idx in range(len(self.residual)):
+            if idx not in hits and self.residual_hit(idx, folded, text):
+                hits.add(idx)
+        return hits
+
+    def literal_hits(self, folded: str, text: Optional[str] = None) -> set[int]:
+        """Indexes of the rules hit by a literal alternative; the automaton pass alone."""
+        scans = {True: folded, False: folded if text is None else text}
+        hits: set[int] = set()
+        for ignorecase, automaton in self.automata.items():
+            for _, idxs in automaton.iter(scans[ignorecase]):
+                hits.update(idxs)
+        return hits
+
+    def residual_hit(self, idx: int, folded: str, text: Optional[str] = None) -> bool:
+        """Whether rule idx's non-literal alternatives match: suffix checks, then its regex."""
+        scan = folded if self.ignorecase[idx] or text is None else text
+        if self.suffixes[idx] and scan.endswith(self.suffixes[idx]):
+            return True
+        return any(residual.search(scan) for residual in self.residual[idx])
+
+
+def _casefold(text: str) -> str:
+    """Lowercase text the way re.IGNORECASE compares it, keeping its length."""
+    return (text if text.isascii() else text.translate(_IGNORECASE_FOLDS)).lower()
+
+
+_SIGNAL_RULES = _RuleSet([(regex, True) for regex, _, _ in SIGNALS])
+
+
+def _index_signals() -> tuple[dict[str, list[tuple[int, float]]], dict[str, list[int]]]:
+    """
+    Per pattern: its (signal index, weight) pairs in SIGNALS order, which is
+    how its score accumulates, and its regex-scanned signals heaviest first,
+    the order most likely to saturate the score and skip the rest.
+    """
+    by_pattern: dict[str, list[tuple[int, float]]] = {}
+    for idx, (_, pattern_id, weight) in enumerate(SIGNALS):
+        by_pattern.setdefault(pattern_id, []).append((idx, weight))
+    residuals = {
+        pattern_id: [
+            idx for idx, _ in sorted(signals, key=lambda s: -s[1])
+            if _SIGNAL_RULES.residual[idx] or _SIGNAL_RULES.suffixes[idx]
+        ]
+        for pattern_id, signals in by_pattern.items()
+    }
+    return by_pattern, residuals
+
+
+_PATTERN_SIGNALS, _PATTERN_RESIDUALS = _index_signals()
+
+
+def _pattern_score(pattern_id: str, hits: set[int]) -> float:
+    score = 0.0
+    for idx, weight in _PATTERN_SIGNALS[pattern_id]:
+        if idx in hits:
+            score = min(1.0, score + weight)
+    return score
+
 
 @dataclass
 class ClassifyResult:
@@ -122,10 +255,34 @@ def classify_repo(
     """
     scores  = {pid: 0.0 for pid in PATTERNS}
     signals_hit = []
-    combined = " ".join(files).lower() + "\n" + content_sample.lower()
+    # Lowercased once for the signal pass and, where possible, the content
+    # probes: the "\n" separator keeps content_sample's lowering independent
+    # of the paths, so its tail is the probes' folded text unless lower()
+    # expanded a character (only "\u0130", which re.IGNORECASE reads as "i").
+    paths = " ".join(files)
+    combined = (paths + "\n" + content_sample).lower()
+    if not combined.isascii():
+        combined = combined.translate(_IGNORECASE_FOLDS)
+    if len(combined) == len(paths) + 1 + len(content_sample):
+        content_folded = combined[len(paths) + 1:]
+    else:
+        content_folded = _casefold(content_sample)
 
-    for regex, pattern_id, weight in SIGNALS:
-        if re.search(regex, combined, re.IGNORECASE):
+    # Literal hits are free; a regex signal is only scanned for while its
+    # pattern can still gain score. Once a pattern is at the 1.0 cap more hits
+    # only lengthen signals_hit, and the scores come out the same either way.
+    hits = _SIGNAL_RULES.literal_hits(combined)
+    for pattern_id, residuals in _PATTERN_RESIDUALS.items():
+        for idx in residuals:
+            if idx in hits:
+                continue
+            if _pattern_score(pattern_id, hits) >= 1.0:
+                break
+            if _SIGNAL_RULES.residual_hit(idx, combined):
+                hits.add(idx)
+    # SIGNALS order is kept so signals_hit reads the same as sequential searches.
+    for idx, (regex, pattern_id, weight) in enumerate(SIGNALS):
+        if idx in hits:
             scores[pattern_id] = min(1.0, scores[pattern_id] + weight)
             signals_hit.append(f"{pattern_id}:{regex}")
 
@@ -142,14 +299,16 @@ def classify_repo(
     confidence = min(0.99, best_score)
 
     # ── Risk scoring ─────────────────────────────────────────
-    risk = _calc_risk(files, content_sample, best_pid)
+    probes = _content_probes(content_sample, content_folded)
+    names = _join_paths(files)
+    risk = _calc_risk(names, probes, best_pid)
 
     # ── Complexity ───────────────────────────────────────────
     loc_estimate = len(content_sample.split("\n"))
     complexity = "low" if loc_estimate < 500 else "high" if loc_estimate > 5000 else "medium"
 
     # ── Findings ─────────────────────────────────────────────
-    findings = _generate_findings(files, content_sample, best_pid, scores)
+    findings = _generate_findings(names, probes, best_pid, scores)
 
     return ClassifyResult(
         pattern_id   = best_pid,
@@ -164,28 +323,60 @@ def classify_repo(
     )
 
 
-def _calc_risk(files: List[str], content: str, pattern_id: str) -> float:
+# Risk and findings probes over the raw content sample: (regex, ignorecase).
+_CONTENT_PROBES = {
+    "secrets":     (r"secret|password|credential|api.?key", True),
+    "legacy":      (r"legacy|deprecated|eof|end.?of.?life", True),
+    "todo":        (r"TODO|FIXME|HACK|XXX", False),
+    "localhost":   (r"localhost|127\.0\.0\.1", False),
+    "azure_host":  (r"azure\.com|azurewebsites|azurecontainer", False),
+    "azure_conn":  (r"connectionstring.*azure|azure.*connectionstring", True),
+    "servicenow":  (r"servicenow|snow\.com", True),
+    "jenkins":     (r"jenkins|jenkinsfile", True),
+    "mssql":       (r"mssql|sqlserver|azure.*sql", True),
+}
+_PROBE_NAMES = list(_CONTENT_PROBES)
+_CONTENT_RULES = _RuleSet(list(_CONTENT_PROBES.values()))
+
+
+def _content_probes(content: str, folded: Optional[str] = None) -> set[str]:
+    """Names of the _CONTENT_PROBES found in content, from one matcher pass."""
+    if folded is None:
+        folded = _casefold(content)
+    return {_PROBE_NAMES[i] for i in _CONTENT_RULES.matches(folded, content)}
+
+
+def _join_paths(files: List[str]) -> str:
+    """
+    File paths joined for substring tests. Git paths cannot hold NUL, so a
+    match can't straddle two paths and "x\\0" marks a path ending in x; one
+    C-level search instead of a Python loop over every path per check.
+    """
+    return "\0".join(files) + "\0"
+
+
+def _calc_risk(names: str, probes: set[str], pattern_id: str) -> float:
     """Heuristic risk score 1-10."""
     risk = 4.0
     if pattern_id == "P3":  risk += 2.0   # DB migrations are risky
     if pattern_id == "P4":  risk += 1.5   # PCF→GKE needs manifest work
     if pattern_id == "P5":  risk += 1.5   # Messaging flows are complex
-    if re.search(r"secret|password|credential|api.?key", content, re.I): risk += 0.5
-    if re.search(r"legacy|deprecated|eof|end.?of.?life", content, re.I):  risk += 0.5
-    if any(f.endswith(".sql") for f in files): risk += 0.5
+    if "secrets" in probes: risk += 0.5
+    if "legacy" in probes:  risk += 0.5
+    if ".sql\0" in names: risk += 0.5
     return min(10.0, risk)
 
 
-def _generate_findings(files, content, pattern_id, scores) -> List[str]:
+def _generate_findings(names, probes, pattern_id, scores) -> List[str]:
     findings = []
-    if re.search(r"TODO|FIXME|HACK|XXX", content): findings.append("Code contains TODO/FIXME markers")
-    if re.search(r"localhost|127\.0\.0\.1", content): findings.append("Hardcoded localhost references detected — update for GCP")
-    if re.search(r"azure\.com|azurewebsites|azurecontainer", content): findings.append("Azure-specific hostnames detected — must be replaced with GCP endpoints")
-    if re.search(r"connectionstring.*azure|azure.*connectionstring", content, re.I): findings.append("Azure connection strings present — update to Cloud SQL / GCP credentials")
-    if re.search(r"servicenow|snow\.com", content, re.I): findings.append("ServiceNow references present — configure integration")
-    if re.search(r"jenkins|jenkinsfile", content, re.I): findings.append("Jenkins pipeline detected — will be updated for GCP deploy")
-    if not any(f.endswith(".tf") for f in files): findings.append("No Terraform files found — will be generated by migration engine")
-    if not any(".github" in f or "github/workflows" in f for f in files): findings.append("No GitHub Actions found — CI/CD pipeline will be generated")
-    if pattern_id == "P4" and not any("dockerfile" in f.lower() for f in files): findings.append("PCF app without Dockerfile — Dockerfile will be generated for GKE")
-    if pattern_id == "P3" and re.search(r"mssql|sqlserver|azure.*sql", content, re.I): findings.append("MSSQL/Azure SQL detected — DMS heterogeneous migration required")
+    if "todo" in probes: findings.append("Code contains TODO/FIXME markers")
+    if "localhost" in probes: findings.append("Hardcoded localhost references detected — update for GCP")
+    if "azure_host" in probes: findings.append("Azure-specific hostnames detected — must be replaced with GCP endpoints")
+    if "azure_conn" in probes: findings.append("Azure connection strings present — update to Cloud SQL / GCP credentials")
+    if "servicenow" in probes: findings.append("ServiceNow references present — configure integration")
+    if "jenkins" in probes: findings.append("Jenkins pipeline detected — will be updated for GCP deploy")
+    if ".tf\0" not in names: findings.append("No Terraform files found — will be generated by migration engine")
+    if ".github" not in names and "github/workflows" not in names: findings.append("No GitHub Actions found — CI/CD pipeline will be generated")
+    if pattern_id == "P4" and "dockerfile" not in names.lower(): findings.append("PCF app without Dockerfile — Dockerfile will be generated for GKE")
+    if pattern_id == "P3" and "mssql" in probes: findings.append("MSSQL/Azure SQL detected — DMS heterogeneous migration required")
     return findings[:10]
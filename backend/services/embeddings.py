@@ -1,37 +1,45 @@
-import json
 import math
+import operator
 import os
-from typing import Iterable, List
+from array import array
+from functools import lru_cache
+from typing import Iterable, List, Optional
+from urllib import error as urlerror
 from urllib import request as urlrequest
 
+import orjson
+
 EMBED_DIM = 384
 
 
-def embed_text(text: str, dim: int = EMBED_DIM) -> List[float]:
-    vec = [0.0] * dim
-    payload_text = (text or "").strip()
-    if not payload_text:
-        return vec
-
+def _ollama_embed_endpoint() -> tuple[str, str]:
     base = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434").rstrip("/")
     model = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
-    body = {
-        "model": model,
-        "prompt": payload_text[:12000],
-    }
+    return base, model
+
+
+def _post_json(url: str, body: dict) -> dict:
     req = urlrequest.Request(
-        f"{base}/api/embeddings",
-        data=json.dumps(body).encode("utf-8"),
+        url,
+        data=orjson.dumps(body),
         headers={"Content-Type": "application/json"},
         method="POST",
     )
-
     with urlrequest.urlopen(req, timeout=45) as resp:
-        data = json.loads(resp.read().decode("utf-8"))
+        return orjson.loads(resp.read())
+
+
+def _zeros(dim: int) -> array:
+    return array("f", bytes(4 * dim))
 
-    emb = data.get("embedding") or []
+
+def _fit(emb, dim: int) -> array:
+    """
+    Pad/truncate a raw model embedding to dim and L2-normalise it, as float32:
+    the precision it is stored at, in 4 bytes per value instead of a boxed float.
+    """
     if not isinstance(emb, list) or not emb:
-        return vec
+        return _zeros(dim)
 
     emb = [float(x) for x in emb]
     if len(emb) >= dim:
@@ -39,16 +47,113 @@ def embed_text(text: str, dim: int = EMBED_DIM) -> List[float]:
     else:
         emb.extend([0.0] * (dim - len(emb)))
 
-    norm = math.sqrt(sum(v * v for v in emb)) or 1.0
-    return [v / norm for v in emb]
+    # Same left-to-right sum as a v*v generator, with the multiplies in C.
+    norm = math.sqrt(sum(map(operator.mul, emb, emb))) or 1.0
+    return array("f", (v / norm for v in emb))
+
+
+def embed_text(text: str, dim: int = EMBED_DIM) -> array:
+    payload_text = (text or "").strip()
+    if not payload_text:
+        return _zeros(dim)
+
+    base, model = _ollama_embed_endpoint()
+    data = _post_json(f"{base}/api/embeddings", {"model": model, "prompt": payload_text[:12000]})
+    return _fit(data.get("embedding") or [], dim)
+
+
+@lru_cache(maxsize=4096)
+def _embed_query_cached(text: str, model: str, dim: int) -> bytes:
+    # Immutable float32 bytes: ~1.5 KB a query rather than a tuple of floats.
+    return embed_text(text, dim).tobytes()
 
 
-def cosine_similarity(a: Iterable[float], b: Iterable[float]) -> float:
-    av = list(a)
-    bv = list(b)
-    if not av or not bv or len(av) != len(bv):
+def embed_query(text: str, dim: int = EMBED_DIM) -> memoryview:
+    """
+    embed_text for search queries, memoized per (query, model) so repeated
+    searches skip the Ollama round-trip. Failures are not cached. Returned as
+    a read-only float32 view of the cached vector.
+    """
+    # Whitespace runs are collapsed so cosmetically different queries share an entry.
+    return memoryview(_embed_query_cached(" ".join((text or "").split()), _ollama_embed_endpoint()[1], dim)).cast("f")
+
+
+def embed_query_cache_stats() -> dict:
+    info = _embed_query_cached.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+
+def embed_text_batch(texts: List[str], dim: int = EMBED_DIM) -> List[array]:
+    """
+    Embed many texts with one /api/embed request (same vectors as embed_text).
+    Falls back to one request per text on Ollama builds without /api/embed.
+    """
+    out = [_zeros(dim) for _ in texts]
+    pending = [(i, (t or "").strip()[:12000]) for i, t in enumerate(texts) if (t or "").strip()]
+    if not pending:
+        return out
+
+    base, model = _ollama_embed_endpoint()
+    try:
+        data = _post_json(f"{base}/api/embed", {"model": model, "input": [t for _, t in pending]})
+    except urlerror.HTTPError as e:
+        if e.code != 404:
+            raise
+        for i, _ in pending:
+            out[i] = embed_text(texts[i], dim)
+        return out
+
+    embeddings = data.get("embeddings") or []
+    for (i, _), emb in zip(pending, embeddings):
+        out[i] = _fit(emb, dim)
+    return out
+
+
+def normalize(vec: Iterable[float]) -> List[float]:
+    """Scale vec to unit length (zero vectors are returned unchanged)."""
+    v = list(vec)
+    norm = math.hypot(*v) or 1.0
+    return [x / norm for x in v]
+
+
+def dot_similarity(unit_query: List[float], emb) -> float:
+    """
+    Cosine similarity against a stored embedding. Stored vectors are already
+    unit length (_fit), so with a normalized query this is just the dot product.
+    """
+    if not unit_query or len(unit_query) != len(emb):
         return 0.0
-    dot = sum(x * y for x, y in zip(av, bv))
-    na = math.sqrt(sum(x * x for x in av)) or 1.0
-    nb = math.sqrt(sum(y * y for y in bv)) or 1.0
-    return dot / (na * nb)
+    # map(mul) keeps the per-element work in C.
+    return sum(map(operator.mul, unit_query, emb))
+
+
+def pack_embedding(vec: Iterable[float], quantize: bool = False) -> tuple[bytes, Optional[float], Optional[float]]:
+    """
+    Encode a vector for BLOB storage as (blob, scale, zero_point).
+    float32 by default; with quantize=True, int8 with a per-vector affine scale.
+    """
+    values = array("f", vec)
+    if not quantize:
+        return values.tobytes(), None, None
+    lo = min(values, default=0.0)
+    hi = max(values, default=0.0)
+    scale = (hi - lo) / 255.0 or 1.0
+    q = array("b", (max(-128, min(127, round((v - lo) / scale) - 128)) for v in values))
+    return q.tobytes(), scale, lo
+
+
+def unpack_embedding(blob: Optional[bytes], scale: Optional[float] = None, zero_point: Optional[float] = None):
+    """Decode a stored embedding BLOB; float32 blobs are returned as a zero-copy view."""
+    if not blob:
+        return []
+    if scale is None:
+        return memoryview(blob).cast("f")
+    lo = zero_point or 0.0
+    return array("f", ((q + 128) * scale + lo for q in memoryview(blob).cast("b")))
+
+
+def embedding_f32(blob: Optional[bytes], scale: Optional[float] = None, zero_point: Optional[float] = None):
+    """Stored embedding as a float32 BLOB (int8 rows dequantized) for vec0, which only takes floats."""
+    if not blob or scale is None:
+        return blob
+    return unpack_embedding(blob, scale, zero_point).tobytes()
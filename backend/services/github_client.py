@@ -1,66 +1,160 @@
 import base64
-import json
 import urllib.parse
-import urllib.request
+from collections import OrderedDict
 from typing import List, Optional
 
-GITHUB_API = "https://api.github.com"
-
+import httpx
+import orjson
 
-def _request(path: str, token: Optional[str] = None) -> dict | list:
-    url = f"{GITHUB_API}{path}"
-    req = urllib.request.Request(url)
-    req.add_header("Accept", "application/vnd.github+json")
-    req.add_header("User-Agent", "jarvis-backend")
-    if token:
-                req.add_header("Authorization", f"Bearer {token}")
-    with urllib.request.urlopen(req, timeout=20) as resp:
-        return json.loads(resp.read().decode("utf-8"))
+GITHUB_API = "https://api.github.com"
+# Upper bound on in-flight contents requests per scan (HTTP/2 multiplexes them).
+MAX_CONCURRENT_FETCHES = 10
+
+# Raw bodies kept for ETag revalidation, least recently used first, bounded
+# by total size so a few monorepo trees can't pin unbounded memory.
+ETAG_CACHE_BYTES = 64 * 1024 * 1024
+_etag_cache: OrderedDict[tuple[str, Optional[str]], tuple[str, bytes]] = OrderedDict()
+_etag_cache_bytes = 0
+
+# One HTTP/2 client for every GitHub call, so repo listings, trees and file
+# fetches reuse a warm connection. Closed in the app lifespan.
+_client: httpx.AsyncClient | None = None
+
+
+def _github_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=GITHUB_API,
+            http2=True,
+            timeout=20,
+            limits=httpx.Limits(max_connections=32),
+            headers={"Accept": "application/vnd.github+json", "User-Agent": "jarvis-backend"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _auth(token: Optional[str]) -> dict:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def _remember(key: tuple[str, Optional[str]], etag: str, body: bytes):
+    global _etag_cache_bytes
+    old = _etag_cache.pop(key, None)
+    if old is not None:
+        _etag_cache_bytes -= len(old[1])
+    if len(body) > ETAG_CACHE_BYTES:
+        return
+    _etag_cache[key] = (etag, body)
+    _etag_cache_bytes += len(body)
+    while _etag_cache_bytes > ETAG_CACHE_BYTES:
+        _, (_, evicted) = _etag_cache.popitem(last=False)
+        _etag_cache_bytes -= len(evicted)
+
+
+async def _request(path: str, token: Optional[str] = None) -> dict | list:
+    """
+    GET path as JSON. Bodies with an ETag are kept per (path, token) and
+    revalidated with If-None-Match, so a rescan's repo, tree and contents
+    fetches mostly come back as 304s, which GitHub doesn't count against the
+    rate limit.
+    """
+    key = (path, token)
+    cached = _etag_cache.get(key)
+    headers = _auth(token)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+    resp = await _github_client().get(path, headers=headers)
+    if cached and resp.status_code == 304:
+        _etag_cache.move_to_end(key)
+        # Parsed per call so callers never share a mutable result.
+        return orjson.loads(cached[1])
+    resp.raise_for_status()
+    etag = resp.headers.get("ETag")
+    if etag:
+        _remember(key, etag, resp.content)
+    return orjson.loads(resp.content)
+
+
+async def conditional_request(
+    path: str,
+    token: Optional[str] = None,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> tuple[Optional[bytes], Optional[str], Optional[str]]:
+    """
+    GET path with If-None-Match / If-Modified-Since validators.
+    Returns (body, etag, last_modified); body is None when GitHub answers 304.
+    """
+    headers = _auth(token)
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    resp = await _github_client().get(path, headers=headers)
+    if resp.status_code == 304:
+        return None, etag, last_modified
+    resp.raise_for_status()
+    return resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+
+
+def repos_path(user: str) -> str:
+    return f"/users/{urllib.parse.quote(user)}/repos?per_page=100&sort=updated"
+
+
+def repo_path(owner: str, repo: str) -> str:
+    return f"/repos/{urllib.parse.quote(owner)}/{urllib.parse.quote(repo)}"
+
+
+def tree_path(owner: str, repo: str, branch: str) -> str:
+    return f"{repo_path(owner, repo)}/git/trees/{urllib.parse.quote(branch)}?recursive=1"
+
+
+def contents_path(owner: str, repo: str, path: str) -> str:
+    return f"{repo_path(owner, repo)}/contents/{urllib.parse.quote(path)}"
+
+
+def decode_content(content_obj) -> str:
+    """Text of a contents/readme API object (base64 encoded); empty otherwise."""
+    if isinstance(content_obj, dict) and content_obj.get("encoding") == "base64":
+        raw = base64.b64decode(content_obj.get("content", ""))
+        return raw.decode("utf-8", errors="ignore")
+    return ""
 
 
-def get_user(token: str) -> dict:
-    return _request("/user", token)
+async def get_user(token: str) -> dict:
+    return await _request("/user", token)
 
 
-def list_repos(user: str, token: Optional[str] = None) -> List[dict]:
-    q_user = urllib.parse.quote(user)
-    data = _request(f"/users/{q_user}/repos?per_page=100&sort=updated", token)
+async def list_repos(user: str, token: Optional[str] = None) -> List[dict]:
+    data = await _request(repos_path(user), token)
     if isinstance(data, list):
         return data
     return []
 
 
-def get_repo(owner: str, repo: str, token: Optional[str] = None) -> dict:
-    return _request(f"/repos/{urllib.parse.quote(owner)}/{urllib.parse.quote(repo)}", token)
+async def get_repo(owner: str, repo: str, token: Optional[str] = None) -> dict:
+    return await _request(repo_path(owner, repo), token)
 
 
-def get_repo_tree(owner: str, repo: str, branch: str, token: Optional[str] = None) -> List[dict]:
-    q_owner = urllib.parse.quote(owner)
-    q_repo = urllib.parse.quote(repo)
-    q_branch = urllib.parse.quote(branch)
-    tree_data = _request(f"/repos/{q_owner}/{q_repo}/git/trees/{q_branch}?recursive=1", token)
+async def get_repo_tree(owner: str, repo: str, branch: str, token: Optional[str] = None) -> List[dict]:
+    tree_data = await _request(tree_path(owner, repo, branch), token)
     return tree_data.get("tree", []) if isinstance(tree_data, dict) else []
 
 
-def get_file_content(owner: str, repo: str, path: str, token: Optional[str] = None) -> str:
-    q_owner = urllib.parse.quote(owner)
-    q_repo = urllib.parse.quote(repo)
-    q_path = urllib.parse.quote(path)
-    content_obj = _request(f"/repos/{q_owner}/{q_repo}/contents/{q_path}", token)
-    if isinstance(content_obj, dict) and content_obj.get("encoding") == "base64":
-        raw = base64.b64decode(content_obj.get("content", ""))
-        return raw.decode("utf-8", errors="ignore")
-    return ""
+async def get_file_content(owner: str, repo: str, path: str, token: Optional[str] = None) -> str:
+    return decode_content(await _request(contents_path(owner, repo, path), token))
 
 
-def get_readme(owner: str, repo: str, token: Optional[str] = None) -> str:
-    q_owner = urllib.parse.quote(owner)
-    q_repo = urllib.parse.quote(repo)
-    readme = _request(f"/repos/{q_owner}/{q_repo}/readme", token)
-    if isinstance(readme, dict) and readme.get("encoding") == "base64":
-        raw = base64.b64decode(readme.get("content", ""))
-        return raw.decode("utf-8", errors="ignore")
-    return ""
+async def get_readme(owner: str, repo: str, token: Optional[str] = None) -> str:
+    return decode_content(await _request(f"{repo_path(owner, repo)}/readme", token))
 
 
 def parse_full_name(full_name: str) -> tuple[str, str]:
@@ -0,0 +1,95 @@
+"""
+Integration extraction from classifier / catalog findings.
+
+Scans resolve each app's integrations once at write time (see
+integration_profile); the graph, insights and bundle endpoints read the
+stored profile instead of re-parsing findings_json on every request.
+"""
+
+import orjson
+
+
+def parse_findings(findings_raw) -> list:
+    if findings_raw is None:
+        return []
+    if isinstance(findings_raw, list):
+        return findings_raw
+    if isinstance(findings_raw, dict):
+        return [findings_raw]
+    if isinstance(findings_raw, str):
+        try:
+            parsed = orjson.loads(findings_raw)
+            if isinstance(parsed, list):
+                return parsed
+            if isinstance(parsed, dict):
+                return [parsed]
+        except Exception:
+            return []
+    return []
+
+
+def extract_integrations(findings_raw) -> tuple[list[str], list[str]]:
+    findings = parse_findings(findings_raw)
+    app_targets: list[str] = []
+    db_targets: list[str] = []
+    for item in findings:
+        if not isinstance(item, dict):
+            continue
+        ftype = str(item.get("type", "")).lower()
+        if ftype == "app_to_app_integration":
+            targets = item.get("targets") or []
+            if isinstance(targets, list):
+                app_targets.extend([str(t) for t in targets if t])
+        if ftype == "app_to_db_integration":
+            stores = item.get("datastores") or []
+            if isinstance(stores, list):
+                db_targets.extend([str(d).lower() for d in stores if d and str(d).lower() != "none"])
+    return app_targets, db_targets
+
+
+def extract_integration_model(findings_raw) -> dict:
+    findings = parse_findings(findings_raw)
+    app_links = []
+    db_links = []
+    tags = []
+    for item in findings:
+        if not isinstance(item, dict):
+            continue
+        ftype = str(item.get("type", "")).lower()
+        if ftype == "metadata":
+            raw_tags = item.get("tags") or []
+            if isinstance(raw_tags, list):
+                tags.extend([str(t).lower() for t in raw_tags if t])
+        elif ftype == "app_to_app_integration":
+            points = item.get("integration_points")
+            if isinstance(points, list) and points:
+                for p in points:
+                    if isinstance(p, dict) and p.get("target"):
+                        app_links.append(
+                            {
+                                "target": str(p.get("target")),
+                                "coupling": str(p.get("coupling") or item.get("coupling") or "loose").lower(),
+                            }
+                        )
+            else:
+                for t in item.get("targets") or []:
+                    app_links.append(
+                        {
+                            "target": str(t),
+                            "coupling": str(item.get("coupling") or "loose").lower(),
+                        }
+                    )
+        elif ftype == "app_to_db_integration":
+            coupling = str(item.get("coupling") or "loose").lower()
+            for d in item.get("datastores") or []:
+                ds = str(d).lower()
+                if ds and ds != "none":
+                    db_links.append({"datastore": ds, "coupling": coupling})
+    return {"app_links": app_links, "db_links": db_links, "tags": sorted(set(tags))}
+
+
+def integration_profile(findings_raw) -> dict:
+    """Everything the read endpoints derive from an app's findings, for applications.integrations_json."""
+    app_targets, db_targets = extract_integrations(findings_raw)
+    model = extract_integration_model(findings_raw)
+    return {**model, "app_targets": app_targets, "db_targets": db_targets}
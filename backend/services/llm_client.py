@@ -1,7 +1,10 @@
 import json
 import os
-from urllib import error as urlerror
-from urllib import request as urlrequest
+import re
+import time
+
+import httpx
+import orjson
 
 
 def _env_int(name: str, default: int) -> int:
@@ -24,97 +27,192 @@ def ollama_embed_model() -> str:
     return (os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text") or "nomic-embed-text").strip()
 
 
-def ollama_list_models(base_url: str | None = None) -> list[str]:
+# One keep-alive client for every Ollama call, so orchestrated agents and the
+# model-candidate fallback reuse warm connections. Closed in the app lifespan.
+_client: httpx.AsyncClient | None = None
+
+
+def _ollama_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            headers={"Content-Type": "application/json"},
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# /api/tags only changes when models are pulled or removed; every chat and the
+# agents dashboard read it, so a short TTL saves a round-trip per call.
+MODELS_CACHE_TTL_SEC = 30
+_models_cache: dict[str, tuple[list[str], float]] = {}
+
+
+async def ollama_list_models(base_url: str | None = None) -> list[str]:
     base = (base_url or ollama_base_url()).rstrip("/")
-    req = urlrequest.Request(f"{base}/api/tags", method="GET")
-    with urlrequest.urlopen(req, timeout=20) as resp:
-        payload = json.loads(resp.read().decode("utf-8"))
+    cached = _models_cache.get(base)
+    if cached and cached[1] > time.monotonic():
+        return list(cached[0])
+    resp = await _ollama_client().get(f"{base}/api/tags", timeout=20)
+    resp.raise_for_status()
+    payload = orjson.loads(resp.content)
     out: list[str] = []
     for item in payload.get("models") or []:
         if isinstance(item, dict) and item.get("name"):
             out.append(str(item.get("name")))
-    return out
+    # Failures raise above and are never cached.
+    _models_cache[base] = (out, time.monotonic() + MODELS_CACHE_TTL_SEC)
+    return list(out)
 
 
-def _extract_json(text: str):
+_JSON_DECODER = json.JSONDecoder()
+_JSON_OBJECT_START = re.compile(r"\{")
+
+
+def _extract_json(text: str) -> dict | None:
+    """
+    First complete JSON object in text, skipping any prose around it. Arrays
+    and scalars are passed over: replies often mention "[80, 443]" or "[1]"
+    before the object the caller asked for.
+    """
     s = (text or "").strip()
     if not s:
         return None
     try:
-        return json.loads(s)
-    except Exception:
+        parsed = orjson.loads(s)
+        if isinstance(parsed, dict):
+            return parsed
+    except orjson.JSONDecodeError:
         pass
 
-    start = s.find("{")
-    end = s.rfind("}")
-    if start != -1 and end != -1 and end > start:
-        block = s[start:end + 1]
+    # orjson has no incremental decoder; raw_decode parses one value from each
+    # candidate opening brace and ignores whatever follows it.
+    for m in _JSON_OBJECT_START.finditer(s):
         try:
-            return json.loads(block)
-        except Exception:
-            return None
+            return _JSON_DECODER.raw_decode(s, m.start())[0]
+        except json.JSONDecodeError:
+            continue
     return None
 
 
-def ollama_chat(
+_FALLBACK_CHAT_MODELS = ("llama3.1:8b", "llama3.1", "llama3.2", "qwen2.5", "mistral")
+# Fallback that answered after the preferred model 404'd (not installed), per
+# (base URL, preferred model), with its expiry. Tried first while it lasts, so
+# a missing model costs one failed request per TTL rather than every call;
+# any other failure of the preferred model (timeout, 5xx during a reload)
+# never demotes it. The TTL lets a later `ollama pull` take over again.
+MISSING_MODEL_TTL_SEC = 300
+_missing_model_fallback: dict[tuple[str, str], tuple[str, float]] = {}
+
+
+async def _stream_chat(url: str, body: dict, timeout: int, max_words: int | None) -> tuple[httpx.Response, str]:
+    """
+    Accumulate a streamed /api/chat reply from its NDJSON chunks, hanging up
+    once it exceeds max_words words (when given).
+    """
+    parts: list[str] = []
+    words = 0
+    in_word = False
+    async with _ollama_client().stream("POST", url, content=orjson.dumps(body), timeout=timeout) as resp:
+        if resp.is_error:
+            await resp.aread()
+            return resp, ""
+        async for line in resp.aiter_lines():
+            if not line:
+                continue
+            piece = str((orjson.loads(line).get("message") or {}).get("content") or "")
+            if not piece:
+                continue
+            parts.append(piece)
+            # A piece that continues the previous piece's word is not a new word.
+            n = len(piece.split())
+            if n and in_word and not piece[0].isspace():
+                n -= 1
+            in_word = not piece[-1].isspace()
+            words += n
+            if max_words is not None and words > max_words:
+                break
+    return resp, "".join(parts)
+
+
+async def ollama_chat(
     messages: list[dict],
     *,
     preferred_model: str | None = None,
     num_predict: int | None = None,
     timeout_sec: int | None = None,
     temperature: float = 0.2,
+    max_words: int | None = None,
 ) -> str:
+    """
+    Replies are streamed and accumulated chunk by chunk. With max_words set
+    the request is abandoned once the text runs past that many words; callers
+    trim to max_words, so the visible result matches a full generation.
+    """
     base = ollama_base_url()
     preferred = (preferred_model or ollama_chat_model()).strip() or "llama3.1"
     timeout = timeout_sec if timeout_sec is not None else _env_int("OLLAMA_CHAT_TIMEOUT_SEC", 240)
     predict = num_predict if num_predict is not None else _env_int("OLLAMA_CHAT_NUM_PREDICT", 450)
 
+    key = (base, preferred)
     installed_models: list[str] = []
-    try:
-        installed_models = ollama_list_models(base)
-    except Exception:
-        installed_models = []
-
-    candidates: list[str] = []
-    for model_name in [preferred, "llama3.1:8b", "llama3.1", "llama3.2", "qwen2.5", "mistral"]:
-        if model_name and model_name not in candidates:
-            candidates.append(model_name)
-    for model_name in installed_models:
-        if model_name not in candidates:
-            candidates.append(model_name)
+    memo = _missing_model_fallback.get(key)
+    if memo and memo[1] <= time.monotonic():
+        _missing_model_fallback.pop(key, None)
+        memo = None
+    # Set only when the preferred model 404s during this call, so an answer
+    # from the memoized fallback doesn't keep extending its TTL.
+    preferred_missing = False
+
+    async def candidates():
+        seen: set[str] = set()
+        for name in (memo[0] if memo else None, preferred, *_FALLBACK_CHAT_MODELS):
+            if name and name not in seen:
+                seen.add(name)
+                yield name
+        # Installed models are only listed once every known name has failed.
+        try:
+            installed_models.extend(await ollama_list_models(base))
+        except Exception:
+            pass
+        for name in installed_models:
+            if name not in seen:
+                seen.add(name)
+                yield name
 
     last_error = None
-    for model in candidates:
+    async for model in candidates():
         body = {
             "model": model,
             "messages": messages,
-            "stream": False,
+            "stream": True,
             "options": {
                 "temperature": temperature,
                 "num_predict": predict,
             },
         }
-        req = urlrequest.Request(
-            f"{base}/api/chat",
-            data=json.dumps(body).encode("utf-8"),
-            headers={"Content-Type": "application/json"},
-            method="POST",
-        )
         try:
-            with urlrequest.urlopen(req, timeout=timeout) as resp:
-                payload = json.loads(resp.read().decode("utf-8"))
-            msg = payload.get("message") or {}
-            content = str(msg.get("content") or "").strip()
+            resp, text = await _stream_chat(f"{base}/api/chat", body, timeout, max_words)
+            if resp.is_error:
+                if model == preferred and resp.status_code == 404:
+                    preferred_missing = True
+                last_error = f"HTTP {resp.status_code} model={model} body={resp.text[:500]}"
+                continue
+            content = text.strip()
             if content:
+                if model == preferred:
+                    _missing_model_fallback.pop(key, None)
+                elif preferred_missing:
+                    _missing_model_fallback[key] = (model, time.monotonic() + MISSING_MODEL_TTL_SEC)
                 return content
             last_error = f"empty response model={model}"
-        except urlerror.HTTPError as e:
-            body_text = ""
-            try:
-                body_text = e.read().decode("utf-8")[:500]
-            except Exception:
-                body_text = ""
-            last_error = f"HTTP {e.code} model={model} body={body_text}"
         except Exception as e:
             last_error = f"model={model} error={e}"
 
@@ -122,14 +220,14 @@ def ollama_chat(
     raise RuntimeError(f"Ollama chat failed. last_error={last_error}; installed_models={available}")
 
 
-def ollama_chat_json(
+async def ollama_chat_json(
     messages: list[dict],
     *,
     preferred_model: str | None = None,
     num_predict: int | None = None,
     timeout_sec: int | None = None,
 ) -> dict:
-    text = ollama_chat(
+    text = await ollama_chat(
         messages,
         preferred_model=preferred_model,
         num_predict=num_predict,
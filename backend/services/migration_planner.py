@@ -1,5 +1,8 @@
-import json
-from typing import Dict, List
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict
+
+import orjson
 
 PATTERN_TO_ARCH = {
     "P1": {
@@ -59,11 +62,35 @@ PATTERN_TO_ARCH = {
     },
 }
 
+# Per-pattern (gate, deploy) steps for the Jenkinsfile and Actions templates,
+# keyed like their placeholders; unknown patterns take "_default".
+_JENKINS_STEPS = {
+    "P1": {"pattern_gate": "sh 'python scripts/validate_dmz_policies.py'", "deploy_step": "sh 'terraform apply -auto-approve'"},
+    "P2": {"pattern_gate": "sh 'python scripts/validate_l7_routes.py'", "deploy_step": "sh 'terraform apply -auto-approve'"},
+    "P3": {"pattern_gate": "sh 'python scripts/validate_dms_cutover.py'", "deploy_step": "sh 'terraform apply -auto-approve'"},
+    "P4": {"pattern_gate": "sh 'python scripts/validate_gke_rollout.py'", "deploy_step": "sh 'kubectl apply -f k8s/'"},
+    "P5": {"pattern_gate": "sh 'python scripts/validate_pubsub_contracts.py'", "deploy_step": "sh 'terraform apply -auto-approve'"},
+    "_default": {"pattern_gate": "sh 'echo Validating deployment gates'", "deploy_step": "sh 'terraform apply -auto-approve'"},
+}
 
-def generate_terraform(app_name: str, pattern_id: str) -> str:
-    safe = app_name.lower().replace("_", "-").replace(" ", "-")
-    if pattern_id == "P1":
-        return f'''resource "google_compute_global_address" "{safe}_lb_ip" {{
+_PIPELINE_STEPS = {
+    "P1": {"quality_gate": "python scripts/dmz_security_gate.py", "deploy_cmd": "terraform apply -auto-approve"},
+    "P2": {"quality_gate": "python scripts/l7_global_lb_gate.py", "deploy_cmd": "terraform apply -auto-approve"},
+    "P3": {"quality_gate": "python scripts/db_cutover_gate.py", "deploy_cmd": "terraform apply -auto-approve"},
+    "P4": {"quality_gate": "python scripts/gke_release_gate.py", "deploy_cmd": "kubectl apply -f k8s/"},
+    "P5": {"quality_gate": "python scripts/pubsub_reliability_gate.py", "deploy_cmd": "terraform apply -auto-approve"},
+    "_default": {"quality_gate": "echo gate", "deploy_cmd": "terraform apply -auto-approve"},
+}
+
+# The generators are pure functions of (app_name, pattern_id) returning str,
+# so repeat /run, /terraform and /pipeline calls are served from cache.
+_TEMPLATE_CACHE_SIZE = 1024
+
+
+# Terraform per pattern, formatted with the app slug as {safe}; literal braces
+# are doubled. Unknown patterns get the generic GCE MIG under "_default".
+_TF_TEMPLATES = {
+    "P1": '''resource "google_compute_global_address" "{safe}_lb_ip" {{
   name = "{safe}-lb-ip"
 }}
 
@@ -85,10 +112,8 @@ resource "google_compute_region_instance_group_manager" "{safe}_svc_mig" {{
   base_instance_name = "{safe}-svc"
   target_size        = 3
 }}
-'''
-
-    if pattern_id == "P2":
-        return f'''resource "google_compute_url_map" "{safe}_urlmap" {{
+''',
+    "P2": '''resource "google_compute_url_map" "{safe}_urlmap" {{
   name            = "{safe}-global-url-map"
   default_service = google_compute_backend_service.{safe}_backend.id
 }}
@@ -106,10 +131,8 @@ resource "google_compute_target_https_proxy" "{safe}_proxy" {{
   name    = "{safe}-https-proxy"
   url_map = google_compute_url_map.{safe}_urlmap.id
 }}
-'''
-
-    if pattern_id == "P3":
-        return f'''resource "google_sql_database_instance" "{safe}_sql" {{
+''',
+    "P3": '''resource "google_sql_database_instance" "{safe}_sql" {{
   name             = "{safe}-sql"
   database_version = "POSTGRES_15"
   region           = "us-central1"
@@ -126,10 +149,8 @@ resource "google_database_migration_service_migration_job" "{safe}_job" {{
   migration_job_id  = "{safe}-dms-job"
   type              = "CONTINUOUS"
 }}
-'''
-
-    if pattern_id == "P4":
-        return f'''resource "google_container_cluster" "{safe}" {{
+''',
+    "P4": '''resource "google_container_cluster" "{safe}" {{
   name     = "{safe}-gke"
   location = "us-central1"
   remove_default_node_pool = true
@@ -142,10 +163,8 @@ resource "google_container_node_pool" "{safe}_np" {{
   cluster    = google_container_cluster.{safe}.name
   node_count = 2
 }}
-'''
-
-    if pattern_id == "P5":
-        return f'''resource "google_pubsub_topic" "{safe}_topic" {{
+''',
+    "P5": '''resource "google_pubsub_topic" "{safe}_topic" {{
   name = "{safe}-events"
 }}
 
@@ -161,9 +180,8 @@ resource "google_pubsub_subscription" "{safe}_sub" {{
 resource "google_pubsub_topic" "{safe}_dlq" {{
   name = "{safe}-events-dlq"
 }}
-'''
-
-    return f'''resource "google_compute_instance_template" "{safe}_tmpl" {{
+''',
+    "_default": '''resource "google_compute_instance_template" "{safe}_tmpl" {{
   name_prefix  = "{safe}-tmpl-"
   machine_type = "e2-standard-2"
   tags         = ["{safe}"]
@@ -178,19 +196,24 @@ resource "google_compute_region_instance_group_manager" "{safe}_mig" {{
   }}
   target_size = 2
 }}
-'''
+''',
+}
 
 
-def generate_jenkinsfile(app_name: str, pattern_id: str) -> str:
-    deploy_step = "sh 'kubectl apply -f k8s/'" if pattern_id == "P4" else "sh 'terraform apply -auto-approve'"
-    pattern_gate = {
-        "P1": "sh 'python scripts/validate_dmz_policies.py'",
-        "P2": "sh 'python scripts/validate_l7_routes.py'",
-        "P3": "sh 'python scripts/validate_dms_cutover.py'",
-        "P4": "sh 'python scripts/validate_gke_rollout.py'",
-        "P5": "sh 'python scripts/validate_pubsub_contracts.py'",
-    }.get(pattern_id, "sh 'echo Validating deployment gates'")
-    return f'''pipeline {{
+_SLUG_DASHES = str.maketrans({"_": "-", " ": "-"})
+
+
+def _slug(app_name: str) -> str:
+    # lower() stays a separate pass: it also folds non-ASCII letters.
+    return app_name.lower().translate(_SLUG_DASHES)
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def generate_terraform(app_name: str, pattern_id: str) -> str:
+    return _TF_TEMPLATES.get(pattern_id, _TF_TEMPLATES["_default"]).format_map({"safe": _slug(app_name)})
+
+
+_JENKINS_TEMPLATE = '''pipeline {{
   agent any
   stages {{
     stage('Checkout') {{
@@ -216,16 +239,13 @@ def generate_jenkinsfile(app_name: str, pattern_id: str) -> str:
 '''
 
 
-def generate_pipeline_yaml(app_name: str, pattern_id: str) -> str:
-    deploy_cmd = "kubectl apply -f k8s/" if pattern_id == "P4" else "terraform apply -auto-approve"
-    quality_gate = {
-        "P1": "python scripts/dmz_security_gate.py",
-        "P2": "python scripts/l7_global_lb_gate.py",
-        "P3": "python scripts/db_cutover_gate.py",
-        "P4": "python scripts/gke_release_gate.py",
-        "P5": "python scripts/pubsub_reliability_gate.py",
-    }.get(pattern_id, "echo gate")
-    return f'''name: {app_name}-gcp-migration
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def generate_jenkinsfile(app_name: str, pattern_id: str) -> str:
+    steps = _JENKINS_STEPS.get(pattern_id, _JENKINS_STEPS["_default"])
+    return _JENKINS_TEMPLATE.format_map({"app_name": app_name, **steps})
+
+
+_PIPELINE_TEMPLATE = '''name: {app_name}-gcp-migration
 on:
   push:
     branches: [ main ]
@@ -249,52 +269,99 @@ jobs:
 '''
 
 
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def generate_pipeline_yaml(app_name: str, pattern_id: str) -> str:
+    steps = _PIPELINE_STEPS.get(pattern_id, _PIPELINE_STEPS["_default"])
+    return _PIPELINE_TEMPLATE.format_map({"app_name": app_name, **steps})
+
+
 def get_architecture(pattern_id: str) -> Dict:
     return PATTERN_TO_ARCH.get(pattern_id, PATTERN_TO_ARCH["P1"])
 
 
-def get_changed_files(pattern_id: str) -> List[dict]:
-    if pattern_id == "P1":
-        return [
-            {"file": "network/dmz.tf", "change": "Create DMZ subnet, firewall tiers, and private service perimeter"},
-            {"file": "Jenkinsfile", "change": "Add DMZ security gate and blue/green cutover stage"},
-            {"file": "terraform/web_mig.tf", "change": "Provision GCE MIG with Cloud Armor-protected ingress"},
-        ]
-    if pattern_id == "P2":
-        return [
-            {"file": "terraform/global_lb.tf", "change": "Create global L7 load balancer with URL maps and host rules"},
-            {"file": "pipeline/global-routing-test.yml", "change": "Validate route/host behavior across regions before cutover"},
-            {"file": "Jenkinsfile", "change": "Add weighted traffic shift stage and failback hooks"},
-        ]
-    if pattern_id == "P3":
-        return [
-            {"file": "terraform/cloudsql_dms.tf", "change": "Provision Cloud SQL HA and DMS continuous replication"},
-            {"file": "database/cutover-runbook.md", "change": "Document checkpoint, CDC lag threshold, and rollback plan"},
-            {"file": "Jenkinsfile", "change": "Add dry-run migration and data parity gate"},
-        ]
-    if pattern_id == "P4":
-        return [
-            {"file": "Jenkinsfile", "change": "Update deploy stage to deploy to GKE with kubectl"},
-            {"file": "terraform/gke.tf", "change": "Add GKE cluster and node pool resources"},
-            {"file": "k8s/deployment.yaml", "change": "Add Kubernetes deployment and service manifests"},
-        ]
-    if pattern_id == "P5":
-        return [
-            {"file": "terraform/pubsub.tf", "change": "Create Pub/Sub topics, subscriptions, and DLQ routing"},
-            {"file": "services/subscriber.py", "change": "Add idempotent subscriber with retry semantics"},
-            {"file": "Jenkinsfile", "change": "Add contract/replay validation stage for message flows"},
-        ]
-    return [
+# Each pattern's architecture serialized once; jobs store and return it as-is.
+_ARCH_JSON = {pid: orjson.dumps(arch) for pid, arch in PATTERN_TO_ARCH.items()}
+
+
+def get_architecture_json(pattern_id: str) -> bytes:
+    return _ARCH_JSON.get(pattern_id, _ARCH_JSON["P1"])
+
+
+@lru_cache(maxsize=_TEMPLATE_CACHE_SIZE)
+def generate_all(app_name: str, pattern_id: str) -> MappingProxyType:
+    """
+    Every fallback artifact for one (app_name, pattern_id) from a single cache
+    lookup: terraform, pipeline_yaml, jenkinsfile and architecture_json. The
+    mapping is shared and read-only; build_diff_payload stays separate since
+    callers edit their copy of it.
+    """
+    return MappingProxyType({
+        "terraform": generate_terraform(app_name, pattern_id),
+        "pipeline_yaml": generate_pipeline_yaml(app_name, pattern_id),
+        "jenkinsfile": generate_jenkinsfile(app_name, pattern_id),
+        "architecture_json": get_architecture_json(pattern_id),
+    })
+
+
+# Changed files per pattern; unknown patterns get the generic entries under
+# "_default". Built once and shared; callers only read them.
+_CHANGED_FILES: dict[str, tuple[dict, ...]] = {
+    "P1": (
+        {"file": "network/dmz.tf", "change": "Create DMZ subnet, firewall tiers, and private service perimeter"},
+        {"file": "Jenkinsfile", "change": "Add DMZ security gate and blue/green cutover stage"},
+        {"file": "terraform/web_mig.tf", "change": "Provision GCE MIG with Cloud Armor-protected ingress"},
+    ),
+    "P2": (
+        {"file": "terraform/global_lb.tf", "change": "Create global L7 load balancer with URL maps and host rules"},
+        {"file": "pipeline/global-routing-test.yml", "change": "Validate route/host behavior across regions before cutover"},
+        {"file": "Jenkinsfile", "change": "Add weighted traffic shift stage and failback hooks"},
+    ),
+    "P3": (
+        {"file": "terraform/cloudsql_dms.tf", "change": "Provision Cloud SQL HA and DMS continuous replication"},
+        {"file": "database/cutover-runbook.md", "change": "Document checkpoint, CDC lag threshold, and rollback plan"},
+        {"file": "Jenkinsfile", "change": "Add dry-run migration and data parity gate"},
+    ),
+    "P4": (
+        {"file": "Jenkinsfile", "change": "Update deploy stage to deploy to GKE with kubectl"},
+        {"file": "terraform/gke.tf", "change": "Add GKE cluster and node pool resources"},
+        {"file": "k8s/deployment.yaml", "change": "Add Kubernetes deployment and service manifests"},
+    ),
+    "P5": (
+        {"file": "terraform/pubsub.tf", "change": "Create Pub/Sub topics, subscriptions, and DLQ routing"},
+        {"file": "services/subscriber.py", "change": "Add idempotent subscriber with retry semantics"},
+        {"file": "Jenkinsfile", "change": "Add contract/replay validation stage for message flows"},
+    ),
+    "_default": (
         {"file": "Jenkinsfile", "change": "Update deploy stage to execute Terraform for GCP"},
         {"file": "terraform/main.tf", "change": "Replace Azure resources with GCP compute/network resources"},
         {"file": "terraform/variables.tf", "change": "Add GCP project/region/network variables"},
-    ]
+    ),
+}
 
 
-def build_diff_payload(pattern_id: str) -> dict:
+def get_changed_files(pattern_id: str) -> tuple[dict, ...]:
+    return _CHANGED_FILES.get(pattern_id, _CHANGED_FILES["_default"])
+
+
+_OLD_TARGET_LINE = {"type": "-", "content": "old deployment target: azure"}
+
+
+def _diff_payload(pattern_id: str) -> dict:
     files = get_changed_files(pattern_id)
-    lines = [{"type": "@", "content": f"# {f['file']}"} for f in files]
-    for f in files:
-        lines.append({"type": "-", "content": "old deployment target: azure"})
-        lines.append({"type": "+", "content": f"new deployment target: gcp ({f['change']})"})
+    # All file headers first, then a -/+ pair per file; the payloads are shared
+    # and only ever serialized, so the "-" lines can share one dict.
+    lines = [{"type": "@", "content": f"# {f['file']}"} for f in files] + [
+        line
+        for f in files
+        for line in (_OLD_TARGET_LINE, {"type": "+", "content": f"new deployment target: gcp ({f['change']})"})
+    ]
     return {"changed_files": files, "lines": lines}
+
+
+# A payload depends on the pattern alone, so all of them are built at import.
+_DIFF_PAYLOADS = {pid: _diff_payload(pid) for pid in _CHANGED_FILES}
+
+
+def build_diff_payload(pattern_id: str) -> dict:
+    # Fresh top-level dict: callers replace changed_files on their copy.
+    return dict(_DIFF_PAYLOADS.get(pattern_id, _DIFF_PAYLOADS["_default"]))
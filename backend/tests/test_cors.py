@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+
+os.environ.setdefault("JARVIS_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+class CorsPreflightTest(unittest.TestCase):
+    """Preflights with the header sets Engine/shared/jarvis.js actually sends."""
+
+    def setUp(self):
+        # No context manager: the lifespan (DB pool, seed) isn't needed for CORS.
+        self.client = TestClient(main.app)
+
+    def preflight(self, method: str, headers: str):
+        return self.client.options(
+            "/api/system/agents",
+            headers={
+                "Origin": "http://localhost:8080",
+                "Access-Control-Request-Method": method,
+                "Access-Control-Request-Headers": headers,
+            },
+        )
+
+    def test_json_request_headers_allowed(self):
+        resp = self.preflight("POST", "content-type,x-persona")
+        self.assertEqual(resp.status_code, 200, resp.text)
+        self.assertEqual(resp.headers["access-control-allow-origin"], "http://localhost:8080")
+
+    def test_upload_headers_allowed(self):
+        resp = self.preflight("POST", "x-persona")
+        self.assertEqual(resp.status_code, 200, resp.text)
+
+    def test_unknown_header_rejected(self):
+        resp = self.preflight("GET", "x-not-sent-by-ui")
+        self.assertEqual(resp.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+
+from services.llm_client import _extract_json
+
+
+class ExtractJsonTest(unittest.TestCase):
+    def test_whole_reply_object(self):
+        self.assertEqual(_extract_json('{"a": 1}'), {"a": 1})
+
+    def test_prose_with_brackets_before_object(self):
+        text = 'Ports [80, 443] are open. {"execution_order": [1, 0], "summary": "ok"}'
+        self.assertEqual(_extract_json(text), {"execution_order": [1, 0], "summary": "ok"})
+
+    def test_bracketed_index_before_object(self):
+        self.assertEqual(_extract_json('Step [1] first:\n```json\n{"plan": []}\n```'), {"plan": []})
+
+    def test_object_inside_top_level_array(self):
+        self.assertEqual(_extract_json('[{"a": 1}]'), {"a": 1})
+
+    def test_trailing_text_and_second_object(self):
+        self.assertEqual(_extract_json('Sure! {"a": {"b": 2}} and also {"c": 3}'), {"a": {"b": 2}})
+
+    def test_unbalanced_brace_in_prose_is_skipped(self):
+        self.assertEqual(_extract_json('use { carefully, then {"k": "v"}'), {"k": "v"})
+
+    def test_no_object(self):
+        for text in ("", None, "no json here", "[1, 2, 3]", '{"a":'):
+            self.assertIsNone(_extract_json(text), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+import orjson
+
+from services import llm_client
+
+
+class ChatModelFallbackTest(unittest.TestCase):
+    """Which models ollama_chat tries, against a scripted /api/chat."""
+
+    def setUp(self):
+        llm_client._missing_model_fallback.clear()
+        llm_client._models_cache.clear()
+        self.calls: list[str] = []
+        self.status: dict[str, int] = {}
+        self.addCleanup(llm_client._missing_model_fallback.clear)
+        self.addCleanup(llm_client._models_cache.clear)
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/tags":
+            return httpx.Response(200, json={"models": []})
+        model = orjson.loads(request.content)["model"]
+        self.calls.append(model)
+        status = self.status.get(model, 200)
+        if status != 200:
+            return httpx.Response(status, text=f"model {model!r} error")
+        return httpx.Response(200, content=orjson.dumps({"message": {"content": f"hi from {model}"}}) + b"\n")
+
+    def chat(self) -> str:
+        async def run():
+            client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+            with mock.patch.object(llm_client, "_ollama_client", return_value=client):
+                try:
+                    return await llm_client.ollama_chat([{"role": "user", "content": "hi"}], preferred_model="custom")
+                finally:
+                    await client.aclose()
+        return asyncio.run(run())
+
+    def test_transient_failure_does_not_demote_preferred(self):
+        self.status["custom"] = 503
+        self.assertEqual(self.chat(), "hi from llama3.1:8b")
+        del self.status["custom"]
+        self.calls.clear()
+        self.assertEqual(self.chat(), "hi from custom")
+        self.assertEqual(self.calls, ["custom"])
+
+    def test_missing_preferred_uses_remembered_fallback(self):
+        self.status["custom"] = 404
+        self.assertEqual(self.chat(), "hi from llama3.1:8b")
+        self.calls.clear()
+        self.assertEqual(self.chat(), "hi from llama3.1:8b")
+        self.assertEqual(self.calls, ["llama3.1:8b"])
+
+    def test_missing_model_memo_expires(self):
+        self.status["custom"] = 404
+        self.chat()
+        del self.status["custom"]
+        key = next(iter(llm_client._missing_model_fallback))
+        model, _ = llm_client._missing_model_fallback[key]
+        llm_client._missing_model_fallback[key] = (model, 0.0)
+        self.calls.clear()
+        self.assertEqual(self.chat(), "hi from custom")
+        self.assertEqual(self.calls, ["custom"])
+        self.assertEqual(llm_client._missing_model_fallback, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
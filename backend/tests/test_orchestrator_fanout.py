@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from services import agentic_orchestrator as orch
+
+
+class SpecialistDown(Exception):
+    pass
+
+
+class FanOutCancellationTest(unittest.TestCase):
+    """A failing specialist must tear down the rest of orchestrate_workload's fan-out."""
+
+    def test_failing_specialist_cancels_siblings(self):
+        started: list[str] = []
+        cancelled: list[str] = []
+
+        async def specialist(**kwargs):
+            agent = kwargs["agent"]
+            started.append(agent)
+            if agent == "migration":
+                await asyncio.sleep(0)
+                raise SpecialistDown(agent)
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(agent)
+                raise
+            return {"agent": agent, "response": "late"}
+
+        async def plan(*args, **kwargs):
+            await asyncio.sleep(30)
+            return {}
+
+        tasks = [{"agent": a, "objective": a} for a in ("assessment", "migration", "pmo")]
+
+        async def run():
+            with mock.patch.object(orch, "run_specialist_agent", specialist), \
+                    mock.patch.object(orch, "ollama_chat_json", plan):
+                with self.assertRaises(SpecialistDown):
+                    await orch.orchestrate_workload(objective="obj", tasks=tasks)
+            # Nothing from the fan-out may still be pending once the error is raised.
+            return [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+
+        leftover = asyncio.run(run())
+        self.assertEqual(leftover, [])
+        self.assertEqual(sorted(started), ["assessment", "migration", "pmo"])
+        self.assertEqual(sorted(cancelled), ["assessment", "pmo"])
+
+
+class SharedMcpCallTest(unittest.TestCase):
+    def test_cancelled_caller_does_not_cancel_shared_call(self):
+        async def slow_tool(tool, args):
+            await asyncio.sleep(0.01)
+            return {"ok": tool}
+
+        @orch.mcp_request_cache
+        async def run():
+            first = asyncio.ensure_future(orch._cached_tool_call("t", {}))
+            second = asyncio.ensure_future(orch._cached_tool_call("t", {}))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        with mock.patch.object(orch, "invoke_mcp_tool", slow_tool):
+            self.assertEqual(asyncio.run(run()), {"ok": "t"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from services import agentic_orchestrator as orch
+
+
+async def _fake_specialist(**kwargs):
+    return {"agent": kwargs["agent"], "response": "ok"}
+
+
+async def _fake_chat(*args, **kwargs):
+    return "summary"
+
+
+class PlanOrderTest(unittest.TestCase):
+    """orchestrate_workload must survive whatever the planner returns."""
+
+    TASKS = [{"agent": "assessment", "objective": "a"}, {"agent": "migration", "objective": "b"}]
+
+    def setUp(self):
+        orch._plan_cache.clear()
+        self.addCleanup(orch._plan_cache.clear)
+
+    def run_with_plan(self, plan):
+        async def fake_json(*args, **kwargs):
+            return plan
+
+        with mock.patch.object(orch, "ollama_chat_json", fake_json), \
+                mock.patch.object(orch, "run_specialist_agent", _fake_specialist), \
+                mock.patch.object(orch, "ollama_chat", _fake_chat):
+            return asyncio.run(orch.orchestrate_workload(objective="obj", tasks=self.TASKS))
+
+    def test_valid_plan_is_used_and_cached(self):
+        out = self.run_with_plan({"execution_order": [1, 0], "rationale": "deps"})
+        self.assertEqual(out["execution_order"], [1, 0])
+        self.assertEqual(out["rationale"], "deps")
+        self.assertEqual(len(orch._plan_cache), 1)
+
+    def test_unparseable_digits_fall_back_uncached(self):
+        # "²".isdigit() is True but int("²") raises.
+        out = self.run_with_plan({"execution_order": ["²", 0], "rationale": "x"})
+        self.assertEqual(out["execution_order"], [0, 1])
+        self.assertEqual(out["rationale"], "default-sequential")
+        self.assertEqual(len(orch._plan_cache), 0)
+
+    def test_rejected_order_falls_back_uncached(self):
+        bad_plans = (
+            {"rationale": "bad"},
+            {"execution_order": [0, 2], "rationale": "bad"},
+            {"execution_order": [0], "rationale": "bad"},
+            {"execution_order": "0,1", "rationale": "bad"},
+        )
+        for plan in bad_plans:
+            with self.subTest(plan=plan):
+                out = self.run_with_plan(plan)
+                self.assertEqual(out["execution_order"], [0, 1])
+                self.assertEqual(out["rationale"], "default-sequential")
+                self.assertEqual(len(orch._plan_cache), 0)
+
+    def test_rejected_plan_does_not_block_a_later_valid_one(self):
+        self.run_with_plan({"execution_order": [0, 2]})
+        out = self.run_with_plan({"execution_order": [1, 0], "rationale": "deps"})
+        self.assertEqual(out["execution_order"], [1, 0])
+        self.assertEqual(out["rationale"], "deps")
+
+
+if __name__ == "__main__":
+    unittest.main()